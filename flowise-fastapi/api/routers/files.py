@@ -0,0 +1,67 @@
+import asyncio
+from dataclasses import asdict
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+
+from core.uploads import StoredFile, UploadStore, UploadTooLargeError, get_upload_store
+
+router = APIRouter()
+
+def _describe(stored: StoredFile) -> Dict[str, Any]:
+    return {**asdict(stored), "handle": stored.handle}
+
+@router.post("", status_code=status.HTTP_201_CREATED)
+async def upload_file(
+    request: Request,
+    filename: Optional[str] = Query(None, description="Original file name"),
+    store: UploadStore = Depends(get_upload_store)
+):
+    """
+    Upload a file as the raw request body. The body is streamed to disk and
+    stored under its SHA-256; the returned `handle` (upload://<sha256>) can be
+    used as the file path of loader nodes.
+    """
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > store.max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Upload exceeds {store.max_bytes} bytes"
+        )
+    try:
+        stored = await store.save(request.stream(), filename=filename, content_type=request.headers.get("content-type"))
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    if stored.size == 0:
+        await asyncio.to_thread(store.delete, stored.sha256)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty upload")
+    print(f"📁 Stored upload {stored.sha256[:12]} ({stored.size} bytes{', duplicate' if stored.deduplicated else ''})")
+    return _describe(stored)
+
+@router.get("/{sha256}")
+async def get_file(sha256: str, store: UploadStore = Depends(get_upload_store)):
+    """Metadata of an uploaded file"""
+    try:
+        stored = await asyncio.to_thread(store.info, sha256)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if stored is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+    return _describe(stored)
+
+@router.delete("/{sha256}")
+async def delete_file(sha256: str, store: UploadStore = Depends(get_upload_store)):
+    """
+    Delete an uploaded file. Identical uploads share one stored file, so this
+    releases one upload's reference; the file is removed with the last one.
+    """
+    try:
+        # Deletes take the store's file lock; keep the wait off the event loop
+        remaining = await asyncio.to_thread(store.delete, sha256)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if remaining is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+    if remaining:
+        return {"message": "Upload reference released; the file is still used by other uploads", "references": remaining}
+    return {"message": "Upload deleted successfully", "references": 0}
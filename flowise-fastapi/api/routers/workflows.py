@@ -5,11 +5,15 @@ from typing import List, Dict, Any, Optional
 import json
 import asyncio
 from datetime import datetime
-import uuid
 
-from core.workflow_runner import WorkflowRunner
+from core.workflow_runner import WorkflowRunner, get_flow_cache
+from core.http_cache import get_http_cache
+from core.embedding_batcher import embedding_batcher_summary
+from core.chroma_registry import get_chroma_registry
 from core.node_discovery import get_registry
 from core.config import get_settings
+from core.cassette import get_cassette
+from core.session_store import get_session_store
 
 router = APIRouter()
 settings = get_settings()
@@ -53,45 +57,13 @@ class ChatMessage(BaseModel):
     flow_id: str
     session_id: Optional[str] = None
 
-# Session storage (In production, use Redis or database)
-class SessionManager:
-    def __init__(self):
-        self.sessions: Dict[str, Dict[str, Any]] = {}
-    
-    def create_session(self, session_id: Optional[str] = None) -> str:
-        if not session_id:
-            session_id = str(uuid.uuid4())
-        
-        self.sessions[session_id] = {
-            "id": session_id,
-            "created_at": datetime.now(),
-            "messages": [],
-            "context": {},
-            "last_workflow": None
-        }
-        return session_id
-    
-    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
-        return self.sessions.get(session_id)
-    
-    def update_session(self, session_id: str, data: Dict[str, Any]):
-        if session_id in self.sessions:
-            self.sessions[session_id].update(data)
-    
-    def add_message(self, session_id: str, message: str, response: str):
-        if session_id in self.sessions:
-            self.sessions[session_id]["messages"].append({
-                "timestamp": datetime.now(),
-                "human": message,
-                "ai": response
-            })
-
-session_manager = SessionManager()
+# Session storage (bounded, with LRU/TTL eviction)
+session_manager = get_session_store()
 
 def get_workflow_runner():
     """Dependency injection for WorkflowRunner"""
     registry = get_registry()
-    return WorkflowRunner(registry)
+    return WorkflowRunner(registry, cassette=get_cassette(), flow_cache=get_flow_cache())
 
 @router.post("/execute", response_model=WorkflowExecutionResponse)
 async def execute_workflow(
@@ -129,7 +101,8 @@ async def execute_workflow(
         
         # Update session
         if session:
-            session_manager.add_message(session_id, request.input, str(result.get("result", "")))
+            if not result.get("memory_persisted"):
+                session_manager.add_message(session_id, request.input, str(result.get("result", "")))
             session_manager.update_session(session_id, {"last_workflow": request.workflow.name})
         
         print(f"✅ Workflow completed in {execution_time:.2f}s")
@@ -244,6 +217,13 @@ async def create_session():
         "created_at": datetime.now().isoformat()
     }
 
+@router.get("/sessions/stats")
+async def get_session_stats():
+    """
+    Session store memory usage and eviction statistics
+    """
+    return session_manager.stats()
+
 @router.get("/sessions/{session_id}")
 async def get_session(session_id: str):
     """
@@ -256,9 +236,9 @@ async def get_session(session_id: str):
     return {
         "session_id": session_id,
         "created_at": session["created_at"].isoformat(),
-        "message_count": len(session["messages"]),
+        "message_count": session["messages"].exchange_count,
         "last_workflow": session.get("last_workflow"),
-        "messages": session["messages"][-10:]  # Last 10 messages
+        "messages": session["messages"].exchanges(last=10)  # Last 10 messages
     }
 
 @router.post("/chat")
@@ -300,33 +280,28 @@ async def health_check():
     Health check endpoint
     """
     registry = get_registry()
+    http_cache = get_http_cache()
     
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "available_nodes": len(registry),
-        "node_types": list(registry.keys())
+        "node_types": list(registry.keys()),
+        "flow_cache": get_flow_cache().stats(),
+        "http_cache": http_cache.summary() if http_cache else None,
+        "embedding_batchers": embedding_batcher_summary(),
+        "chroma": get_chroma_registry().summary()
     }
 
-# Background task for cleanup (optional)
+# Background task for cleanup (the sweeper also runs this periodically)
 @router.post("/cleanup")
 async def cleanup_sessions(background_tasks: BackgroundTasks):
     """
-    Cleanup old sessions (background task)
+    Expire idle sessions now (background task)
     """
     def cleanup():
-        current_time = datetime.now()
-        expired_sessions = []
-        
-        for session_id, session_data in session_manager.sessions.items():
-            # Remove sessions older than 24 hours
-            if (current_time - session_data["created_at"]).total_seconds() > 86400:
-                expired_sessions.append(session_id)
-        
-        for session_id in expired_sessions:
-            del session_manager.sessions[session_id]
-        
-        print(f"🧹 Cleaned up {len(expired_sessions)} expired sessions")
+        expired = session_manager.sweep()
+        print(f"🧹 Cleaned up {expired} expired sessions")
     
     background_tasks.add_task(cleanup)
     return {"message": "Cleanup task scheduled"}
@@ -341,13 +316,13 @@ async def debug_sessions():
         raise HTTPException(status_code=404, detail="Not found")
     
     return {
-        "total_sessions": len(session_manager.sessions),
+        "total_sessions": len(session_manager),
         "sessions": {
             sid: {
                 "created_at": data["created_at"].isoformat(),
-                "message_count": len(data["messages"]),
+                "message_count": data["messages"].exchange_count,
                 "last_workflow": data.get("last_workflow")
             }
-            for sid, data in session_manager.sessions.items()
+            for sid, data in session_manager.iter_sessions()
         }
     }
@@ -0,0 +1,61 @@
+"""
+Synthetic workflow definitions built from the fake provider nodes.
+"""
+from typing import Any, Dict
+
+
+def _node(node_id: str, node_type: str, **data) -> Dict[str, Any]:
+    return {"id": node_id, "type": node_type, "data": data, "position": {"x": 0.0, "y": 0.0}}
+
+
+def _edge(source: str, target: str, target_handle: str) -> Dict[str, Any]:
+    return {
+        "id": f"{source}->{target}:{target_handle}",
+        "source": source,
+        "target": target,
+        "sourceHandle": "output",
+        "targetHandle": target_handle,
+    }
+
+
+def chat_flow(latency_ms: float = 0.0, tokens_per_second: float = 0.0) -> Dict[str, Any]:
+    """A single fake chat model answering the input directly"""
+    return {
+        "nodes": [_node("llm_1", "FakeChatModel", latency_ms=latency_ms, tokens_per_second=tokens_per_second)],
+        "edges": [],
+    }
+
+
+def react_flow(tool_count: int = 1, react_steps: int = 1, latency_ms: float = 0.0, memory: bool = False) -> Dict[str, Any]:
+    """A ReAct agent with `tool_count` fake tools, a scripted fake model and optional session memory"""
+    nodes = [
+        _node("llm_1", "FakeChatModel", script="react", react_steps=react_steps, latency_ms=latency_ms),
+        _node("prompt_1", "AgentPrompt"),
+        _node("agent_1", "ReactAgent"),
+    ]
+    edges = [_edge("llm_1", "agent_1", "llm"), _edge("prompt_1", "agent_1", "prompt")]
+    for i in range(tool_count):
+        # The model always calls fake_search, so the first tool keeps that name
+        name = "fake_search" if i == 0 else f"fake_tool_{i}"
+        nodes.append(_node(f"tool_{i}", "FakeTool", name=name, latency_ms=latency_ms))
+        edges.append(_edge(f"tool_{i}", "agent_1", "tools"))
+    if memory:
+        nodes.append(_node("memory_1", "ConversationMemory", k=5))
+        edges.append(_edge("memory_1", "agent_1", "memory"))
+    return {"nodes": nodes, "edges": edges}
+
+
+def wide_flow(width: int) -> Dict[str, Any]:
+    """`width` independent nodes with no edges (exercises per-node overhead)"""
+    return {
+        "nodes": [_node(f"hello_{i}", "TestHello") for i in range(width)],
+        "edges": [],
+    }
+
+
+def as_request(flow: Dict[str, Any], input_text: str = "benchmark input", name: str = "benchmark") -> Dict[str, Any]:
+    """Wrap a flow into a WorkflowExecutionRequest payload"""
+    return {
+        "workflow": {"name": name, "nodes": flow["nodes"], "edges": flow["edges"]},
+        "input": input_text,
+    }
@@ -0,0 +1,228 @@
+"""
+Timing, in-process ASGI driving and baseline comparison helpers for the benchmark suite.
+"""
+import asyncio
+import hashlib
+import json
+import platform
+import random
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Metrics where a larger value is better; every other metric is treated as a latency.
+HIGHER_IS_BETTER = {"ops_per_sec", "mb_per_sec"}
+# Tail percentiles and means are too noisy on shared machines to gate on.
+GATED_SUFFIXES = ("ops_per_sec", "p50_ms", "bytes_per_session", "mb_per_sec")
+# Gated metrics that do not scale with CPU speed and are compared as recorded.
+UNNORMALISED = {"bytes_per_session"}
+
+
+@dataclass
+class BenchResult:
+    """Outcome of a single benchmark case"""
+    name: str
+    iterations: int
+    total_seconds: float
+    metrics: Dict[str, float] = field(default_factory=dict)
+    params: Dict[str, Any] = field(default_factory=dict)
+    # `reference_ms()` measured alongside this result, used to compare across machines
+    reference_ms: Optional[float] = None
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def reference_ms(rounds: int = 5) -> float:
+    """
+    Best-of-`rounds` time (ms) of a fixed interpreter-bound workload. Timings are
+    compared as ratios to this, so a baseline recorded on a faster or slower
+    machine still gates relative regressions.
+    """
+    rng = random.Random(0)
+    values = [rng.random() for _ in range(50_000)]
+    text = json.dumps(values)
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        sorted(values)
+        json.loads(text)
+        hashlib.sha256(text.encode()).digest()
+        sum(value * value for value in values)
+        {str(i): i for i in range(20_000)}
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def latency_metrics(samples: List[float], total_seconds: float, prefix: str = "") -> Dict[str, float]:
+    """Summarise per-operation latencies (seconds) into ms percentiles and throughput"""
+    metrics = {
+        f"{prefix}p50_ms": percentile(samples, 50) * 1000,
+        f"{prefix}p95_ms": percentile(samples, 95) * 1000,
+        f"{prefix}p99_ms": percentile(samples, 99) * 1000,
+        f"{prefix}mean_ms": (statistics.fmean(samples) * 1000) if samples else 0.0,
+    }
+    if not prefix:
+        metrics["ops_per_sec"] = len(samples) / total_seconds if total_seconds > 0 else 0.0
+    return metrics
+
+
+def time_calls(func: Callable[[], Any], iterations: int) -> Tuple[List[float], float]:
+    """Call `func` repeatedly, returning per-call latencies and the wall time"""
+    samples = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - t0)
+    return samples, time.perf_counter() - started
+
+
+async def time_concurrent(
+    func: Callable[[], Awaitable[Any]],
+    iterations: int,
+    concurrency: int
+) -> Tuple[List[Any], float]:
+    """Run `iterations` calls of `func` with at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            return await func()
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one() for _ in range(iterations)))
+    return list(results), time.perf_counter() - started
+
+
+@dataclass
+class ASGIResponse:
+    status: int
+    body: bytes
+    first_byte_seconds: float
+    first_token_seconds: Optional[float]
+    total_seconds: float
+
+
+async def asgi_request(app, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> ASGIResponse:
+    """
+    Call an ASGI app directly, recording when the first body byte and the first
+    SSE token event arrive (httpx's ASGITransport buffers the whole body).
+    """
+    body = json.dumps(payload).encode() if payload is not None else b""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+    request_sent = False
+    status = 0
+    parts: List[bytes] = []
+    first_byte = None
+    first_token = None
+    started = time.perf_counter()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal status, first_byte, first_token
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunk = message.get("body", b"")
+            if chunk:
+                now = time.perf_counter() - started
+                if first_byte is None:
+                    first_byte = now
+                if first_token is None and b'"type": "token"' in chunk:
+                    first_token = now
+                parts.append(chunk)
+
+    await app(scope, receive, send)
+    total = time.perf_counter() - started
+    return ASGIResponse(status, b"".join(parts), first_byte or total, first_token, total)
+
+
+def environment_info() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def write_results(results: List[BenchResult], path: Path, params: Dict[str, Any]) -> Dict[str, Any]:
+    document = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": environment_info(),
+        "params": params,
+        "results": {result.name: asdict(result) for result in results},
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(document, indent=2, sort_keys=True))
+    return document
+
+
+def compare_to_baseline(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float
+) -> List[Dict[str, Any]]:
+    """
+    Compare each shared metric with the baseline. A regression is a throughput
+    drop or a latency increase larger than `threshold` (a fraction, e.g. 0.25).
+    Baseline timings are first scaled by how much slower or faster this run's
+    `reference_ms` is; results without a reference on either side are skipped.
+    """
+    rows = []
+    for name, result in current.get("results", {}).items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not result.get("reference_ms") or not base.get("reference_ms"):
+            continue
+        # > 1 when this machine (or this run) is slower than the baseline's
+        slowdown = result["reference_ms"] / base["reference_ms"]
+        for metric, value in result["metrics"].items():
+            if not metric.endswith(GATED_SUFFIXES):
+                continue
+            base_value = base["metrics"].get(metric)
+            if base_value is None or base_value == 0:
+                continue
+            if metric in HIGHER_IS_BETTER:
+                base_value /= slowdown
+            elif metric not in UNNORMALISED:
+                base_value *= slowdown
+            change = (value - base_value) / base_value
+            if metric in HIGHER_IS_BETTER:
+                regressed = change < -threshold
+            else:
+                regressed = change > threshold
+            rows.append({
+                "benchmark": name,
+                "metric": metric,
+                "baseline": base_value,
+                "current": value,
+                "change": change,
+                "regressed": regressed,
+            })
+    return rows
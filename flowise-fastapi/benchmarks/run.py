@@ -0,0 +1,827 @@
+"""
+Benchmark suite for the chain builder, workflow runner, session manager, API
+and document loading (web page text extraction, PDF pages, text splitting,
+streaming ingestion) and vector retrieval.
+
+Everything runs in-process against the fake provider nodes, so no network or
+API keys are needed. Run from the `flowise-fastapi` directory:
+
+    python -m benchmarks.run                       # full run, compare to baseline
+    python -m benchmarks.run --quick               # smaller sizes for a smoke run
+    python -m benchmarks.run --suite builder --suite catalog
+    python -m benchmarks.run --update-baseline     # store this run as the baseline
+    python -m benchmarks.run --suite replay --cassette cassettes/prod.jsonl.gz
+    python -m benchmarks.run --suite extract --html-corpus pages.jsonl.gz
+    python -m benchmarks.run --suite split
+    python -m benchmarks.run --suite retrieval
+    python -m benchmarks.run --suite ivf
+    python -m benchmarks.run --suite hybrid
+
+Results are written as JSON (default: benchmarks/results/latest.json). The
+process exits with status 1 when a gated metric regresses past --threshold.
+Every suite also times a fixed reference workload, and baseline timings are
+scaled by the ratio of the two runs' reference times before comparing, so the
+stored baseline stays meaningful on other machines. A baseline recorded in the
+other mode (full vs --quick) is not compared against.
+"""
+import argparse
+import asyncio
+import contextlib
+import gc
+import gzip
+import io
+import json
+import os
+import random
+import resource
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from benchmarks import flows
+from benchmarks.harness import (
+    BenchResult,
+    asgi_request,
+    compare_to_baseline,
+    latency_metrics,
+    reference_ms,
+    time_calls,
+    time_concurrent,
+    write_results,
+)
+
+BENCH_DIR = Path(__file__).parent
+DEFAULT_OUTPUT = BENCH_DIR / "results" / "latest.json"
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+DEFAULT_HTML_CORPUS = BENCH_DIR / "corpus" / "html_pages.jsonl.gz"
+
+SIZES = {
+    "full": {"graph_sizes": [10, 100, 500], "requests": 500, "concurrency": 32, "sessions": 1_000_000, "session_ops": 200_000, "catalog_calls": 200, "extract_rounds": 10, "pdf_pages": 1000, "split_paragraphs": 3000, "split_rounds": 5, "ingest_documents": 4000, "retrieval_vectors": 20_000, "retrieval_queries": 200, "ivf_vectors": 200_000, "hybrid_documents": 100_000},
+    "quick": {"graph_sizes": [10, 100], "requests": 50, "concurrency": 8, "sessions": 20_000, "session_ops": 20_000, "catalog_calls": 20, "extract_rounds": 2, "pdf_pages": 100, "split_paragraphs": 500, "split_rounds": 2, "ingest_documents": 400, "retrieval_vectors": 2_000, "retrieval_queries": 50, "ivf_vectors": 20_000, "hybrid_documents": 10_000},
+}
+
+
+def bench_builder(sizes: Dict) -> List[BenchResult]:
+    """`DynamicChainBuilder.build_from_flow` on synthetic graphs"""
+    from core.dynamic_chain_builder import DynamicChainBuilder
+    from core.node_discovery import get_registry
+
+    registry = get_registry()
+    results = []
+    cases = [("react_tools", lambda n: flows.react_flow(tool_count=n)),
+             ("wide", flows.wide_flow)]
+    for case, make_flow in cases:
+        for size in sizes["graph_sizes"]:
+            flow = make_flow(size)
+            builder = DynamicChainBuilder(registry)
+            builder.build_from_flow(flow)  # warm up imports and caches
+            iterations = max(3, 2000 // size)
+            samples, total = time_calls(lambda: builder.build_from_flow(flow), iterations)
+            results.append(BenchResult(
+                name=f"builder.{case}.{size}",
+                iterations=iterations,
+                total_seconds=total,
+                metrics=latency_metrics(samples, total),
+                params={"nodes": len(flow["nodes"]), "edges": len(flow["edges"])},
+            ))
+    return results
+
+
+def _is_failure(body: bytes, streaming: bool) -> bool:
+    if streaming:
+        return b'"type": "error"' in body
+    return not json.loads(body).get("success")
+
+
+async def _bench_endpoint(app, name: str, path: str, payload: Dict, sizes: Dict, streaming: bool) -> BenchResult:
+    await asgi_request(app, "POST", path, payload)  # warm up
+    responses, total = await time_concurrent(
+        lambda: asgi_request(app, "POST", path, payload),
+        sizes["requests"],
+        sizes["concurrency"],
+    )
+    failures = [r for r in responses if r.status != 200 or _is_failure(r.body, streaming)]
+    if failures:
+        raise RuntimeError(f"{name}: {len(failures)} failed requests, first body: {failures[0].body[:300]!r}")
+
+    metrics = latency_metrics([r.total_seconds for r in responses], total)
+    if streaming:
+        metrics.update(latency_metrics([r.first_token_seconds or r.total_seconds for r in responses], total, prefix="ttft_"))
+        events = sum(r.body.count(b"data: ") for r in responses)
+        metrics["events_per_sec"] = events / total if total > 0 else 0.0
+    return BenchResult(
+        name=name,
+        iterations=len(responses),
+        total_seconds=total,
+        metrics=metrics,
+        params={"concurrency": sizes["concurrency"]},
+    )
+
+
+def bench_execute(sizes: Dict) -> List[BenchResult]:
+    """`/execute` throughput with fake providers"""
+    from main import app
+
+    async def run():
+        return [
+            await _bench_endpoint(app, "execute.chat", "/api/v1/workflows/execute",
+                                  flows.as_request(flows.chat_flow()), sizes, streaming=False),
+            await _bench_endpoint(app, "execute.react", "/api/v1/workflows/execute",
+                                  flows.as_request(flows.react_flow(tool_count=3, react_steps=2)), sizes, streaming=False),
+        ]
+    return asyncio.run(run())
+
+
+def bench_stream(sizes: Dict) -> List[BenchResult]:
+    """`/execute/stream` throughput and time to first token with fake providers"""
+    from main import app
+
+    async def run():
+        return [
+            await _bench_endpoint(app, "stream.chat", "/api/v1/workflows/execute/stream",
+                                  flows.as_request(flows.chat_flow(), input_text="stream " * 50), sizes, streaming=True),
+            await _bench_endpoint(app, "stream.react", "/api/v1/workflows/execute/stream",
+                                  flows.as_request(flows.react_flow(tool_count=3, react_steps=2)), sizes, streaming=True),
+        ]
+    return asyncio.run(run())
+
+
+def _max_rss_bytes() -> int:
+    # ru_maxrss is reported in KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def bench_sessions(sizes: Dict) -> List[BenchResult]:
+    """Session store operations with a large number of live sessions"""
+    from core.session_store import InMemorySessionStore
+
+    count = sizes["sessions"]
+    ops = sizes["session_ops"]
+    manager = InMemorySessionStore(max_sessions=count + 1000)
+    rng = random.Random(0)
+
+    gc.collect()
+    rss_before = _max_rss_bytes()
+    create_samples, create_total = time_calls(manager.create_session, count)
+    gc.collect()
+    rss_after = _max_rss_bytes()
+    session_ids = [manager.create_session(f"bench-{i}") for i in range(1000)]
+
+    def pick() -> str:
+        return session_ids[rng.randrange(len(session_ids))]
+
+    operations: Dict[str, Callable[[], object]] = {
+        "get": lambda: manager.get_session(pick()),
+        "add_message": lambda: manager.add_message(pick(), "hello there", "general kenobi"),
+        "update": lambda: manager.update_session(pick(), {"last_workflow": "bench"}),
+    }
+
+    results = [BenchResult(
+        name="sessions.create",
+        iterations=count,
+        total_seconds=create_total,
+        metrics={**latency_metrics(create_samples, create_total),
+                 "bytes_per_session": (rss_after - rss_before) / count},
+        params={"sessions": count},
+    )]
+    for op_name, op in operations.items():
+        samples, total = time_calls(op, ops)
+        results.append(BenchResult(
+            name=f"sessions.{op_name}",
+            iterations=ops,
+            total_seconds=total,
+            metrics=latency_metrics(samples, total),
+            params={"sessions": count + len(session_ids)},
+        ))
+
+    # Chain input for a long conversation; chat history is rendered once per turn
+    from core.workflow_runner import WorkflowRunner
+
+    runner = WorkflowRunner(registry={})
+    session = manager.get_session(session_ids[0])
+    for i in range(200):
+        manager.add_message(session_ids[0], f"question {i}", f"answer {i}")
+
+    def prepare_turn():
+        manager.add_message(session_ids[0], "hello there", "general kenobi")
+        runner._prepare_chain_input("next", session)
+
+    samples, total = time_calls(prepare_turn, ops)
+    results.append(BenchResult(
+        name="sessions.prepare_input",
+        iterations=ops,
+        total_seconds=total,
+        metrics=latency_metrics(samples, total),
+        params={"history_messages": len(session["messages"])},
+    ))
+    del manager
+    gc.collect()
+
+    # Churn through a store that is already full, so every create evicts
+    bounded = InMemorySessionStore(max_sessions=max(1, count // 10))
+    for _ in range(bounded.max_sessions):
+        bounded.create_session()
+    samples, total = time_calls(bounded.create_session, ops)
+    results.append(BenchResult(
+        name="sessions.create_evicting",
+        iterations=ops,
+        total_seconds=total,
+        metrics=latency_metrics(samples, total),
+        params={"max_sessions": bounded.max_sessions},
+    ))
+
+    # SQLite write-behind: request-path cost of appends, then the batched flush
+    import tempfile
+    from core.sqlite_session_store import SqliteSessionStore
+
+    with tempfile.TemporaryDirectory() as directory:
+        durable = SqliteSessionStore(f"{directory}/sessions.db", flush_interval_seconds=3600)
+        durable_ids = [durable.create_session() for _ in range(1000)]
+        durable.flush()
+        samples, total = time_calls(
+            lambda: durable.add_message(durable_ids[rng.randrange(len(durable_ids))], "hello there", "general kenobi"),
+            ops
+        )
+        flush_started = time.perf_counter()
+        durable.flush()
+        flush_seconds = time.perf_counter() - flush_started
+        durable.close()
+    results.append(BenchResult(
+        name="sessions.sqlite_add_message",
+        iterations=ops,
+        total_seconds=total,
+        metrics={**latency_metrics(samples, total), "flush_ms": flush_seconds * 1000},
+        params={"sessions": len(durable_ids)},
+    ))
+    return results
+
+
+def bench_catalog(sizes: Dict) -> List[BenchResult]:
+    """`GET /api/v1/nodes` latency"""
+    from main import app
+
+    async def run():
+        await asgi_request(app, "GET", "/api/v1/nodes")
+        samples = []
+        started = time.perf_counter()
+        for _ in range(sizes["catalog_calls"]):
+            response = await asgi_request(app, "GET", "/api/v1/nodes")
+            if response.status != 200:
+                raise RuntimeError(f"catalog returned {response.status}")
+            samples.append(response.total_seconds)
+        total = time.perf_counter() - started
+        return [BenchResult(
+            name="catalog.list_nodes",
+            iterations=len(samples),
+            total_seconds=total,
+            metrics=latency_metrics(samples, total),
+            params={"node_types": len(json.loads(response.body))},
+        )]
+    return asyncio.run(run())
+
+
+def _load_corpus(path: Path) -> List[Dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _extraction_quality(pages: List[Dict], texts: List[str]) -> Dict[str, float]:
+    """Share of main-content passages kept and of boilerplate passages leaked"""
+    content = kept = boilerplate = leaked = 0
+    for page, text in zip(pages, texts):
+        normalized = " ".join(text.split())
+        content += len(page["content"])
+        kept += sum(1 for passage in page["content"] if passage in normalized)
+        boilerplate += len(page["boilerplate"])
+        leaked += sum(1 for passage in page["boilerplate"] if passage in normalized)
+    return {
+        "content_recall": kept / content if content else 0.0,
+        "boilerplate_leak": leaked / boilerplate if boilerplate else 0.0,
+    }
+
+
+def bench_extract(sizes: Dict) -> List[BenchResult]:
+    """HTML-to-text throughput: WebBaseLoader's BeautifulSoup path vs `core.html_extract`"""
+    from bs4 import BeautifulSoup
+    from core.html_extract import extract_html
+
+    pages = _load_corpus(sizes["corpus"])
+    documents = [page["html"].encode("utf-8") for page in pages]
+    total_bytes = sum(len(document) for document in documents)
+    extractors = {
+        # What WebBaseLoader does per page: parse the whole tree, then get_text()
+        "extract.webbase": lambda html: BeautifulSoup(html, "html.parser").get_text(),
+        "extract.streaming": lambda html: extract_html(html).text,
+    }
+    results = []
+    for name, extract in extractors.items():
+        texts = [extract(document) for document in documents]
+        samples = []
+        started = time.perf_counter()
+        for _ in range(sizes["extract_rounds"]):
+            for document in documents:
+                t0 = time.perf_counter()
+                extract(document)
+                samples.append(time.perf_counter() - t0)
+        total = time.perf_counter() - started
+        results.append(BenchResult(
+            name=name,
+            iterations=len(samples),
+            total_seconds=total,
+            metrics={
+                **latency_metrics(samples, total),
+                "mb_per_sec": total_bytes * sizes["extract_rounds"] / total / 1e6,
+                **_extraction_quality(pages, texts),
+            },
+            params={"pages": len(pages), "corpus_bytes": total_bytes},
+        ))
+    return results
+
+
+def _current_rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return _max_rss_bytes()
+
+
+def bench_pdf(sizes: Dict) -> List[BenchResult]:
+    """PDF loading: PyPDFLoader vs `LazyPdfLoader` (sequential and process-parallel)"""
+    import multiprocessing
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+    from langchain_community.document_loaders import PyPDFLoader
+    from benchmarks.documents import lorem_lines, write_text_pdf
+    from core.pdf_loader import LazyPdfLoader
+
+    page_count = sizes["pdf_pages"]
+    results = []
+    with tempfile.TemporaryDirectory() as directory, ProcessPoolExecutor(
+        max_workers=4, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        path = str(write_text_pdf(Path(directory) / "bench.pdf", [lorem_lines(20, seed=i) for i in range(page_count)]))
+        # Start the workers outside the timings, as a running server would have them
+        LazyPdfLoader(path, max_pages=64, parallel_threshold=1, batch_size=1, executor=executor).load()
+
+        def consume(name: str, documents):
+            gc.collect()
+            rss_start = peak = _current_rss_bytes()
+            started = time.perf_counter()
+            first = None
+            pages = 0
+            for _ in documents():
+                pages += 1
+                if first is None:
+                    first = time.perf_counter() - started
+                if pages % 16 == 0:
+                    peak = max(peak, _current_rss_bytes())
+            total = time.perf_counter() - started
+            peak = max(peak, _current_rss_bytes())
+            results.append(BenchResult(
+                name=name,
+                iterations=pages,
+                total_seconds=total,
+                metrics={
+                    "ops_per_sec": pages / total,
+                    "first_page_ms": first * 1000,
+                    "rss_growth_mb": (peak - rss_start) / 1e6,
+                },
+                params={"pages": page_count},
+            ))
+
+        # The old node handed PyPDFLoader to the chain, which loads every page up front
+        consume("pdf.pypdfloader", lambda: PyPDFLoader(path).load())
+        consume("pdf.lazy_sequential", lambda: LazyPdfLoader(path, parallel=False).lazy_load())
+        consume("pdf.lazy_parallel", lambda: LazyPdfLoader(path, executor=executor).lazy_load())
+    return results
+
+
+def bench_split(sizes: Dict) -> List[BenchResult]:
+    """
+    Chunking throughput: LangChain's RecursiveCharacterTextSplitter vs `core.text_splitter`.
+    The recursive modes do not produce identical chunks (see `core.text_splitter`), so
+    their MB/s compare the cost of comparable, not the same, chunking.
+    """
+    from langchain_core.documents import Document
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    from benchmarks.documents import lorem_lines
+    from core.text_splitter import ChunkSplitter
+
+    rng = random.Random(7)
+    # Paragraphs of 1-30 lines, so some fit a chunk and some must be split at line breaks
+    documents = [
+        Document(
+            page_content="\n\n".join("\n".join(lorem_lines(rng.randint(1, 30), seed=i * 100 + j)) for j in range(10)),
+            metadata={"source": f"doc-{i}"},
+        )
+        for i in range(sizes["split_paragraphs"] // 10)
+    ]
+    total_bytes = sum(len(document.page_content.encode("utf-8")) for document in documents)
+    splitters = {
+        "split.langchain_recursive": RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, add_start_index=True),
+        "split.recursive": ChunkSplitter(chunk_size=1000, chunk_overlap=200),
+        "split.token": ChunkSplitter(chunk_size=256, chunk_overlap=32, mode="token"),
+    }
+    results = []
+    for name, splitter in splitters.items():
+        samples = []
+        chunks = 0
+        started = time.perf_counter()
+        for _ in range(sizes["split_rounds"]):
+            t0 = time.perf_counter()
+            chunks = len(splitter.split_documents(documents))
+            samples.append(time.perf_counter() - t0)
+        total = time.perf_counter() - started
+        results.append(BenchResult(
+            name=name,
+            iterations=len(samples),
+            total_seconds=total,
+            metrics={
+                **latency_metrics(samples, total),
+                "mb_per_sec": total_bytes * sizes["split_rounds"] / total / 1e6,
+            },
+            params={"documents": len(documents), "corpus_bytes": total_bytes, "chunks": chunks},
+        ))
+    return results
+
+
+def bench_ingest(sizes: Dict) -> List[BenchResult]:
+    """Streaming ingestion throughput and memory: generated loader -> split -> hashing embeddings -> discarding sink"""
+    from langchain_core.document_loaders import BaseLoader
+    from langchain_core.documents import Document
+    from benchmarks.documents import lorem_lines
+    from core.hashing_embeddings import HashingEmbeddings
+    from core.ingestion import IngestionPipeline
+    from core.text_splitter import ChunkSplitter
+
+    class GeneratedLoader(BaseLoader):
+        def lazy_load(self):
+            for i in range(sizes["ingest_documents"]):
+                yield Document(page_content="\n".join(lorem_lines(40, seed=i)), metadata={"source": f"doc-{i}"})
+
+    class NullCollection:
+        def __init__(self):
+            self.count = 0
+
+        def upsert(self, ids, embeddings, documents, metadatas):
+            self.count += len(ids)
+
+    sink = NullCollection()
+    pipeline = IngestionPipeline(
+        sources=[GeneratedLoader()],
+        embeddings=HashingEmbeddings(dimensions=256),
+        collection_factory=lambda: sink,
+        collection_name="bench",
+        splitter=ChunkSplitter(chunk_size=1000, chunk_overlap=100),
+        batch_size=128,
+    )
+
+    async def run():
+        gc.collect()
+        rss_start = peak = _current_rss_bytes()
+        started = time.perf_counter()
+        async for event in pipeline.astream({}):
+            peak = max(peak, _current_rss_bytes())
+        total = time.perf_counter() - started
+        return [BenchResult(
+            name="ingest.pipeline",
+            iterations=sink.count,
+            total_seconds=total,
+            metrics={
+                "ops_per_sec": sink.count / total,
+                "rss_growth_mb": (peak - rss_start) / 1e6,
+            },
+            params={"documents": sizes["ingest_documents"], "chunks": sink.count},
+        )]
+    return asyncio.run(run())
+
+
+def bench_retrieval(sizes: Dict) -> List[BenchResult]:
+    """Top-k query latency: Chroma collection vs memory-mapped NumPy index over the same vectors"""
+    import tempfile
+    import numpy as np
+    from core.chroma_registry import ChromaRegistry
+    from core.vector_index import MmapVectorIndex
+
+    count, dimensions, k = sizes["retrieval_vectors"], 256, 4
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((count, dimensions), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [str(i) for i in range(count)]
+    texts = [f"document {i}" for i in range(count)]
+    metadatas = [{"shard": i % 10} for i in range(count)]
+    queries = rng.standard_normal((sizes["retrieval_queries"], dimensions), dtype=np.float32)
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        collection = ChromaRegistry(os.path.join(directory, "chroma")).collection("bench", None)
+        index = MmapVectorIndex(os.path.join(directory, "index"))
+        for start in range(0, count, 5000):
+            batch = slice(start, start + 5000)
+            collection.upsert(ids=ids[batch], embeddings=vectors[batch], documents=texts[batch], metadatas=metadatas[batch])
+            index.upsert(ids[batch], vectors[batch], texts[batch], metadatas[batch])
+
+        cases = {
+            "chroma": lambda q: collection.query(query_embeddings=[q.tolist()], n_results=k),
+            "chroma_filtered": lambda q: collection.query(query_embeddings=[q.tolist()], n_results=k, where={"shard": 3}),
+            "numpy": lambda q: index.documents(index.search(q, k)[0]),
+            "numpy_filtered": lambda q: index.documents(index.search(q, k, where={"shard": 3})[0]),
+        }
+        for case, query in cases.items():
+            query(queries[0])  # warm up
+            position = iter(range(len(queries) * 2))
+            samples, total = time_calls(lambda: query(queries[next(position) % len(queries)]), len(queries))
+            results.append(BenchResult(
+                name=f"retrieval.{case}",
+                iterations=len(queries),
+                total_seconds=total,
+                metrics=latency_metrics(samples, total),
+                params={"vectors": count, "dimensions": dimensions, "k": k},
+            ))
+
+        # All queries in one matrix product (VectorIndexRetriever.batch)
+        samples, total = time_calls(lambda: index.search(queries, k), 5)
+        results.append(BenchResult(
+            name="retrieval.numpy_batched",
+            iterations=5 * len(queries),
+            total_seconds=total,
+            metrics={"ops_per_sec": 5 * len(queries) / total},
+            params={"vectors": count, "dimensions": dimensions, "k": k, "batch": len(queries)},
+        ))
+    return results
+
+
+def bench_ivf(sizes: Dict) -> List[BenchResult]:
+    """IVF build time, then recall@10 against exact search and query latency per nprobe"""
+    import tempfile
+    import numpy as np
+    from core.ivf_index import IVFIndex, build_ivf_index
+    from core.vector_index import MmapVectorIndex
+
+    count, dimensions, k, clusters = sizes["ivf_vectors"], 128, 10, 1000
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((clusters, dimensions), dtype=np.float32)
+
+    def clustered(n: int) -> np.ndarray:
+        # Topic-like structure, as real embeddings have (uniform noise would defeat any IVF)
+        return centers[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, dimensions), dtype=np.float32)
+
+    queries = clustered(sizes["retrieval_queries"])
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        source = MmapVectorIndex(os.path.join(directory, "exact"))
+        for start in range(0, count, 50_000):
+            n = min(50_000, count - start)
+            source.upsert([str(i) for i in range(start, start + n)], clustered(n), [""] * n)
+
+        started = time.perf_counter()
+        summary = build_ivf_index(source, os.path.join(directory, "ivf"))
+        build_seconds = time.perf_counter() - started
+        ivf = IVFIndex(os.path.join(directory, "ivf"))
+        ivf_bytes = sum(os.path.getsize(os.path.join(directory, "ivf", name)) for name in ("codes.i8", "scales.f32", "offsets.i64"))
+        results.append(BenchResult(
+            name="ivf.build",
+            iterations=1,
+            total_seconds=build_seconds,
+            metrics={"ops_per_sec": count / build_seconds, "compression": count * dimensions * 4 / ivf_bytes},
+            params=summary,
+        ))
+
+        # Records are identified by their offset in records.jsonl in both indexes
+        exact = [{source._offsets[row] for row, _ in hits} for hits in source.search(queries, k)]
+        for nprobe in (1, 4, 16, 64):
+            found = []
+            position = iter(range(len(queries)))
+
+            def query():
+                i = next(position)
+                hits = ivf.search(queries[i], k, nprobe=nprobe)[0]
+                found.append(len({int(ivf.offsets[row]) for row, _ in hits} & exact[i]) / k)
+
+            samples, total = time_calls(query, len(queries))
+            results.append(BenchResult(
+                name=f"ivf.nprobe_{nprobe}",
+                iterations=len(queries),
+                total_seconds=total,
+                metrics={**latency_metrics(samples, total), "recall_at_10": float(np.mean(found))},
+                params={"vectors": count, "dimensions": dimensions, "lists": summary["lists"], "nprobe": nprobe},
+            ))
+    return results
+
+
+def bench_hybrid(sizes: Dict) -> List[BenchResult]:
+    """BM25 indexing throughput, incremental batch cost, and keyword / hybrid query latency"""
+    import tempfile
+    import numpy as np
+    from core.bm25_index import BM25Index, HybridCollection, HybridRetriever
+    from core.hashing_embeddings import HashingEmbeddings
+    from core.vector_index import MmapVectorIndex
+
+    count, batch = sizes["hybrid_documents"], 256
+    embeddings = HashingEmbeddings(dimensions=256)
+    # Zipf-distributed vocabulary, like natural text (a few very common words, a long tail)
+    rng = np.random.default_rng(0)
+    vocabulary = np.array([f"w{i}" for i in range(50_000)])
+    def words(n: int) -> str:
+        return " ".join(vocabulary[np.minimum(rng.zipf(1.1, n), len(vocabulary)) - 1])
+    texts = [f"{words(40)} part SKU-{i:06d}" for i in range(count)]
+    ids = [str(i) for i in range(count)]
+    code_queries = [f"sku-{i:06d}" for i in rng.integers(0, count, sizes["retrieval_queries"])]
+    word_queries = [words(3) for _ in range(sizes["retrieval_queries"])]
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        vectors = MmapVectorIndex(os.path.join(directory, "vectors"))
+        keywords = BM25Index(os.path.join(directory, "vectors", "bm25.db"))
+        collection = HybridCollection(vectors, keywords)
+        initial = count - 10 * batch
+        for start in range(0, initial, 2048):
+            end = min(start + 2048, initial)
+            vectors.upsert(ids[start:end], embeddings.embed_documents(texts[start:end]), texts[start:end])
+        started = time.perf_counter()
+        for start in range(0, initial, 2048):
+            keywords.add(ids[start:min(start + 2048, initial)], texts[start:min(start + 2048, initial)])
+        total = time.perf_counter() - started
+        results.append(BenchResult(
+            name="hybrid.bm25_build",
+            iterations=initial,
+            total_seconds=total,
+            metrics={"ops_per_sec": initial / total},
+            params={"documents": initial},
+        ))
+
+        # Ingestion-sized batches into the populated index (vectors + postings)
+        position = iter(range(initial, count, batch))
+        def add_batch():
+            start = next(position)
+            collection.upsert(ids[start:start + batch], embeddings.embed_documents(texts[start:start + batch]), texts[start:start + batch])
+        samples, total = time_calls(add_batch, 10)
+        results.append(BenchResult(
+            name="hybrid.incremental_batch",
+            iterations=10,
+            total_seconds=total,
+            metrics=latency_metrics(samples, total),
+            params={"documents": count, "batch": batch},
+        ))
+
+        retriever = HybridRetriever(vectors=vectors, keywords=keywords, embeddings=embeddings, k=4)
+        cases = {
+            "bm25_code": (lambda q: keywords.search(q, 20), code_queries),
+            "bm25_words": (lambda q: keywords.search(q, 20), word_queries),
+            "hybrid_code": (retriever.invoke, code_queries),
+            "hybrid_words": (retriever.invoke, word_queries),
+        }
+        for case, (query, queries) in cases.items():
+            query(queries[0])  # warm up
+            position = iter(range(len(queries)))
+            samples, total = time_calls(lambda: query(queries[next(position)]), len(queries))
+            results.append(BenchResult(
+                name=f"hybrid.{case}",
+                iterations=len(queries),
+                total_seconds=total,
+                metrics=latency_metrics(samples, total),
+                params={"documents": count},
+            ))
+        hits = sum(retriever.invoke(q)[0].page_content.endswith(q.upper()) for q in code_queries)
+        results[-1].metrics["code_top1"] = hits / len(code_queries)
+    return results
+
+
+def bench_replay(sizes: Dict) -> List[BenchResult]:
+    """Replay the runs recorded in a cassette through `WorkflowRunner`"""
+    from core.cassette import Cassette
+    from core.node_discovery import get_registry
+    from core.workflow_runner import WorkflowRunner
+
+    cassette = Cassette(sizes["cassette"], mode="replay", latency_scale=sizes["latency_scale"])
+    runs = cassette.runs
+    if not runs:
+        raise RuntimeError(f"Cassette {sizes['cassette']} has no recorded runs")
+
+    async def run():
+        samples = []
+        started = time.perf_counter()
+        for _ in range(max(1, sizes["requests"] // len(runs))):
+            for entry in runs:
+                cassette.rewind()
+                t0 = time.perf_counter()
+                result = await WorkflowRunner(get_registry(), cassette=cassette).execute_workflow(
+                    entry.request["workflow"], entry.request["input"]
+                )
+                if result["status"] != "completed":
+                    raise RuntimeError(f"Replay failed: {result.get('error')}")
+                samples.append(time.perf_counter() - t0)
+        total = time.perf_counter() - started
+        return [BenchResult(
+            name="replay.cassette",
+            iterations=len(samples),
+            total_seconds=total,
+            metrics=latency_metrics(samples, total),
+            params={"runs": len(runs), "latency_scale": sizes["latency_scale"]},
+        )]
+    return asyncio.run(run())
+
+
+SUITES: Dict[str, Callable[[Dict], List[BenchResult]]] = {
+    "builder": bench_builder,
+    "execute": bench_execute,
+    "stream": bench_stream,
+    "sessions": bench_sessions,
+    "catalog": bench_catalog,
+    "extract": bench_extract,
+    "pdf": bench_pdf,
+    "split": bench_split,
+    "ingest": bench_ingest,
+    "retrieval": bench_retrieval,
+    "ivf": bench_ivf,
+    "hybrid": bench_hybrid,
+    "replay": bench_replay,
+}
+# Suites that only run when explicitly requested
+OPT_IN_SUITES = {"replay"}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES), help="Suites to run (default: all)")
+    parser.add_argument("--quick", action="store_true", help="Use small sizes for a fast smoke run")
+    parser.add_argument("--sessions", type=int, help="Override the number of sessions for the sessions suite")
+    parser.add_argument("--cassette", type=Path, help="Cassette to replay (enables the replay suite)")
+    parser.add_argument("--html-corpus", type=Path, default=DEFAULT_HTML_CORPUS,
+                        help="Saved pages (jsonl.gz of url/html/content/boilerplate) for the extract suite")
+    parser.add_argument("--latency-scale", type=float, default=0.0,
+                        help="Scale recorded latencies during replay (default 0: engine overhead only)")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="Where to write JSON results")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative regression (default 0.25)")
+    parser.add_argument("--update-baseline", action="store_true", help="Write this run to the baseline file")
+    parser.add_argument("--verbose", action="store_true", help="Show engine output while benchmarking")
+    args = parser.parse_args(argv)
+
+    mode = "quick" if args.quick else "full"
+    sizes = dict(SIZES[mode])
+    if args.sessions:
+        sizes["sessions"] = args.sessions
+    sizes["corpus"] = os.path.relpath(args.html_corpus)
+    if args.cassette:
+        sizes["cassette"] = str(args.cassette)
+        sizes["latency_scale"] = args.latency_scale
+    suites = args.suite or [name for name in SUITES if name not in OPT_IN_SUITES or args.cassette]
+    if "replay" in suites and not args.cassette:
+        parser.error("the replay suite requires --cassette")
+
+    results: List[BenchResult] = []
+    for suite in suites:
+        print(f"⏱️  Running {suite} benchmarks ({mode})...", flush=True)
+        # The engine prints on every build/execution; keep that out of the timings' output
+        sink = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        with sink:
+            suite_results = SUITES[suite](sizes)
+        reference = reference_ms()
+        for result in suite_results:
+            result.reference_ms = reference
+            headline = ", ".join(f"{k}={v:.3f}" for k, v in result.metrics.items() if k in ("ops_per_sec", "p50_ms", "p95_ms", "ttft_p50_ms", "bytes_per_session", "mb_per_sec", "content_recall", "boilerplate_leak", "first_page_ms", "rss_growth_mb"))
+            print(f"   {result.name:<28} {headline}")
+        results.extend(suite_results)
+
+    document = write_results(results, args.output, {"mode": mode, "suites": suites, **sizes})
+    print(f"📄 Results written to {args.output}")
+
+    if args.update_baseline:
+        # Merge so that re-running a single suite only refreshes its own entries
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else None
+        if baseline and baseline.get("params", {}).get("mode") == mode:
+            baseline["results"].update(document["results"])
+            document = {**document, "results": baseline["results"]}
+        args.baseline.write_text(json.dumps(document, indent=2, sort_keys=True))
+        print(f"📌 Baseline updated: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print("ℹ️  No baseline found, skipping comparison")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    baseline_mode = baseline.get("params", {}).get("mode")
+    if baseline_mode != mode:
+        print(f"ℹ️  Baseline was recorded in '{baseline_mode}' mode, skipping comparison with this {mode} run")
+        return 0
+    rows = compare_to_baseline(document, baseline, args.threshold)
+    if not rows:
+        print("ℹ️  No results shared with the baseline (or it lacks reference timings), nothing compared")
+        return 0
+    regressions = [row for row in rows if row["regressed"]]
+    for row in regressions:
+        print(f"❌ {row['benchmark']}.{row['metric']}: {row['baseline']:.3f} -> {row['current']:.3f} ({row['change']:+.0%})")
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    print(f"✅ No regressions beyond {args.threshold:.0%} across {len(rows)} compared metrics")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
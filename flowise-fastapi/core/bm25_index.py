@@ -0,0 +1,356 @@
+"""
+Persistent BM25 keyword index and hybrid (keyword + vector) retrieval.
+
+Vector search misses exact keyword matches such as product codes or error
+numbers. `BM25Index` keeps an inverted index in SQLite next to a vector index
+(`bm25.db` in the same directory). Posting lists are stored as segments of
+two packed int32 blobs (document numbers, term frequencies). A query reads the
+few segments of each query term and scores them with NumPy. Document lengths
+are kept in memory.
+
+Ingestion adds documents in batches. Each batch becomes a segment, written in
+one transaction, so adding a batch costs the size of the batch, not the size
+of the posting lists. As in Lucene, segments are merged by size tier:
+`MERGE_FACTOR` segments of similar size become one. Each posting is rewritten
+about log(N) times in total, and a term never spans more than a few dozen
+segments. Re-adding an id with the same text is skipped.
+Re-adding an id with different text gives it a new document number and
+retires the old one, which query scoring then ignores.
+
+`HybridRetriever` fuses the BM25 ranking with the ranking from an
+`MmapVectorIndex` using reciprocal rank fusion (RRF), on the shared document
+ids. Ties go to the keyword ranking, since exact matches are what vector
+search misses.
+"""
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+from core.vector_index import MmapVectorIndex, embed_queries, validate_index_name
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    doc INTEGER PRIMARY KEY,
+    id TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    length INTEGER NOT NULL,
+    live INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    segment INTEGER NOT NULL,
+    docs BLOB NOT NULL,
+    tfs BLOB NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS postings_term ON postings (term, segment);
+CREATE INDEX IF NOT EXISTS postings_segment ON postings (segment);
+"""
+# Segments of the same size tier merged together
+MERGE_FACTOR = 8
+# Words, plus codes joined by '-', '.', '/' or '_' ("AB-1234", "v2.1.0")
+_TOKEN_RE = re.compile(r"\w+(?:[-./]\w+)*")
+# RRF constant from Cormack et al.; damps the weight of the very top ranks
+RRF_K = 60
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased tokens; a compound code also yields its parts"""
+    tokens = []
+    for match in _TOKEN_RE.finditer(text.lower()):
+        token = match.group()
+        tokens.append(token)
+        if not token.isalnum():
+            tokens.extend(part for part in re.split(r"[-./_]", token) if part)
+    return tokens
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Any]], k: int = RRF_K) -> List[Tuple[Any, float]]:
+    """Fuse several best-first rankings of keys into one, by the sum of 1 / (k + rank); ties keep first-seen order"""
+    scores: Dict[Any, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class BM25Index:
+    """On-disk inverted index with BM25 scoring"""
+
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # Posting blobs are read straight from the mapped file
+        self._conn.execute("PRAGMA mmap_size=1073741824")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        rows = self._conn.execute("SELECT doc, id, digest, length, live FROM docs ORDER BY doc").fetchall()
+        size = rows[-1][0] + 1 if rows else 0
+        self._ids: List[Optional[str]] = [None] * size
+        self._lengths = np.zeros(size, dtype=np.float32)
+        self._live = np.zeros(size, dtype=bool)
+        self._docs: Dict[str, Tuple[int, bytes]] = {}
+        for doc, id_, digest, length, live in rows:
+            self._ids[doc] = id_
+            self._lengths[doc] = length
+            self._live[doc] = bool(live)
+            if live:
+                self._docs[id_] = (doc, digest)
+        # A segment holds the documents from its id up to the next segment's id
+        self._segments = [segment for segment, in self._conn.execute("SELECT DISTINCT segment FROM postings ORDER BY segment")]
+        self._refresh_norms()
+
+    def _refresh_norms(self):
+        # BM25 length normalisation per document; retired documents never score
+        live_count = int(self._live.sum())
+        average_length = float(self._lengths[self._live].sum()) / live_count if live_count else 1.0
+        norms = self.k1 * (1 - self.b + self.b * self._lengths / max(average_length, 1e-9))
+        self._norms = np.where(self._live, norms, np.inf).astype(np.float32)
+        self._has_retired = live_count < len(self._live)
+
+    def add(self, ids: Sequence[str], texts: Sequence[str]) -> int:
+        """Index `texts` under `ids`; returns how many were new or changed"""
+        with self._lock:
+            next_doc = len(self._ids)
+            new_docs = []
+            retired = []
+            postings: Dict[str, Tuple[List[int], List[int]]] = {}
+            for id_, text in zip(ids, texts):
+                digest = hashlib.sha256(text.encode("utf-8")).digest()[:16]
+                known = self._docs.get(id_)
+                if known is not None:
+                    if known[1] == digest:
+                        continue
+                    retired.append(known[0])
+                counts = Counter(tokenize(text))
+                doc = next_doc + len(new_docs)
+                new_docs.append((doc, id_, digest, sum(counts.values())))
+                self._docs[id_] = (doc, digest)
+                for term, tf in counts.items():
+                    entry = postings.setdefault(term, ([], []))
+                    entry[0].append(doc)
+                    entry[1].append(tf)
+            if not new_docs:
+                return 0
+
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany("INSERT INTO docs (doc, id, digest, length) VALUES (?, ?, ?, ?)", new_docs)
+                if retired:
+                    self._conn.executemany("UPDATE docs SET live = 0 WHERE doc = ?", [(doc,) for doc in retired])
+                # The batch's first document number names its segments
+                segment = next_doc
+                self._conn.executemany(
+                    "INSERT INTO postings (term, segment, docs, tfs) VALUES (?, ?, ?, ?)",
+                    [
+                        (term, segment, np.asarray(docs, dtype=np.int32).tobytes(), np.asarray(tfs, dtype=np.int32).tobytes())
+                        for term, (docs, tfs) in postings.items()
+                    ]
+                )
+                self._segments.append(segment)
+                self._merge_segments(next_doc + len(new_docs))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                self._load()
+                raise
+
+            grown = next_doc + len(new_docs)
+            self._ids.extend([None] * len(new_docs))
+            self._lengths = np.resize(self._lengths, grown)
+            self._live = np.resize(self._live, grown)
+            for doc, id_, _, length in new_docs:
+                self._ids[doc] = id_
+                self._lengths[doc] = length
+                self._live[doc] = True
+            self._live[retired] = False
+            self._refresh_norms()
+            return len(new_docs)
+
+    def _merge_segments(self, end: int):
+        def tier(i: int) -> int:
+            following = self._segments[i + 1] if i + 1 < len(self._segments) else end
+            return int(math.log(max(following - self._segments[i], 1), MERGE_FACTOR))
+
+        while len(self._segments) >= MERGE_FACTOR and len({tier(i) for i in range(len(self._segments) - MERGE_FACTOR, len(self._segments))}) == 1:
+            merging = self._segments[-MERGE_FACTOR:]
+            placeholders = ",".join("?" * len(merging))
+            merged: Dict[str, Tuple[List[bytes], List[bytes]]] = {}
+            for term, docs, tfs in self._conn.execute(
+                f"SELECT term, docs, tfs FROM postings WHERE segment IN ({placeholders}) ORDER BY segment", merging
+            ):
+                entry = merged.setdefault(term, ([], []))
+                entry[0].append(docs)
+                entry[1].append(tfs)
+            self._conn.execute(f"DELETE FROM postings WHERE segment IN ({placeholders})", merging)
+            self._conn.executemany(
+                "INSERT INTO postings (term, segment, docs, tfs) VALUES (?, ?, ?, ?)",
+                [(term, merging[0], b"".join(docs), b"".join(tfs)) for term, (docs, tfs) in merged.items()]
+            )
+            self._segments[-MERGE_FACTOR:] = [merging[0]]
+
+    def import_vector_index(self, index: MmapVectorIndex, batch_size: int = 1000) -> int:
+        """Index every record of an existing vector index"""
+        ids, texts = [], []
+        added = 0
+        for id_, text in index.records():
+            ids.append(id_)
+            texts.append(text)
+            if len(ids) >= batch_size:
+                added += self.add(ids, texts)
+                ids, texts = [], []
+        return added + self.add(ids, texts)
+
+    def top_up(self, index: MmapVectorIndex) -> int:
+        """
+        Catch up with `index` when its row count has drifted from the keyword
+        index (e.g. rows ingested with the vector_index backend). Unchanged
+        records are skipped by digest, so only missing or changed ones are
+        written. Returns 0 if another thread is already catching up.
+        """
+        if len(self) == len(index) or not self._sync_lock.acquire(blocking=False):
+            return 0
+        try:
+            return self.import_vector_index(index) if len(self) != len(index) else 0
+        finally:
+            self._sync_lock.release()
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Top-`k` (id, score) pairs by BM25, best first"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or k <= 0:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT term, docs, tfs FROM postings WHERE term IN ({','.join('?' * len(terms))})", terms
+            ).fetchall()
+            norms, live, ids = self._norms, self._live, self._ids
+            has_retired = self._has_retired
+            live_count = len(self._docs)
+        if not rows or not live_count:
+            return []
+
+        segments: Dict[str, Tuple[List[bytes], List[bytes]]] = {}
+        for term, docs_blob, tfs_blob in rows:
+            entry = segments.setdefault(term, ([], []))
+            entry[0].append(docs_blob)
+            entry[1].append(tfs_blob)
+
+        all_docs, all_scores = [], []
+        for docs_blobs, tfs_blobs in segments.values():
+            docs = np.frombuffer(b"".join(docs_blobs), dtype=np.int32)
+            tfs = np.frombuffer(b"".join(tfs_blobs), dtype=np.int32).astype(np.float32)
+            df = int(np.count_nonzero(live[docs])) if has_retired else len(docs)
+            if not df:
+                continue
+            idf = np.float32(np.log1p((live_count - df + 0.5) / (df + 0.5)) * (self.k1 + 1))
+            all_docs.append(docs)
+            all_scores.append(idf * tfs / (tfs + norms[docs]))
+        if not all_docs:
+            return []
+        if len(all_docs) == 1:
+            docs, scores = all_docs[0], all_scores[0]
+        elif sum(len(docs) for docs in all_docs) * 8 > len(norms):
+            # Long posting lists: a dense accumulator beats sorting them
+            scores = np.bincount(np.concatenate(all_docs), weights=np.concatenate(all_scores), minlength=len(norms))
+            docs = np.arange(len(scores))
+        else:
+            docs, inverse = np.unique(np.concatenate(all_docs), return_inverse=True)
+            scores = np.bincount(inverse, weights=np.concatenate(all_scores))
+        take = min(k, len(docs))
+        top = np.argpartition(-scores, take - 1)[:take]
+        top = top[np.argsort(-scores[top])]
+        return [(ids[int(docs[i])], float(scores[i])) for i in top if scores[i] > 0]
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class HybridCollection:
+    """Ingestion target writing each batch to both the vector index and its BM25 index"""
+
+    def __init__(self, vectors: MmapVectorIndex, keywords: BM25Index):
+        self.vectors = vectors
+        self.keywords = keywords
+
+    def upsert(self, ids: Sequence[str], embeddings: Any, documents: Sequence[str], metadatas: Optional[Sequence[Dict[str, Any]]] = None):
+        self.vectors.upsert(ids, embeddings, documents, metadatas)
+        self.keywords.add(ids, documents)
+
+
+class HybridRetriever(BaseRetriever):
+    """Reciprocal rank fusion of BM25 and vector rankings over the same documents"""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vectors: Any
+    keywords: Any
+    embeddings: Embeddings
+    k: int = 4
+    fetch_k: int = 20
+    where: Optional[Dict[str, Any]] = None
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.search([query])[0]
+
+    def search(self, queries: Sequence[str]) -> List[List[Document]]:
+        depth = max(self.k, self.fetch_k)
+        self.keywords.top_up(self.vectors)
+        vector_hits = self.vectors.search(embed_queries(self.embeddings, queries), k=depth, where=self.where)
+        mask = self.vectors.filter_mask(self.where)
+        results = []
+        for query, hits in zip(queries, vector_hits):
+            keyword_rows = []
+            for id_, _ in self.keywords.search(query, k=depth):
+                row = self.vectors.row_of(id_)
+                if row is not None and (mask is None or mask[row]):
+                    keyword_rows.append(row)
+            fused = reciprocal_rank_fusion([keyword_rows, [row for row, _ in hits]])[:self.k]
+            results.append(self.vectors.documents(fused))
+        return results
+
+    def batch(self, inputs: List[Any], config: Any = None, *, return_exceptions: bool = False, **kwargs: Any) -> List[List[Document]]:
+        if not inputs or not all(isinstance(query, str) for query in inputs):
+            return super().batch(inputs, config, return_exceptions=return_exceptions, **kwargs)
+        return self.search(inputs)
+
+
+_indexes: Dict[str, BM25Index] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_bm25_index(name: str, directory: Optional[str] = None) -> BM25Index:
+    """The process-wide BM25 index of `name`, stored next to its vector index"""
+    from core.config import get_settings
+
+    validate_index_name(name)
+    path = os.path.abspath(os.path.join(directory or get_settings().VECTOR_INDEX_DIRECTORY, name, "bm25.db"))
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = _indexes[path] = BM25Index(path)
+        return index
+
@@ -0,0 +1,376 @@
+"""
+Record/replay cassettes for LLM and tool I/O.
+
+In record mode a callback handler captures every LLM, chat model and tool
+request/response (with timings) made while a workflow runs, and appends them
+to a gzip-compressed JSON-lines cassette together with the executed flow and
+input. In replay mode the builder swaps every model and tool in the flow for a
+replay provider that serves the recorded responses with the original (or
+scaled) latencies, so recorded traces can be re-run offline and deterministically.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Union
+from uuid import UUID
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    AsyncCallbackManagerForToolRun,
+    BaseCallbackHandler,
+    CallbackManagerForLLMRun,
+    CallbackManagerForToolRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.language_models.llms import LLM, BaseLLM
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult, GenerationChunk, LLMResult
+from langchain_core.prompt_values import PromptValue
+from langchain_core.tools import BaseTool
+
+from core.fake_providers import FakeBehaviour, flow_input_to_prompt
+
+CASSETTE_MODES = ("record", "replay")
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when no recorded interaction matches a request."""
+
+
+class CassetteReplayError(RuntimeError):
+    """Re-raises an error that was captured while recording."""
+
+
+@dataclass
+class CassetteEntry:
+    """One recorded interaction (kind is 'chat', 'llm', 'tool' or 'run')."""
+    kind: str
+    key: str = ""
+    name: str = ""
+    request: Any = None
+    response: Any = None
+    latency: float = 0.0
+    first_token: Optional[float] = None
+    error: Optional[str] = None
+
+    def to_json(self) -> str:
+        data = {k: v for k, v in asdict(self).items() if v not in (None, "")}
+        return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def _messages_text(messages: List[BaseMessage]) -> str:
+    return "\n".join(f"{m.type}:{m.content}" for m in messages)
+
+
+def request_key(kind: str, payload: str, name: str = "") -> str:
+    """Stable key used to match a replayed request with its recording."""
+    digest = hashlib.sha1(f"{kind}\x00{name}\x00{payload}".encode("utf-8")).hexdigest()
+    return digest[:20]
+
+
+class Cassette:
+    """
+    An append-only collection of recorded interactions backed by a file.
+    Each `append` writes a separate gzip member, so the file stays valid while
+    recordings from several executions are added to it.
+    """
+
+    def __init__(self, path: Union[str, Path], mode: str = "replay", latency_scale: float = 1.0):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}'. Expected one of: {', '.join(CASSETTE_MODES)}")
+        self.path = Path(path)
+        self.mode = mode
+        self.latency_scale = float(latency_scale)
+        self.entries: List[CassetteEntry] = []
+        self._by_key: Dict[str, List[CassetteEntry]] = defaultdict(list)
+        self._cursors: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        if self.path.exists():
+            self._load()
+
+    def _load(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    self._index(CassetteEntry(**json.loads(line)))
+
+    def _index(self, entry: CassetteEntry):
+        self.entries.append(entry)
+        if entry.key:
+            self._by_key[entry.key].append(entry)
+
+    @property
+    def runs(self) -> List[CassetteEntry]:
+        """Recorded workflow executions (flow definition and input)."""
+        return [entry for entry in self.entries if entry.kind == "run"]
+
+    def append(self, entries: List[CassetteEntry]):
+        """Persist a batch of recorded entries and make them available for replay."""
+        if not entries:
+            return
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write("".join(entry.to_json() + "\n" for entry in entries))
+            for entry in entries:
+                self._index(entry)
+
+    def lookup(self, kind: str, payload: str, name: str = "") -> CassetteEntry:
+        """
+        Return the recorded entry for a request. Repeated identical requests are
+        served in recording order, staying on the last recording once exhausted.
+        """
+        key = request_key(kind, payload, name)
+        with self._lock:
+            matches = self._by_key.get(key)
+            if not matches:
+                raise CassetteMissError(f"No recorded {kind} interaction for {name or 'request'} (key {key})")
+            index = min(self._cursors[key], len(matches) - 1)
+            self._cursors[key] += 1
+            return matches[index]
+
+    def rewind(self):
+        """Restart replay order for repeated requests."""
+        with self._lock:
+            self._cursors.clear()
+
+    # --- integration with the builder and runner -------------------------
+
+    def replace_provider(self, output: Any) -> Any:
+        """Swap models and tools produced by a node for replay providers."""
+        if isinstance(output, list):
+            return [self.replace_provider(item) for item in output]
+        if isinstance(output, BaseTool):
+            return ReplayTool(name=output.name, description=output.description, cassette=self)
+        if isinstance(output, BaseChatModel):
+            return ReplayChatModel(cassette=self)
+        if isinstance(output, BaseLLM):
+            return ReplayLLM(cassette=self)
+        return output
+
+    def scaled(self, seconds: Optional[float]) -> float:
+        return max(seconds or 0.0, 0.0) * self.latency_scale
+
+
+class CassetteRecorder(BaseCallbackHandler):
+    """Callback handler capturing model and tool I/O for a single execution."""
+    run_inline = True
+
+    def __init__(self):
+        self.entries: List[CassetteEntry] = []
+        self._pending: Dict[UUID, Dict[str, Any]] = {}
+
+    def record_run(self, workflow_data: Dict[str, Any], input_text: str):
+        self.entries.append(CassetteEntry(kind="run", request={"workflow": workflow_data, "input": input_text}))
+
+    def _start(self, run_id: UUID, kind: str, name: str, payload: str):
+        self._pending[run_id] = {
+            "kind": kind,
+            "name": name,
+            "payload": payload,
+            "started": time.perf_counter(),
+            "first_token": None,
+        }
+
+    def _finish(self, run_id: UUID, response: Any = None, error: Optional[BaseException] = None):
+        pending = self._pending.pop(run_id, None)
+        if pending is None:
+            return
+        kind, name, payload = pending["kind"], pending["name"], pending["payload"]
+        self.entries.append(CassetteEntry(
+            kind=kind,
+            key=request_key(kind, payload, name if kind == "tool" else ""),
+            name=name,
+            request=payload,
+            response=response,
+            latency=round(time.perf_counter() - pending["started"], 6),
+            first_token=pending["first_token"],
+            error=f"{type(error).__name__}: {error}" if error is not None else None,
+        ))
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[BaseMessage]], *, run_id: UUID, **kwargs: Any):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "chat_model"
+        self._start(run_id, "chat", name, _messages_text(messages[0]))
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID, **kwargs: Any):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "llm"
+        self._start(run_id, "llm", name, prompts[0])
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any):
+        pending = self._pending.get(run_id)
+        if pending is not None and pending["first_token"] is None:
+            pending["first_token"] = round(time.perf_counter() - pending["started"], 6)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id, response=response.generations[0][0].text)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id, error=error)
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, **kwargs: Any):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        self._start(run_id, "tool", name, input_str)
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id, response=str(getattr(output, "content", output)))
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id, error=error)
+
+
+def _check_error(entry: CassetteEntry):
+    if entry.error:
+        raise CassetteReplayError(entry.error)
+
+
+def _token_schedule(cassette: Cassette, entry: CassetteEntry):
+    """Split a recorded response into tokens with first-token and inter-token delays."""
+    tokens = FakeBehaviour.tokenize(str(entry.response or ""))
+    first = cassette.scaled(entry.first_token if entry.first_token is not None else entry.latency)
+    rest = max(cassette.scaled(entry.latency) - first, 0.0)
+    gap = rest / (len(tokens) - 1) if len(tokens) > 1 else 0.0
+    return tokens, first, gap
+
+
+class ReplayChatModel(BaseChatModel):
+    """Chat model serving recorded responses from a cassette."""
+    cassette: Cassette
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay-chat-model"
+
+    def _convert_input(self, model_input: Any) -> PromptValue:
+        return super()._convert_input(flow_input_to_prompt(model_input))
+
+    def _entry(self, messages: List[BaseMessage]) -> CassetteEntry:
+        entry = self.cassette.lookup("chat", _messages_text(messages))
+        _check_error(entry)
+        return entry
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        entry = self._entry(messages)
+        time.sleep(self.cassette.scaled(entry.latency))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=str(entry.response or "")))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        entry = self._entry(messages)
+        await asyncio.sleep(self.cassette.scaled(entry.latency))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=str(entry.response or "")))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        tokens, first, gap = _token_schedule(self.cassette, self._entry(messages))
+        for i, token in enumerate(tokens):
+            time.sleep(first if i == 0 else gap)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        tokens, first, gap = _token_schedule(self.cassette, self._entry(messages))
+        for i, token in enumerate(tokens):
+            await asyncio.sleep(first if i == 0 else gap)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+class ReplayLLM(LLM):
+    """Text-completion LLM serving recorded responses from a cassette."""
+    cassette: Cassette
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay-llm"
+
+    def _convert_input(self, model_input: Any) -> PromptValue:
+        return super()._convert_input(flow_input_to_prompt(model_input))
+
+    def _entry(self, prompt: str) -> CassetteEntry:
+        entry = self.cassette.lookup("llm", prompt)
+        _check_error(entry)
+        return entry
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None,
+              run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> str:
+        entry = self._entry(prompt)
+        time.sleep(self.cassette.scaled(entry.latency))
+        return str(entry.response or "")
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None,
+                     run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> str:
+        entry = self._entry(prompt)
+        await asyncio.sleep(self.cassette.scaled(entry.latency))
+        return str(entry.response or "")
+
+    def _stream(self, prompt: str, stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[GenerationChunk]:
+        tokens, first, gap = _token_schedule(self.cassette, self._entry(prompt))
+        for i, token in enumerate(tokens):
+            time.sleep(first if i == 0 else gap)
+            chunk = GenerationChunk(text=token)
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, prompt: str, stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> AsyncIterator[GenerationChunk]:
+        tokens, first, gap = _token_schedule(self.cassette, self._entry(prompt))
+        for i, token in enumerate(tokens):
+            await asyncio.sleep(first if i == 0 else gap)
+            chunk = GenerationChunk(text=token)
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+class ReplayTool(BaseTool):
+    """Tool serving recorded observations from a cassette."""
+    cassette: Cassette
+
+    def _entry(self, query: str) -> CassetteEntry:
+        entry = self.cassette.lookup("tool", query, self.name)
+        _check_error(entry)
+        return entry
+
+    def _run(self, query: str, run_manager: Optional[CallbackManagerForToolRun] = None) -> str:
+        entry = self._entry(query)
+        time.sleep(self.cassette.scaled(entry.latency))
+        return str(entry.response or "")
+
+    async def _arun(self, query: str, run_manager: Optional[AsyncCallbackManagerForToolRun] = None) -> str:
+        entry = self._entry(query)
+        await asyncio.sleep(self.cassette.scaled(entry.latency))
+        return str(entry.response or "")
+
+
+_cassettes: Dict[str, Cassette] = {}
+
+
+def get_cassette() -> Optional[Cassette]:
+    """The process-wide cassette configured through CASSETTE_MODE / CASSETTE_PATH, if any."""
+    from core.config import get_settings
+
+    settings = get_settings()
+    if not settings.CASSETTE_MODE:
+        return None
+    cache_key = f"{settings.CASSETTE_MODE}:{settings.CASSETTE_PATH}"
+    if cache_key not in _cassettes:
+        _cassettes[cache_key] = Cassette(
+            settings.CASSETTE_PATH,
+            mode=settings.CASSETTE_MODE,
+            latency_scale=settings.CASSETTE_LATENCY_SCALE,
+        )
+    return _cassettes[cache_key]
@@ -0,0 +1,148 @@
+"""
+Process-wide Chroma clients and collection handles.
+
+Building a `Chroma` vector store used to create a client and look the
+collection up on every flow build. The registry keeps one client per persist
+directory (an in-memory client when no directory is configured) and one
+collection handle per (directory, collection name), and hands out thin
+LangChain wrappers around those handles, so builds and requests after the
+first pay no setup cost. Collections listed in CHROMA_PRELOAD_COLLECTIONS are
+opened and queried once at startup, which loads their index before the first
+request needs it. Directories requested by flows must lie inside the
+configured persist directory.
+"""
+import os
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_community.vectorstores import Chroma
+from langchain_core.embeddings import Embeddings
+
+
+class RegisteredChroma(Chroma):
+    """`Chroma` over an existing client and collection handle (no lookup on construction)"""
+
+    def __init__(self, client: Any, collection: Any, embedding_function: Optional[Embeddings], persist_directory: Optional[str]):
+        self._client_settings = None
+        self._client = client
+        self._persist_directory = persist_directory
+        self._embedding_function = embedding_function
+        self._collection = collection
+        self.override_relevance_score_fn = None
+
+
+class ChromaRegistry:
+    """Shares Chroma clients per directory and collection handles per (directory, name)"""
+
+    def __init__(self, default_directory: Optional[str] = None):
+        self.default_directory = default_directory or None
+        self._clients: Dict[str, Any] = {}
+        self._collections: Dict[Tuple[str, str], Any] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "preloaded": 0}
+
+    def _directory(self, directory: Optional[str]) -> Optional[str]:
+        """
+        The default directory, or `directory` resolved inside it. Directories
+        come from workflow JSON, so anything outside the default is rejected.
+        """
+        if not directory:
+            return os.path.abspath(self.default_directory) if self.default_directory else None
+        if not self.default_directory:
+            raise ValueError("persist_directory is not available: CHROMA_PERSIST_DIRECTORY is not set (in-memory collections)")
+        base = os.path.realpath(self.default_directory)
+        resolved = os.path.realpath(os.path.join(base, directory))
+        if os.path.commonpath([base, resolved]) != base:
+            raise ValueError(f"persist_directory must be inside CHROMA_PERSIST_DIRECTORY: {directory}")
+        return resolved
+
+    def client(self, directory: Optional[str] = None) -> Any:
+        import chromadb
+
+        directory = self._directory(directory)
+        key = directory or ""
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                    client = chromadb.PersistentClient(path=directory)
+                else:
+                    client = chromadb.EphemeralClient()
+                self._clients[key] = client
+            return client
+
+    def collection(self, name: str, directory: Optional[str] = None) -> Any:
+        """The shared handle of collection `name`, created if it does not exist"""
+        key = (self._directory(directory) or "", name)
+        with self._lock:
+            collection = self._collections.get(key)
+            if collection is not None:
+                self.stats["hits"] += 1
+                return collection
+        client = self.client(directory)
+        with self._lock:
+            collection = self._collections.get(key)
+            if collection is None:
+                self.stats["misses"] += 1
+                collection = self._collections[key] = client.get_or_create_collection(name=name, embedding_function=None)
+            else:
+                self.stats["hits"] += 1
+            return collection
+
+    def vectorstore(self, name: str, embeddings: Optional[Embeddings], directory: Optional[str] = None) -> Chroma:
+        return RegisteredChroma(
+            self.client(directory),
+            self.collection(name, directory),
+            embeddings,
+            self._directory(directory)
+        )
+
+    def forget(self, name: str, directory: Optional[str] = None):
+        """Drop a cached handle (e.g. after the collection was deleted)"""
+        with self._lock:
+            self._collections.pop((self._directory(directory) or "", name), None)
+
+    def preload(self, names: List[str], directory: Optional[str] = None) -> List[str]:
+        """Open `names` ("*": every collection in the directory) and run one query against each"""
+        if names == ["*"]:
+            names = [getattr(c, "name", c) for c in self.client(directory).list_collections()]
+        loaded = []
+        for name in names:
+            collection = self.collection(name, directory)
+            sample = collection.peek(limit=1)
+            embeddings = sample.get("embeddings")
+            if embeddings is not None and len(embeddings):
+                # The first query loads the vector index into memory
+                collection.query(query_embeddings=[list(embeddings[0])], n_results=1)
+            loaded.append(name)
+        with self._lock:
+            self.stats["preloaded"] += len(loaded)
+        return loaded
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                "clients": len(self._clients),
+                "collections": sorted(f"{directory or ':memory:'}/{name}" for directory, name in self._collections),
+            }
+
+
+@lru_cache()
+def get_chroma_registry() -> ChromaRegistry:
+    """Process-wide registry configured from settings"""
+    from core.config import get_settings
+
+    return ChromaRegistry(get_settings().CHROMA_PERSIST_DIRECTORY)
+
+
+def preload_chroma_collections() -> List[str]:
+    """Warm the collections listed in CHROMA_PRELOAD_COLLECTIONS"""
+    from core.config import get_settings
+
+    names = [name.strip() for name in get_settings().CHROMA_PRELOAD_COLLECTIONS.split(",") if name.strip()]
+    if not names:
+        return []
+    return get_chroma_registry().preload(names)
@@ -42,6 +42,16 @@ class Settings(BaseSettings):
     # Redis settings (for session management)
     REDIS_URL: Optional[str] = Field(default=None, env="REDIS_URL")
     
+    # Session store settings (0 disables the corresponding limit)
+    SESSION_BACKEND: Optional[str] = Field(default=None, env="SESSION_BACKEND")  # memory | redis | sqlite (default: redis if REDIS_URL is set)
+    SESSION_MAX_SESSIONS: int = Field(default=100_000, env="SESSION_MAX_SESSIONS")
+    SESSION_TTL_SECONDS: int = Field(default=86_400, env="SESSION_TTL_SECONDS")  # idle timeout, 24 hours
+    SESSION_MAX_MESSAGES: int = Field(default=200, env="SESSION_MAX_MESSAGES")
+    SESSION_SWEEP_INTERVAL_SECONDS: int = Field(default=60, env="SESSION_SWEEP_INTERVAL_SECONDS")
+    SESSION_SQLITE_PATH: str = Field(default="data/sessions.db", env="SESSION_SQLITE_PATH")
+    SESSION_FLUSH_INTERVAL_SECONDS: float = Field(default=0.5, env="SESSION_FLUSH_INTERVAL_SECONDS")  # sqlite write-behind
+    SESSION_FLUSH_BATCH_SIZE: int = Field(default=500, env="SESSION_FLUSH_BATCH_SIZE")
+    
     # File upload settings
     MAX_UPLOAD_SIZE: int = Field(default=10_000_000, env="MAX_UPLOAD_SIZE")  # 10MB
     UPLOAD_DIRECTORY: str = Field(default="uploads", env="UPLOAD_DIRECTORY")
@@ -53,6 +63,30 @@ class Settings(BaseSettings):
     # Performance settings
     MAX_CONCURRENT_WORKFLOWS: int = Field(default=10, env="MAX_CONCURRENT_WORKFLOWS")
     WORKFLOW_TIMEOUT_SECONDS: int = Field(default=300, env="WORKFLOW_TIMEOUT_SECONDS")  # 5 minutes
+    HTTP_MAX_CONNECTIONS: int = Field(default=100, env="HTTP_MAX_CONNECTIONS")  # shared web loader connection pool
+    HTTP_PER_HOST_CONCURRENCY: int = Field(default=8, env="HTTP_PER_HOST_CONCURRENCY")
+    HTTP_TIMEOUT_SECONDS: float = Field(default=30.0, env="HTTP_TIMEOUT_SECONDS")
+    HTTP_MAX_RESPONSE_BYTES: int = Field(default=10_000_000, env="HTTP_MAX_RESPONSE_BYTES")  # 10MB per page
+    HTTP_USER_AGENT: str = Field(default="Mozilla/5.0 (compatible; FlowiseBot/1.0)", env="HTTP_USER_AGENT")
+    HTTP_CACHE_DIRECTORY: str = Field(default="data/http_cache", env="HTTP_CACHE_DIRECTORY")
+    HTTP_CACHE_MAX_BYTES: int = Field(default=500_000_000, env="HTTP_CACHE_MAX_BYTES")  # loader response cache (0 disables)
+    HTTP_CACHE_TTL_SECONDS: int = Field(default=3600, env="HTTP_CACHE_TTL_SECONDS")  # when the response sets no max-age
+    PARSE_CACHE_DIRECTORY: str = Field(default="data/parse_cache", env="PARSE_CACHE_DIRECTORY")
+    PARSE_CACHE_MAX_BYTES: int = Field(default=1_000_000_000, env="PARSE_CACHE_MAX_BYTES")  # parsed loader output (0 disables)
+    CHROMA_PERSIST_DIRECTORY: Optional[str] = Field(default="data/chroma", env="CHROMA_PERSIST_DIRECTORY")  # empty: in-memory collections
+    VECTOR_INDEX_DIRECTORY: str = Field(default="data/vector_index", env="VECTOR_INDEX_DIRECTORY")  # VectorIndexRetriever / ingestion backend
+    CHROMA_PRELOAD_COLLECTIONS: str = Field(default="", env="CHROMA_PRELOAD_COLLECTIONS")  # comma-separated, "*" for all
+    EMBEDDING_CACHE_PATH: str = Field(default="data/embeddings.db", env="EMBEDDING_CACHE_PATH")
+    EMBEDDING_CACHE_MAX_ENTRIES: int = Field(default=1_000_000, env="EMBEDDING_CACHE_MAX_ENTRIES")  # cached vectors (0 disables)
+    EMBEDDING_BATCH_MAX_SIZE: int = Field(default=64, env="EMBEDDING_BATCH_MAX_SIZE")  # texts per micro-batch (0 disables micro-batching)
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = Field(default=5.0, env="EMBEDDING_BATCH_MAX_WAIT_MS")  # latency added to collect a batch
+    PDF_WORKERS: int = Field(default=0, env="PDF_WORKERS")  # processes for large PDFs (0: min(4, CPUs))
+    FLOW_CACHE_SIZE: int = Field(default=128, env="FLOW_CACHE_SIZE")  # compiled flows kept for reuse (0 disables)
+    
+    # Record/replay cassettes for LLM and tool I/O ("record" or "replay")
+    CASSETTE_MODE: Optional[str] = Field(default=None, env="CASSETTE_MODE")
+    CASSETTE_PATH: str = Field(default="cassettes/default.jsonl.gz", env="CASSETTE_PATH")
+    CASSETTE_LATENCY_SCALE: float = Field(default=1.0, env="CASSETTE_LATENCY_SCALE")
     
     # Logging settings
     LOG_LEVEL: str = Field(default="INFO", env="LOG_LEVEL")
@@ -1,4 +1,4 @@
-from typing import Dict, Any, List, Optional, Union, Type
+from typing import Dict, Any, List, Optional, Union, Type, Callable
 from dataclasses import dataclass
 from enum import Enum
 import inspect
@@ -8,6 +8,8 @@ from langchain_core.prompts import BasePromptTemplate
 from langchain_core.language_models import BaseLanguageModel
 from langchain_core.tools import BaseTool
 from langchain_core.memory import BaseMemory
+from langchain_core.embeddings import Embeddings
+from langchain_core.document_loaders import BaseLoader
 from langchain.chains import LLMChain, SequentialChain
 from langchain.agents import AgentExecutor
 
@@ -49,8 +51,10 @@ class DynamicChainBuilder:
     Builds executable LangChain objects from frontend workflow definitions
     """
     
-    def __init__(self, node_registry: Dict[str, Type]):
+    def __init__(self, node_registry: Dict[str, Type], output_transform: Optional[Callable[[Any], Any]] = None):
         self.node_registry = node_registry
+        # Optional hook applied to every node output (e.g. cassette replay providers)
+        self.output_transform = output_transform
         self.nodes: Dict[str, NodeInstance] = {}
         self.connections: List[NodeConnection] = []
         self.execution_graph: Dict[str, List[str]] = {}
@@ -118,6 +122,8 @@ class DynamicChainBuilder:
             
             # Execute node to get output
             output = self._execute_node(node_instance, inputs)
+            if self.output_transform is not None:
+                output = self.output_transform(output)
             
             # Store node instance
             self.nodes[node_id] = NodeInstance(
@@ -149,7 +155,10 @@ class DynamicChainBuilder:
                 None
             )
             
-            if connection and connection.source_node_id in self.nodes:
+            if connection and input_spec.type.lower().startswith("list"):
+                # List inputs (e.g. an agent's tools) collect every connected output
+                prepared_inputs[input_name] = self._collect_list_input(incoming_connections, input_name)
+            elif connection and connection.source_node_id in self.nodes:
                 # Get output from connected node
                 source_node = self.nodes[connection.source_node_id]
                 prepared_inputs[input_name] = source_node.outputs.get(
@@ -166,7 +175,21 @@ class DynamicChainBuilder:
                 raise ValueError(f"Required input '{input_name}' not provided for node {node_id}")
         
         return prepared_inputs
-    
+
+    def _collect_list_input(self, incoming_connections: List[NodeConnection], input_name: str) -> List[Any]:
+        """Gather the outputs of all connections targeting a list-typed input"""
+        values = []
+        for connection in incoming_connections:
+            if connection.target_handle != input_name or connection.source_node_id not in self.nodes:
+                continue
+            source_node = self.nodes[connection.source_node_id]
+            value = source_node.outputs.get(connection.source_handle, source_node.outputs.get("output"))
+            if isinstance(value, list):
+                values.extend(value)
+            else:
+                values.append(value)
+        return values
+
     def _execute_node(self, node_instance: Any, inputs: Dict[str, Any]) -> Any:
         """Execute a node with prepared inputs"""
         from nodes.base import ProviderNode, ProcessorNode, TerminatorNode
@@ -182,7 +205,7 @@ class DynamicChainBuilder:
             user_inputs = {}
             
             for key, value in inputs.items():
-                if isinstance(value, (Runnable, BaseTool, BaseMemory, BasePromptTemplate)):
+                if self._is_connected_value(value):
                     connected_nodes[key] = value
                 else:
                     user_inputs[key] = value
@@ -215,6 +238,14 @@ class DynamicChainBuilder:
             # Fallback for custom nodes
             return node_instance.execute(**inputs)
     
+    @staticmethod
+    def _is_connected_value(value: Any) -> bool:
+        """Whether an input value is a LangChain object produced by another node"""
+        connected_types = (Runnable, BaseTool, BaseMemory, BasePromptTemplate, Embeddings, BaseLoader)
+        if isinstance(value, list):
+            return bool(value) and all(isinstance(item, connected_types) for item in value)
+        return isinstance(value, connected_types)
+
     def _wire_connections(self):
         """Wire up connections between nodes"""
         # This is handled during node instantiation
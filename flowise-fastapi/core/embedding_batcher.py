@@ -0,0 +1,248 @@
+"""
+Cross-request micro-batching of embedding calls.
+
+Concurrent workflow executions typically embed one query each. An
+`EmbeddingBatcher` queues those requests, and a worker thread collects them
+for up to `max_wait_ms` after the first one arrives (or until
+`max_batch_size` texts are waiting), sends a single batched call per kind
+(document/query) and fans the vectors back out to the callers' futures.
+Batchers are shared per model and credentials, so executions of different
+flows batch together. Batch sizes and the latency added by waiting are
+recorded in histograms.
+"""
+import asyncio
+import bisect
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from core.embedding_cache import CachedEmbeddings
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+LATENCY_MS_BUCKETS = (0.5, 1, 2, 5, 10, 20, 50, 100, 250, 500, 1000)
+
+
+class Histogram:
+    """Fixed-bucket histogram (counts per upper bound, plus +Inf)"""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, value)] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None when empty or past the last bound)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            buckets = {str(bound): count for bound, count in zip(self.bounds, self.counts)}
+            buckets["+Inf"] = self.counts[-1]
+            return {
+                "count": self.count,
+                "sum": self.sum,
+                "mean": self.sum / self.count if self.count else 0.0,
+                "p50": self.quantile(0.5),
+                "p95": self.quantile(0.95),
+                "buckets": buckets,
+            }
+
+
+@dataclass
+class _Request:
+    texts: List[str]
+    kind: str
+    future: Future = field(default_factory=Future)
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+_STOP = object()
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent embedding requests into batched calls"""
+
+    def __init__(self, embeddings: CachedEmbeddings, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.embeddings = embeddings
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.added_latency_ms = Histogram(LATENCY_MS_BUCKETS)
+        self.stats = {"requests": 0, "batches": 0, "direct": 0, "errors": 0}
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                    self._worker.start()
+
+    def submit(self, texts: Sequence[str], kind: str = "document") -> Future:
+        """Queue `texts`; the future resolves to their vectors (one row per text)"""
+        request = _Request(list(texts), kind)
+        self._ensure_worker()
+        self._queue.put(request)
+        return request.future
+
+    def embed(self, texts: Sequence[str], kind: str = "document") -> np.ndarray:
+        if len(texts) >= self.max_batch_size:
+            # Already a full batch: waiting for company would only add latency
+            self.stats["direct"] += 1
+            return self.embeddings.embed_arrays(texts, kind)
+        return self.submit(texts, kind).result()
+
+    async def aembed(self, texts: Sequence[str], kind: str = "document") -> np.ndarray:
+        if len(texts) >= self.max_batch_size:
+            self.stats["direct"] += 1
+            return await asyncio.to_thread(self.embeddings.embed_arrays, texts, kind)
+        return await asyncio.wrap_future(self.submit(texts, kind))
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            size = len(first.texts)
+            deadline = first.enqueued_at + self.max_wait
+            stop = False
+            while size < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is _STOP:
+                    stop = True
+                    break
+                batch.append(request)
+                size += len(request.texts)
+            try:
+                self._dispatch(batch)
+            except Exception as e:
+                # The worker must outlive any single batch, or every later caller hangs
+                self.stats["errors"] += 1
+                print(f"❌ Embedding batch failed: {e}")
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+            if stop:
+                return
+
+    def _dispatch(self, batch: List[_Request]):
+        dispatched_at = time.perf_counter()
+        by_kind: Dict[str, List[_Request]] = {}
+        for request in batch:
+            # Callers that gave up (cancelled or timed out) are dropped; the rest can no longer be cancelled
+            if not request.future.set_running_or_notify_cancel():
+                continue
+            by_kind.setdefault(request.kind, []).append(request)
+            self.added_latency_ms.observe((dispatched_at - request.enqueued_at) * 1000)
+        self.stats["requests"] += len(batch)
+        for kind, requests in by_kind.items():
+            texts = [text for request in requests for text in request.texts]
+            self.stats["batches"] += 1
+            self.batch_sizes.observe(len(texts))
+            try:
+                vectors = self.embeddings.embed_arrays(texts, kind)
+            except Exception as e:
+                self.stats["errors"] += 1
+                for request in requests:
+                    request.future.set_exception(e)
+                continue
+            offset = 0
+            for request in requests:
+                request.future.set_result(vectors[offset:offset + len(request.texts)])
+                offset += len(request.texts)
+
+    def close(self):
+        if self._worker is not None:
+            self._queue.put(_STOP)
+            self._worker.join(timeout=5)
+            self._worker = None
+
+    def summary(self) -> Dict:
+        return {
+            **self.stats,
+            "batch_size": self.batch_sizes.snapshot(),
+            "added_latency_ms": self.added_latency_ms.snapshot(),
+        }
+
+
+class BatchedEmbeddings(Embeddings):
+    """LangChain `Embeddings` whose calls go through a shared `EmbeddingBatcher`"""
+
+    def __init__(self, batcher: EmbeddingBatcher):
+        self.batcher = batcher
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.batcher.embed(texts).tolist() if texts else []
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.batcher.embed([text], kind="query")[0].tolist()
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return (await self.batcher.aembed(texts)).tolist() if texts else []
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.batcher.aembed([text], kind="query"))[0].tolist()
+
+
+_batchers: Dict[str, EmbeddingBatcher] = {}
+_batchers_lock = threading.Lock()
+
+
+def get_embedding_batcher(key: str, embeddings: CachedEmbeddings) -> EmbeddingBatcher:
+    """The process-wide batcher for `key` (model + credentials), created around `embeddings` on first use"""
+    with _batchers_lock:
+        batcher = _batchers.get(key)
+        if batcher is None:
+            from core.config import get_settings
+
+            settings = get_settings()
+            batcher = _batchers[key] = EmbeddingBatcher(
+                embeddings,
+                max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+                max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS
+            )
+        return batcher
+
+
+def embedding_batcher_summary() -> Dict[str, Dict]:
+    with _batchers_lock:
+        return {key: batcher.summary() for key, batcher in _batchers.items()}
+
+
+def shutdown_embedding_batchers():
+    with _batchers_lock:
+        batchers = list(_batchers.values())
+        _batchers.clear()
+    for batcher in batchers:
+        batcher.close()
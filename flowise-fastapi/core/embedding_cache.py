@@ -0,0 +1,209 @@
+"""
+Persistent embedding cache and provider-aware batching.
+
+`CachedEmbeddings` wraps any LangChain `Embeddings`. Texts are keyed by the
+SHA-256 of (model namespace, kind, text); vectors already in the SQLite cache
+are served from disk, duplicates within a call are embedded once, and the rest
+go to the provider in batches that respect its per-request limits on input
+count and (approximate) tokens. Re-ingesting a mostly unchanged corpus only
+pays for the new chunks.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from core.hashing_embeddings import HashingEmbeddings
+
+# Per-request limits of the embedding APIs (inputs per call, tokens per call)
+PROVIDER_LIMITS: Dict[str, Tuple[int, Optional[int]]] = {
+    "openai": (2048, 300_000),
+    "google": (100, None),
+    "hashing": (4096, None),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key BLOB PRIMARY KEY,
+    dimensions INTEGER NOT NULL,
+    vector BLOB NOT NULL
+);
+"""
+# Stay below SQLITE_MAX_VARIABLE_NUMBER on older SQLite builds
+_LOOKUP_CHUNK = 500
+
+
+def _approx_tokens(text: str) -> int:
+    # ~4 characters per token for English text; only used to size batches
+    return len(text) // 4 + 1
+
+
+class EmbeddingCache:
+    """SQLite store of float32 vectors keyed by content hash, oldest entries evicted first"""
+
+    def __init__(self, path: str, max_entries: int = 1_000_000):
+        self.path = path
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    @staticmethod
+    def key(namespace: str, text: str) -> bytes:
+        return hashlib.sha256(f"{namespace}\0{text}".encode("utf-8")).digest()
+
+    def get_many(self, keys: Sequence[bytes]) -> Dict[bytes, np.ndarray]:
+        found: Dict[bytes, np.ndarray] = {}
+        with self._lock:
+            for i in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[i:i + _LOOKUP_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT key, dimensions, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for key, dimensions, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    if len(vector) == dimensions:
+                        found[key] = vector
+            self.stats["hits"] += len(found)
+            self.stats["misses"] += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: Sequence[Tuple[bytes, np.ndarray]]):
+        if not items or self.max_entries <= 0:
+            return
+        rows = [(key, len(vector), np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                before = self._conn.total_changes
+                self._conn.executemany("INSERT OR IGNORE INTO embeddings (key, dimensions, vector) VALUES (?, ?, ?)", rows)
+                added = self._conn.total_changes - before
+                excess = self._count + added - self.max_entries
+                if excess > 0:
+                    self._conn.execute(
+                        "DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM embeddings ORDER BY rowid LIMIT ?)",
+                        (excess,)
+                    )
+                    self.stats["evictions"] += excess
+                    added -= excess
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._count += added
+            self.stats["stores"] += len(rows)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._count = 0
+
+    def summary(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.stats, "entries": self._count}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings served from an `EmbeddingCache` where possible, with the misses
+    sent to `embeddings` in batches of at most `max_batch_size` texts and
+    `max_batch_tokens` approximate tokens. `namespace` must identify the model
+    (and its settings), since vectors of different models are not comparable.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        namespace: str,
+        cache: Optional[EmbeddingCache] = None,
+        max_batch_size: int = 512,
+        max_batch_tokens: Optional[int] = None
+    ):
+        self.embeddings = embeddings
+        self.namespace = namespace
+        self.cache = cache
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_batch_tokens = max_batch_tokens
+        self.stats = {"texts": 0, "embedded": 0, "batches": 0}
+
+    def batches(self, texts: Sequence[str]) -> Iterator[List[str]]:
+        """Split `texts` into provider-sized requests (an oversized text goes alone)"""
+        batch: List[str] = []
+        tokens = 0
+        for text in texts:
+            size = _approx_tokens(text)
+            if batch and (len(batch) >= self.max_batch_size or (self.max_batch_tokens and tokens + size > self.max_batch_tokens)):
+                yield batch
+                batch, tokens = [], 0
+            batch.append(text)
+            tokens += size
+        if batch:
+            yield batch
+
+    def _embed_batch(self, texts: List[str], kind: str) -> np.ndarray:
+        self.stats["batches"] += 1
+        self.stats["embedded"] += len(texts)
+        if isinstance(self.embeddings, HashingEmbeddings):
+            return np.stack([self.embeddings.embed_array(text) for text in texts])
+        if kind == "query":
+            # Some providers embed queries differently from documents (e.g. Gemini task types)
+            return np.asarray([self.embeddings.embed_query(text) for text in texts], dtype=np.float32)
+        return np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+
+    def embed_arrays(self, texts: Sequence[str], kind: str = "document") -> np.ndarray:
+        """Embeddings of `texts` as a float32 matrix, one row per text"""
+        self.stats["texts"] += len(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        namespace = f"{self.namespace}:{kind}"
+        keys = [EmbeddingCache.key(namespace, text) for text in texts]
+        vectors: Dict[bytes, np.ndarray] = self.cache.get_many(list(dict.fromkeys(keys))) if self.cache else {}
+
+        # Each missing text is embedded once, however often it repeats
+        missing: Dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        if missing:
+            pending = list(missing.items())
+            offset = 0
+            for batch in self.batches([text for _, text in pending]):
+                embedded = self._embed_batch(batch, kind)
+                stored = [(pending[offset + i][0], embedded[i]) for i in range(len(batch))]
+                vectors.update(stored)
+                if self.cache:
+                    self.cache.put_many(stored)
+                offset += len(batch)
+        return np.stack([vectors[key] for key in keys])
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_arrays(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_arrays([text], kind="query")[0].tolist()
+
+
+@lru_cache()
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Process-wide embedding cache configured from settings (None when disabled)"""
+    from core.config import get_settings
+
+    settings = get_settings()
+    if not settings.EMBEDDING_CACHE_PATH or settings.EMBEDDING_CACHE_MAX_ENTRIES <= 0:
+        return None
+    return EmbeddingCache(settings.EMBEDDING_CACHE_PATH, max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES)
@@ -0,0 +1,410 @@
+"""
+Deterministic fake LLM, chat model and tool providers.
+
+These are used by the `Fake*` nodes so that the builder, runner and streaming
+path can be load tested without network access or API keys. Every source of
+randomness (latency, failures) is driven by a seeded RNG so runs are repeatable.
+"""
+import asyncio
+import json
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Iterator, List, Optional, Union
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    AsyncCallbackManagerForToolRun,
+    CallbackManagerForLLMRun,
+    CallbackManagerForToolRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.language_models.llms import LLM
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult, GenerationChunk
+from langchain_core.prompt_values import PromptValue, StringPromptValue
+from langchain_core.tools import BaseTool
+
+from nodes.base import NodeInput
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal", "exponential")
+SCRIPT_MODES = ("echo", "scripted", "react")
+
+_TOKEN_RE = re.compile(r"\s*\S+|\s+$")
+
+
+class FakeProviderError(RuntimeError):
+    """Raised by fake providers when failure injection triggers."""
+
+
+@dataclass
+class LatencyProfile:
+    """A seeded latency distribution, configured in milliseconds."""
+    distribution: str = "fixed"
+    mean_ms: float = 0.0
+    jitter_ms: float = 0.0
+    seed: int = 0
+    _rng: random.Random = field(init=False, repr=False)
+
+    def __post_init__(self):
+        if self.distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(
+                f"Unknown latency distribution '{self.distribution}'. "
+                f"Expected one of: {', '.join(LATENCY_DISTRIBUTIONS)}"
+            )
+        self._rng = random.Random(self.seed)
+
+    def sample(self) -> float:
+        """Return the next latency sample in seconds."""
+        mean, jitter = self.mean_ms, self.jitter_ms
+        if mean <= 0 and jitter <= 0:
+            return 0.0
+
+        if self.distribution == "uniform":
+            value = self._rng.uniform(mean - jitter, mean + jitter)
+        elif self.distribution == "normal":
+            value = self._rng.gauss(mean, jitter)
+        elif self.distribution == "lognormal":
+            # mean_ms is the median, jitter_ms / mean_ms is used as sigma
+            sigma = jitter / mean if mean > 0 else 0.0
+            value = mean * self._rng.lognormvariate(0.0, sigma)
+        elif self.distribution == "exponential":
+            value = self._rng.expovariate(1.0 / mean) if mean > 0 else 0.0
+        else:
+            value = mean
+
+        return max(value, 0.0) / 1000.0
+
+
+class FakeBehaviour:
+    """
+    Shared response script, latency, streaming and failure settings for the
+    fake providers. One instance belongs to a single provider object.
+    """
+
+    def __init__(
+        self,
+        responses: Optional[List[str]] = None,
+        script: str = "echo",
+        react_steps: int = 1,
+        tool_name: str = "fake_search",
+        latency: Optional[LatencyProfile] = None,
+        tokens_per_second: float = 0.0,
+        failure_rate: float = 0.0,
+        failure_every: int = 0,
+        seed: int = 0,
+    ):
+        if script not in SCRIPT_MODES:
+            raise ValueError(f"Unknown script mode '{script}'. Expected one of: {', '.join(SCRIPT_MODES)}")
+        if script == "scripted" and not responses:
+            raise ValueError("Scripted mode requires at least one response.")
+
+        self.responses = list(responses or [])
+        self.script = script
+        self.react_steps = max(int(react_steps), 0)
+        self.tool_name = tool_name
+        self.latency = latency or LatencyProfile(seed=seed)
+        self.tokens_per_second = float(tokens_per_second)
+        self.failure_rate = float(failure_rate)
+        self.failure_every = int(failure_every)
+        self.call_count = 0
+        self._failure_rng = random.Random(seed + 1)
+
+    # --- script ---------------------------------------------------------
+
+    def next_response(self, prompt_text: str, user_input: str) -> str:
+        """Pick the response for this call, applying failure injection first."""
+        self.register_call()
+
+        if self.script == "react":
+            return self._react_response(prompt_text, user_input)
+        if self.script == "scripted":
+            response = self.responses[(self.call_count - 1) % len(self.responses)]
+            return response.replace("{input}", user_input)
+        return f"Echo: {user_input}"
+
+    def _react_response(self, prompt_text: str, user_input: str) -> str:
+        # The step is derived from the scratchpad rather than a call counter so
+        # concurrent runs sharing one model still follow the script correctly.
+        scratchpad = prompt_text.rsplit("Question:", 1)[-1]
+        steps_taken = scratchpad.count("Observation:")
+        if steps_taken < self.react_steps:
+            return (
+                f"Thought: I need to use {self.tool_name} (step {steps_taken + 1}).\n"
+                f"Action: {self.tool_name}\n"
+                f"Action Input: {user_input}"
+            )
+        answer = self.responses[0].replace("{input}", user_input) if self.responses else f"Echo: {user_input}"
+        return f"Thought: I now know the final answer\nFinal Answer: {answer}"
+
+    def register_call(self):
+        """Count a call and raise FakeProviderError if a failure is injected for it."""
+        self.call_count += 1
+        if self.failure_every and self.call_count % self.failure_every == 0:
+            raise FakeProviderError(f"Injected failure on call {self.call_count}")
+        if self.failure_rate and self._failure_rng.random() < self.failure_rate:
+            raise FakeProviderError(f"Injected random failure on call {self.call_count}")
+
+    # --- timing ---------------------------------------------------------
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        """Split text into whitespace-preserving tokens."""
+        return _TOKEN_RE.findall(text) or [text]
+
+    def token_delay(self) -> float:
+        return 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def total_delay(self, tokens: List[str]) -> float:
+        """Latency of a non-streaming call: first-token latency plus generation time."""
+        return self.latency.sample() + self.token_delay() * len(tokens)
+
+    def iter_tokens(self, text: str) -> Iterator[str]:
+        time.sleep(self.latency.sample())
+        delay = self.token_delay()
+        for i, token in enumerate(self.tokenize(text)):
+            if delay and i:
+                time.sleep(delay)
+            yield token
+
+    async def aiter_tokens(self, text: str) -> AsyncIterator[str]:
+        await asyncio.sleep(self.latency.sample())
+        delay = self.token_delay()
+        for i, token in enumerate(self.tokenize(text)):
+            if delay and i:
+                await asyncio.sleep(delay)
+            yield token
+
+
+def parse_responses(responses: Union[str, List[str], None]) -> List[str]:
+    """Accept a JSON list, a '||'-separated string or a list of responses."""
+    if not responses:
+        return []
+    if isinstance(responses, list):
+        return [str(r) for r in responses]
+    text = responses.strip()
+    if text.startswith("["):
+        try:
+            return [str(r) for r in json.loads(text)]
+        except json.JSONDecodeError:
+            pass
+    return [part.strip() for part in text.split("||") if part.strip()]
+
+
+def _apply_stop(text: str, stop: Optional[List[str]]) -> str:
+    for token in stop or []:
+        index = text.find(token)
+        if index != -1:
+            text = text[:index]
+    return text
+
+
+def flow_input_to_prompt(model_input: Any) -> Any:
+    # Allow a fake model to sit at the end of a flow and receive the runner's
+    # {"input": ...} dict directly.
+    if isinstance(model_input, dict):
+        return StringPromptValue(text=str(model_input.get("input", "")))
+    return model_input
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model returning scripted responses with simulated latency and streaming."""
+    behaviour: FakeBehaviour
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def _convert_input(self, model_input: Any) -> PromptValue:
+        return super()._convert_input(flow_input_to_prompt(model_input))
+
+    def _respond(self, messages: List[BaseMessage], stop: Optional[List[str]]) -> str:
+        prompt_text = messages[-1].content if messages else ""
+        human = next((m for m in reversed(messages) if m.type == "human"), None)
+        user_input = human.content if human is not None else prompt_text
+        return _apply_stop(self.behaviour.next_response(str(prompt_text), str(user_input)), stop)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        text = self._respond(messages, stop)
+        time.sleep(self.behaviour.total_delay(self.behaviour.tokenize(text)))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        text = self._respond(messages, stop)
+        await asyncio.sleep(self.behaviour.total_delay(self.behaviour.tokenize(text)))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        for token in self.behaviour.iter_tokens(self._respond(messages, stop)):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        async for token in self.behaviour.aiter_tokens(self._respond(messages, stop)):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+class FakeLLM(LLM):
+    """Text-completion LLM returning scripted responses with simulated latency and streaming."""
+    behaviour: FakeBehaviour
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-llm"
+
+    def _convert_input(self, model_input: Any) -> PromptValue:
+        return super()._convert_input(flow_input_to_prompt(model_input))
+
+    def _respond(self, prompt: str, stop: Optional[List[str]]) -> str:
+        user_input = prompt.rsplit("Question:", 1)[-1].split("\n", 1)[0].strip() or prompt
+        return _apply_stop(self.behaviour.next_response(prompt, user_input), stop)
+
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        text = self._respond(prompt, stop)
+        time.sleep(self.behaviour.total_delay(self.behaviour.tokenize(text)))
+        return text
+
+    async def _acall(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        text = self._respond(prompt, stop)
+        await asyncio.sleep(self.behaviour.total_delay(self.behaviour.tokenize(text)))
+        return text
+
+    def _stream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[GenerationChunk]:
+        for token in self.behaviour.iter_tokens(self._respond(prompt, stop)):
+            chunk = GenerationChunk(text=token)
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[GenerationChunk]:
+        async for token in self.behaviour.aiter_tokens(self._respond(prompt, stop)):
+            chunk = GenerationChunk(text=token)
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+class FakeTool(BaseTool):
+    """Tool returning canned observations with simulated latency and failures."""
+    behaviour: FakeBehaviour
+
+    def _observation(self, query: str) -> str:
+        behaviour = self.behaviour
+        behaviour.register_call()
+        if behaviour.responses:
+            response = behaviour.responses[(behaviour.call_count - 1) % len(behaviour.responses)]
+            return response.replace("{input}", query)
+        return f"Fake result for '{query}'"
+
+    def _run(self, query: str, run_manager: Optional[CallbackManagerForToolRun] = None) -> str:
+        time.sleep(self.behaviour.latency.sample())
+        return self._observation(query)
+
+    async def _arun(self, query: str, run_manager: Optional[AsyncCallbackManagerForToolRun] = None) -> str:
+        await asyncio.sleep(self.behaviour.latency.sample())
+        return self._observation(query)
+
+
+def build_behaviour(
+    responses: Union[str, List[str], None] = None,
+    script: str = "echo",
+    react_steps: int = 1,
+    tool_name: str = "fake_search",
+    latency_distribution: str = "fixed",
+    latency_ms: float = 0.0,
+    latency_jitter_ms: float = 0.0,
+    tokens_per_second: float = 0.0,
+    failure_rate: float = 0.0,
+    failure_every: int = 0,
+    seed: int = 0,
+) -> FakeBehaviour:
+    """Create a FakeBehaviour from flat node inputs."""
+    return FakeBehaviour(
+        responses=parse_responses(responses),
+        script=script,
+        react_steps=int(react_steps),
+        tool_name=tool_name,
+        latency=LatencyProfile(
+            distribution=latency_distribution,
+            mean_ms=float(latency_ms),
+            jitter_ms=float(latency_jitter_ms),
+            seed=int(seed),
+        ),
+        tokens_per_second=float(tokens_per_second),
+        failure_rate=float(failure_rate),
+        failure_every=int(failure_every),
+        seed=int(seed),
+    )
+
+
+# Inputs shared by every fake provider node.
+FAKE_LATENCY_INPUTS = [
+    NodeInput(name="latency_distribution", type="string", description=f"Latency distribution: {', '.join(LATENCY_DISTRIBUTIONS)}.", default="fixed", required=False),
+    NodeInput(name="latency_ms", type="float", description="Mean (or median for lognormal) latency per call in milliseconds.", default=0.0, required=False),
+    NodeInput(name="latency_jitter_ms", type="float", description="Spread of the latency distribution in milliseconds.", default=0.0, required=False),
+    NodeInput(name="failure_rate", type="float", description="Probability (0-1) that a call raises an injected error.", default=0.0, required=False),
+    NodeInput(name="failure_every", type="int", description="Fail every Nth call (0 disables).", default=0, required=False),
+    NodeInput(name="seed", type="int", description="Seed for latency and failure sampling.", default=0, required=False),
+]
+
+FAKE_MODEL_INPUTS = [
+    NodeInput(name="script", type="string", description=f"Response mode: {', '.join(SCRIPT_MODES)}.", default="echo", required=False),
+    NodeInput(name="responses", type="string", description="Responses as a JSON list or '||'-separated string. '{input}' is replaced with the user input.", required=False),
+    NodeInput(name="react_steps", type="int", description="Tool calls to make before the final answer in react mode.", default=1, required=False),
+    NodeInput(name="tool_name", type="string", description="Tool to call in react mode.", default="fake_search", required=False),
+    NodeInput(name="tokens_per_second", type="float", description="Streaming rate in tokens per second (0 streams instantly).", default=0.0, required=False),
+] + FAKE_LATENCY_INPUTS
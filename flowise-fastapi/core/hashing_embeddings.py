@@ -0,0 +1,51 @@
+"""
+Local feature-hashing embeddings.
+
+Words and word bigrams are hashed into a fixed number of signed buckets and the
+result is L2-normalised, so cosine similarity reduces to a dot product. There
+is no model to download and no network call, which makes it suitable as a
+default for in-process retrieval and for tests.
+"""
+import hashlib
+import re
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic bag-of-words embeddings using the hashing trick"""
+
+    def __init__(self, dimensions: int = 512, bigrams: bool = True):
+        if dimensions <= 0:
+            raise ValueError("dimensions must be positive")
+        self.dimensions = dimensions
+        self.bigrams = bigrams
+
+    def _features(self, text: str) -> List[str]:
+        words = _WORD_RE.findall(text.lower())
+        features = list(words)
+        if self.bigrams:
+            features.extend(f"{a} {b}" for a, b in zip(words, words[1:]))
+        return features
+
+    def embed_array(self, text: str) -> np.ndarray:
+        """Embedding of `text` as a float32 numpy vector"""
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature in self._features(text):
+            digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+            sign = 1.0 if digest & 1 else -1.0
+            vector[(digest >> 1) % self.dimensions] += sign
+        norm = float(np.linalg.norm(vector))
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_array(text).tolist() for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_array(text).tolist()
@@ -0,0 +1,304 @@
+"""
+Streaming HTML-to-text extraction for the web loaders.
+
+`HtmlTextExtractor` tokenizes markup with a few compiled regexes instead of
+building a tree, accepts it in chunks as it arrives (`feed`/`close`) and
+collects text in a single pass. Boilerplate subtrees (scripts, styles,
+navigation, headers, footers, sidebars, cookie banners, ...) are jumped over
+without being tokenized. When the page marks its main content (`<main>`,
+`<article>` or `role="main"`) only that text is returned.
+"""
+import html
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Union
+
+# Elements whose content is raw text rather than markup
+RAW_TEXT_TAGS = frozenset({"script", "style", "title", "textarea", "xmp", "iframe", "noembed", "noframes", "plaintext"})
+# Subtrees whose text is never content
+SKIP_TAGS = frozenset({
+    "noscript", "template", "svg", "math", "canvas", "object",
+    "nav", "footer", "aside", "form", "button", "select", "dialog",
+})
+# Elements that can never have children (no end tag to wait for)
+VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param",
+    "source", "track", "wbr",
+})
+# Elements usually left unclosed; never skipped by class/id since their end is implied
+IMPLIED_END_TAGS = frozenset({"p", "li", "dt", "dd", "tr", "td", "th", "option", "thead", "tbody", "tfoot"})
+# Elements that start a new line of text
+BLOCK_TAGS = frozenset({
+    "address", "article", "blockquote", "dd", "div", "dl", "dt", "figcaption", "figure",
+    "h1", "h2", "h3", "h4", "h5", "h6", "li", "main", "ol", "p", "pre", "section", "table",
+    "td", "th", "tr", "ul",
+})
+MAIN_TAGS = frozenset({"main", "article"})
+BOILERPLATE_ROLES = frozenset({"navigation", "banner", "contentinfo", "complementary", "search", "dialog"})
+# Elements that hold the page itself; never skipped whatever their class/id says
+CONTAINER_TAGS = frozenset({"html", "body", "main"})
+# Matched against each whole class/id token: a boilerplate word, optionally behind a site-wide
+# prefix ("site-header") and followed by modifiers ("share-buttons"), but not "has-sidebar"
+BOILERPLATE_RE = re.compile(
+    r"(?:(?:site|page|main|global|top|primary)[_-])?"
+    r"(?:nav|navbar|menu|footer|header|sidebar|breadcrumbs?|cookies?|consent|banner|"
+    r"ads?|advert\w*|share|social|related|comments?|popup|modal|newsletter|subscribe|skip-link)"
+    r"(?:[_-][\w-]*)?",
+    re.IGNORECASE,
+)
+
+_TAG_RE = re.compile(r"<(/?)([a-zA-Z][\w:-]*)([^>\"']*(?:(?:\"[^\"]*\"|'[^']*')[^>\"']*)*)>")
+_ATTR_RE = re.compile(r"([^\s=/>\"']+)(?:\s*=\s*(\"[^\"]*\"|'[^']*'|[^\s>]+))?")
+_CHARSET_RE = re.compile(rb"<meta[^>]+charset=[\"']?([\w-]+)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=None)
+def _raw_end(tag: str) -> "re.Pattern":
+    return re.compile(rf"</{tag}\s*>", re.IGNORECASE)
+
+
+@lru_cache(maxsize=None)
+def _same_tag(tag: str) -> "re.Pattern":
+    return re.compile(rf"<(/?){tag}(?=[\s/>])[^>]*>", re.IGNORECASE)
+
+
+def _parse_attrs(raw: str) -> Dict[str, Optional[str]]:
+    attrs = {}
+    for name, value in _ATTR_RE.findall(raw):
+        if value[:1] in ("\"", "'"):
+            value = value[1:-1]
+        attrs.setdefault(name.lower(), html.unescape(value) if value else None)
+    return attrs
+
+
+@dataclass
+class ExtractedPage:
+    """Text and page metadata produced by `HtmlTextExtractor`"""
+    text: str
+    title: Optional[str] = None
+    description: Optional[str] = None
+    language: Optional[str] = None
+    main_content: bool = False
+
+
+class HtmlTextExtractor:
+    """Single-pass, boilerplate-stripping text extractor; call `feed` then `close`"""
+
+    def __init__(self, main_content: bool = True, strip_boilerplate: bool = True):
+        self.main_content = main_content
+        self.strip_boilerplate = strip_boilerplate
+        self._buffer = ""
+        self._stack: List[str] = []
+        # Stack depth at which the current main-content element started (-1: outside)
+        self._main_depth = -1
+        self._seen_main = False
+        self._in_head = False
+        self._title: Optional[str] = None
+        self._body: List[str] = []
+        self._main: List[str] = []
+        self.description: Optional[str] = None
+        self.language: Optional[str] = None
+
+    def feed(self, data: str):
+        self._buffer += data
+        self._parse(final=False)
+
+    def close(self):
+        self._parse(final=True)
+
+    # --- tokenizer ---------------------------------------------------------
+
+    def _parse(self, final: bool):
+        buf = self._buffer
+        size = len(buf)
+        pos = 0
+        while pos < size:
+            lt = buf.find("<", pos)
+            if lt < 0:
+                self._text(buf[pos:])
+                pos = size
+                break
+            if lt > pos:
+                self._text(buf[pos:lt])
+                pos = lt
+
+            if buf.startswith("<!--", pos):
+                end = buf.find("-->", pos + 4)
+                if end < 0:
+                    pos = size if final else pos
+                    break
+                pos = end + 3
+                continue
+            if buf.startswith(("<!", "<?"), pos):
+                end = buf.find(">", pos)
+                if end < 0:
+                    pos = size if final else pos
+                    break
+                pos = end + 1
+                continue
+
+            match = _TAG_RE.match(buf, pos)
+            if match is None:
+                if not final and buf.find("<", pos + 1) < 0:
+                    # Possibly a tag cut off at the end of this chunk
+                    break
+                self._text("<")
+                pos += 1
+                continue
+            closing, tag, raw_attrs = match.groups()
+            tag = tag.lower()
+            if closing:
+                self._end(tag)
+                pos = match.end()
+                continue
+            resume = self._start(tag, raw_attrs, buf, match.end(), final)
+            if resume is None:
+                # The element's end has not arrived yet
+                break
+            pos = resume
+        self._buffer = buf[pos:]
+
+    def _start(self, tag: str, raw_attrs: str, buf: str, pos: int, final: bool) -> Optional[int]:
+        """Handle a start tag ending at `pos`; returns where to resume, or None to wait for data"""
+        if tag in RAW_TEXT_TAGS:
+            end = _raw_end(tag).search(buf, pos)
+            if end is None:
+                return len(buf) if final else None
+            if tag == "title" and self._title is None:
+                self._title = buf[pos:end.start()]
+            return end.end()
+
+        attrs = _parse_attrs(raw_attrs) if raw_attrs.strip() else {}
+        if tag == "html":
+            self.language = self.language or attrs.get("lang")
+        elif tag == "head":
+            self._in_head = True
+        elif tag == "body":
+            self._in_head = False
+        elif tag == "meta" and self.description is None and (attrs.get("name") or "").lower() == "description":
+            self.description = attrs.get("content")
+
+        if tag in VOID_TAGS or raw_attrs.endswith("/"):
+            if tag in ("br", "hr"):
+                self._text("\n")
+            return pos
+        if self._in_head:
+            return pos
+        if self._is_boilerplate(tag, attrs):
+            end = self._find_end(buf, pos, tag)
+            if end is not None:
+                return end
+            if not final:
+                return None
+            # Never closed: keep its content rather than drop the rest of the page
+
+        self._stack.append(tag)
+        if self.main_content and self._main_depth < 0 and (tag in MAIN_TAGS or attrs.get("role") == "main"):
+            self._main_depth = len(self._stack)
+            self._seen_main = True
+        if tag in BLOCK_TAGS:
+            self._text("\n")
+        return pos
+
+    def _end(self, tag: str):
+        if tag == "head":
+            self._in_head = False
+        if tag not in self._stack:
+            # Stray end tag in malformed markup
+            return
+        # Implicitly close any unclosed children (<p>, <li>, ...)
+        while self._stack:
+            depth = len(self._stack)
+            closed = self._stack.pop()
+            if closed in BLOCK_TAGS:
+                self._text("\n")
+            if depth == self._main_depth:
+                self._main_depth = -1
+            if closed == tag:
+                break
+
+    def _is_boilerplate(self, tag: str, attrs: Dict[str, Optional[str]]) -> bool:
+        if tag in ("noscript", "template"):
+            return True
+        if not self.strip_boilerplate or tag in IMPLIED_END_TAGS or tag in CONTAINER_TAGS:
+            return False
+        if tag in SKIP_TAGS or (tag == "header" and self._main_depth < 0):
+            return True
+        if not attrs:
+            return False
+        if (attrs.get("role") or "").lower() == "main":
+            return False
+        if "hidden" in attrs or attrs.get("aria-hidden") == "true":
+            return True
+        if (attrs.get("role") or "").lower() in BOILERPLATE_ROLES:
+            return True
+        return any(
+            BOILERPLATE_RE.fullmatch(token)
+            for name in ("class", "id") for token in (attrs.get(name) or "").split()
+        )
+
+    @staticmethod
+    def _find_end(buf: str, pos: int, tag: str) -> Optional[int]:
+        """Offset just past the end tag matching an element opened at `pos`"""
+        depth = 1
+        for match in _same_tag(tag).finditer(buf, pos):
+            if match.group(1):
+                depth -= 1
+                if depth == 0:
+                    return match.end()
+            elif not match.group(0).endswith("/>"):
+                depth += 1
+        return None
+
+    def _text(self, text: str):
+        if self._in_head:
+            return
+        self._body.append(text)
+        if self._main_depth >= 0:
+            self._main.append(text)
+
+    # --- output ------------------------------------------------------------
+
+    def result(self) -> ExtractedPage:
+        use_main = self._seen_main and any(part.strip() for part in self._main)
+        text = "".join(self._main if use_main else self._body)
+        if "&" in text:
+            text = html.unescape(text)
+        # Collapse runs of whitespace and drop empty lines
+        lines = (" ".join(line.split()) for line in text.split("\n"))
+        title = " ".join(html.unescape(self._title).split()) if self._title else None
+        return ExtractedPage(
+            text="\n".join(line for line in lines if line),
+            title=title or None,
+            description=self.description,
+            language=self.language,
+            main_content=use_main
+        )
+
+
+def sniff_encoding(content: bytes, declared: Optional[str] = None) -> str:
+    """Encoding from the response headers, else a `<meta charset>` near the top, else UTF-8"""
+    if declared:
+        return declared
+    match = _CHARSET_RE.search(content[:2048])
+    return match.group(1).decode("ascii") if match else "utf-8"
+
+
+def extract_html(
+    content: Union[bytes, str],
+    encoding: Optional[str] = None,
+    main_content: bool = True,
+    strip_boilerplate: bool = True
+) -> ExtractedPage:
+    """Extract text and metadata from a whole HTML document"""
+    if isinstance(content, bytes):
+        charset = sniff_encoding(content, encoding)
+        try:
+            content = content.decode(charset, errors="replace")
+        except LookupError:
+            content = content.decode("utf-8", errors="replace")
+    extractor = HtmlTextExtractor(main_content=main_content, strip_boilerplate=strip_boilerplate)
+    extractor.feed(content)
+    extractor.close()
+    return extractor.result()
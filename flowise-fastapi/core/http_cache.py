@@ -0,0 +1,251 @@
+"""
+On-disk HTTP cache shared by the document loaders.
+
+Bodies are stored by URL (one body file plus a small JSON metadata file per
+entry). A fresh entry is served without touching the network; a stale one is
+revalidated with `If-None-Match`/`If-Modified-Since`, and a `304 Not Modified`
+reuses the stored body. Entries expire after the response's `max-age` (or the
+default TTL) and the least recently used ones are evicted once the cache grows
+past its size cap. `stats["bytes_saved"]` counts body bytes not downloaded.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from typing import Dict, Optional
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+@dataclass
+class CacheEntry:
+    """Metadata of one cached body"""
+    key: str
+    url: str
+    status: int = 200
+    headers: Dict[str, str] = field(default_factory=dict)
+    encoding: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    stored_at: float = 0.0
+    expires_at: float = 0.0
+    size: int = 0
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    @property
+    def revalidatable(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+
+class HttpCache:
+    """Size-capped, LRU-evicted store of response bodies keyed by URL"""
+
+    def __init__(self, directory: str, max_bytes: int = 500_000_000, default_ttl_seconds: int = 3600):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.default_ttl_seconds = default_ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._total = 0
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "stores": 0, "evictions": 0, "bytes_saved": 0}
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    @staticmethod
+    def key(url: str, headers: Optional[Dict[str, str]] = None) -> str:
+        """Cache key of `url`; custom request headers (auth, language) get their own entry"""
+        material = url
+        if headers:
+            material += "\n" + json.dumps(sorted((k.lower(), v) for k, v in headers.items()))
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{key}.{suffix}")
+
+    def _scan(self):
+        """Rebuild the index from disk, oldest access first"""
+        found = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = CacheEntry(**json.load(f))
+                accessed = os.path.getmtime(self._path(entry.key, "body"))
+            except (OSError, ValueError, TypeError):
+                continue
+            found.append((accessed, entry))
+        for _, entry in sorted(found, key=lambda item: item[0]):
+            self._entries[entry.key] = entry
+            self._total += entry.size
+
+    # --- lookups -----------------------------------------------------------
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> Optional[CacheEntry]:
+        """Entry for `url` (fresh or stale), or None"""
+        key = self.key(url, headers)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def read(self, entry: CacheEntry) -> Optional[bytes]:
+        """Stored body of `entry`; None (and the entry dropped) if the file is gone"""
+        try:
+            with open(self._path(entry.key, "body"), "rb") as f:
+                content = f.read()
+            os.utime(self._path(entry.key, "body"))
+            return content
+        except OSError:
+            with self._lock:
+                self._drop(entry.key)
+            return None
+
+    def read_fresh(self, url: str, headers: Optional[Dict[str, str]] = None) -> Optional[bytes]:
+        """Body of a fresh entry for `url` (counted as a hit), for callers that don't revalidate"""
+        entry = self.get(url, headers)
+        if entry is None or not entry.fresh:
+            return None
+        content = self.read(entry)
+        if content is not None:
+            self.record_hit(entry)
+        return content
+
+    def conditional_headers(self, entry: CacheEntry) -> Dict[str, str]:
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def record_hit(self, entry: CacheEntry, revalidated: bool = False):
+        with self._lock:
+            self.stats["revalidated" if revalidated else "hits"] += 1
+            self.stats["bytes_saved"] += entry.size
+
+    # --- updates -----------------------------------------------------------
+
+    def ttl_for(self, headers: Dict[str, str]) -> Optional[int]:
+        """Seconds a response may be served without revalidation; None if it must not be stored"""
+        cache_control = {k.lower(): v for k, v in headers.items()}.get("cache-control", "").lower()
+        if "no-store" in cache_control:
+            return None
+        if "no-cache" in cache_control:
+            return 0
+        match = _MAX_AGE_RE.search(cache_control)
+        return int(match.group(1)) if match else self.default_ttl_seconds
+
+    def put(
+        self,
+        url: str,
+        content: bytes,
+        status: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        encoding: Optional[str] = None,
+        request_headers: Optional[Dict[str, str]] = None,
+        ttl_seconds: Optional[int] = None
+    ) -> Optional[CacheEntry]:
+        """Store a response body; returns None when it is not cacheable"""
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        ttl = self.ttl_for(headers) if ttl_seconds is None else ttl_seconds
+        if ttl is None or len(content) > self.max_bytes:
+            return None
+        if ttl == 0 and "etag" not in headers and "last-modified" not in headers:
+            # Could never be served or revalidated
+            return None
+        now = time.time()
+        entry = CacheEntry(
+            key=self.key(url, request_headers),
+            url=url,
+            status=status,
+            headers={k: v for k, v in headers.items() if k in ("content-type", "content-language")},
+            encoding=encoding,
+            etag=headers.get("etag"),
+            last_modified=headers.get("last-modified"),
+            stored_at=now,
+            expires_at=now + ttl,
+            size=len(content)
+        )
+        self._write(self._path(entry.key, "body"), content)
+        self._write_meta(entry)
+        with self._lock:
+            previous = self._entries.pop(entry.key, None)
+            if previous is not None:
+                self._total -= previous.size
+            self._entries[entry.key] = entry
+            self._total += entry.size
+            self.stats["stores"] += 1
+            self._evict()
+        return entry
+
+    def refresh(self, entry: CacheEntry, headers: Dict[str, str]):
+        """Extend a revalidated entry after a 304, taking any new validators"""
+        headers = {k.lower(): v for k, v in headers.items()}
+        ttl = self.ttl_for(headers)
+        entry.expires_at = time.time() + (ttl or 0)
+        entry.etag = headers.get("etag", entry.etag)
+        entry.last_modified = headers.get("last-modified", entry.last_modified)
+        self._write_meta(entry)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._drop(key)
+
+    def _write(self, path: str, data: bytes):
+        # Write then rename so readers never see a partial file
+        temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp, "wb") as f:
+            f.write(data)
+        os.replace(temp, path)
+
+    def _write_meta(self, entry: CacheEntry):
+        self._write(self._path(entry.key, "json"), json.dumps(asdict(entry)).encode("utf-8"))
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total -= entry.size
+        for suffix in ("json", "body"):
+            try:
+                os.remove(self._path(key, suffix))
+            except OSError:
+                pass
+
+    def _evict(self):
+        while self._total > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._drop(key)
+            self.stats["evictions"] += 1
+
+    def summary(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries), "bytes": self._total}
+
+
+@lru_cache()
+def get_http_cache() -> Optional[HttpCache]:
+    """Process-wide loader cache configured from settings (None when disabled)"""
+    from core.config import get_settings
+
+    settings = get_settings()
+    if settings.HTTP_CACHE_MAX_BYTES <= 0:
+        return None
+    return HttpCache(
+        settings.HTTP_CACHE_DIRECTORY,
+        max_bytes=settings.HTTP_CACHE_MAX_BYTES,
+        default_ttl_seconds=settings.HTTP_CACHE_TTL_SECONDS
+    )
@@ -0,0 +1,287 @@
+"""
+Async HTTP fetch engine shared by the web loaders.
+
+One pooled `httpx.AsyncClient` is kept per event loop (and TLS-verification
+setting) so connections are reused across requests; a per-host semaphore caps
+concurrent requests to any single host. Bodies are streamed and cut off at
+`max_bytes`, so a huge or endless response cannot exhaust memory. With an
+`HttpCache` attached, `fetch` serves fresh copies from disk and revalidates
+stale ones with conditional requests.
+"""
+import asyncio
+import contextlib
+import itertools
+import time
+import weakref
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from core.http_cache import CacheEntry, HttpCache, get_http_cache
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (compatible; FlowiseBot/1.0)"
+
+
+class ResponseTooLargeError(ValueError):
+    """Raised when a response exceeds the size cap and truncation is disabled"""
+
+
+@dataclass
+class FetchResult:
+    """Outcome of fetching one URL"""
+    url: str
+    status: int = 0
+    headers: Dict[str, str] = field(default_factory=dict)
+    content: bytes = b""
+    encoding: Optional[str] = None
+    truncated: bool = False
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    from_cache: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and 200 <= self.status < 300
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+class _LoopState:
+    """Clients and host semaphores bound to one event loop"""
+
+    def __init__(self):
+        self.clients: Dict[bool, httpx.AsyncClient] = {}
+        self.host_limits: Dict[str, asyncio.Semaphore] = {}
+
+
+class HttpFetcher:
+    """Concurrent, connection-pooled HTTP GETs with per-host limits and size caps"""
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        per_host_concurrency: int = 8,
+        timeout_seconds: float = 30.0,
+        max_bytes: int = 10_000_000,
+        user_agent: str = DEFAULT_USER_AGENT,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        cache: Optional[HttpCache] = None
+    ):
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections)
+        self.per_host_concurrency = per_host_concurrency
+        self.timeout = httpx.Timeout(timeout_seconds)
+        self.max_bytes = max_bytes
+        self.user_agent = user_agent
+        self._transport = transport
+        self.cache = cache
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = weakref.WeakKeyDictionary()
+        self.stats = {"requests": 0, "errors": 0, "truncated": 0, "bytes": 0}
+
+    # --- pooling -----------------------------------------------------------
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._loops.get(loop)
+        if state is None:
+            state = self._loops[loop] = _LoopState()
+        return state
+
+    def _client(self, verify: bool) -> httpx.AsyncClient:
+        state = self._state()
+        client = state.clients.get(verify)
+        if client is None or client.is_closed:
+            client = state.clients[verify] = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout,
+                verify=verify,
+                follow_redirects=True,
+                headers={"User-Agent": self.user_agent},
+                transport=self._transport
+            )
+        return client
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        state = self._state()
+        host = urlsplit(url).netloc.lower()
+        semaphore = state.host_limits.get(host)
+        if semaphore is None:
+            semaphore = state.host_limits[host] = asyncio.Semaphore(self.per_host_concurrency)
+        return semaphore
+
+    async def aclose(self):
+        """Close the clients of the current event loop"""
+        state = self._loops.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            for client in state.clients.values():
+                await client.aclose()
+
+    # --- fetching ----------------------------------------------------------
+
+    async def stream(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        verify: bool = True,
+        max_bytes: Optional[int] = None,
+        chunk_size: int = 65_536,
+        host_limit: bool = True
+    ) -> AsyncIterator[bytes]:
+        """
+        Yield body chunks of a successful response, stopping at `max_bytes`.
+        With `host_limit=False` the stream does not take a per-host slot, for
+        long reads (sitemaps) that drive fetches to the same host.
+        """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        async with (self._host_limit(url) if host_limit else contextlib.nullcontext()):
+            async with self._client(verify).stream("GET", url, headers=headers) as response:
+                response.raise_for_status()
+                received = 0
+                async for chunk in response.aiter_bytes(chunk_size):
+                    if limit and received + len(chunk) > limit:
+                        yield chunk[:limit - received]
+                        self.stats["truncated"] += 1
+                        return
+                    received += len(chunk)
+                    yield chunk
+
+    async def fetch(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        verify: bool = True,
+        max_bytes: Optional[int] = None,
+        truncate: bool = True,
+        use_cache: bool = True
+    ) -> FetchResult:
+        """GET `url`; errors are reported on the result rather than raised"""
+        started = time.perf_counter()
+        cache = self.cache if use_cache else None
+        entry = cache.get(url, headers) if cache else None
+        if entry is not None and entry.fresh:
+            result = await self._from_cache(entry, started)
+            if result is not None:
+                return result
+            entry = None
+
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        result = FetchResult(url=url)
+        request_headers = dict(headers or {})
+        if entry is not None and entry.revalidatable:
+            request_headers.update(cache.conditional_headers(entry))
+        not_modified = False
+        self.stats["requests"] += 1
+        try:
+            async with self._host_limit(url):
+                async with self._client(verify).stream("GET", url, headers=request_headers) as response:
+                    if response.status_code == 304 and entry is not None:
+                        cache.refresh(entry, dict(response.headers))
+                        not_modified = True
+                    else:
+                        await self._read_body(response, result, limit, truncate)
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+        if not_modified:
+            cached = await self._from_cache(entry, started, revalidated=True)
+            if cached is not None:
+                return cached
+            # The body vanished from disk: fetch it again without validators
+            return await self.fetch(url, headers, verify, max_bytes, truncate, use_cache)
+        if result.error:
+            self.stats["errors"] += 1
+        elif cache is not None and result.status == 200 and not result.truncated:
+            try:
+                await asyncio.to_thread(
+                    cache.put, url, result.content, result.status, result.headers, result.encoding, headers
+                )
+            except OSError as e:
+                print(f"⚠️ Could not cache {url}: {e}")
+        result.elapsed = time.perf_counter() - started
+        return result
+
+    async def _read_body(self, response: httpx.Response, result: FetchResult, limit: int, truncate: bool):
+        result.status = response.status_code
+        result.headers = dict(response.headers)
+        result.encoding = response.charset_encoding
+        declared = response.headers.get("content-length")
+        if limit and not truncate and declared and declared.isdigit() and int(declared) > limit:
+            raise ResponseTooLargeError(f"{result.url} is {declared} bytes (limit {limit})")
+
+        parts: List[bytes] = []
+        received = 0
+        async for chunk in response.aiter_bytes():
+            if limit and received + len(chunk) > limit:
+                if not truncate:
+                    raise ResponseTooLargeError(f"{result.url} exceeds {limit} bytes")
+                parts.append(chunk[:limit - received])
+                received = limit
+                result.truncated = True
+                self.stats["truncated"] += 1
+                break
+            parts.append(chunk)
+            received += len(chunk)
+        result.content = b"".join(parts)
+        self.stats["bytes"] += received
+        if response.status_code >= 400:
+            result.error = f"HTTP {response.status_code}"
+
+    async def _from_cache(self, entry: CacheEntry, started: float, revalidated: bool = False) -> Optional[FetchResult]:
+        content = await asyncio.to_thread(self.cache.read, entry)
+        if content is None:
+            return None
+        self.cache.record_hit(entry, revalidated=revalidated)
+        return FetchResult(
+            url=entry.url,
+            status=entry.status,
+            headers=dict(entry.headers),
+            content=content,
+            encoding=entry.encoding,
+            elapsed=time.perf_counter() - started,
+            from_cache=True
+        )
+
+    async def fetch_all(self, urls: Iterable[str], **kwargs) -> List[FetchResult]:
+        """Fetch URLs concurrently (bounded per host), returning results in input order"""
+        return list(await asyncio.gather(*(self.fetch(url, **kwargs) for url in urls)))
+
+    async def iter_fetch(self, urls: Iterable[str], window: int = 64, **kwargs) -> AsyncIterator[FetchResult]:
+        """
+        Fetch URLs concurrently, yielding each result as soon as it completes.
+        At most `window` fetches exist at once, so a long URL list does not
+        create a task per URL up front.
+        """
+        urls = iter(urls)
+        in_flight = set()
+        try:
+            while True:
+                for url in itertools.islice(urls, max(1, window) - len(in_flight)):
+                    in_flight.add(asyncio.ensure_future(self.fetch(url, **kwargs)))
+                if not in_flight:
+                    return
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+
+@lru_cache()
+def get_http_fetcher() -> HttpFetcher:
+    """Process-wide fetcher configured from settings"""
+    from core.config import get_settings
+
+    settings = get_settings()
+    return HttpFetcher(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        per_host_concurrency=settings.HTTP_PER_HOST_CONCURRENCY,
+        timeout_seconds=settings.HTTP_TIMEOUT_SECONDS,
+        max_bytes=settings.HTTP_MAX_RESPONSE_BYTES,
+        user_agent=settings.HTTP_USER_AGENT,
+        cache=get_http_cache()
+    )
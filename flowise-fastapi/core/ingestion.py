@@ -0,0 +1,183 @@
+"""
+Streaming ingestion: load -> split -> embed -> upsert.
+
+`IngestionPipeline` is a Runnable that drains its sources into a Chroma
+collection (or anything with the same `upsert`, such as `MmapVectorIndex`) in
+fixed-size batches. A producer thread pulls documents from the
+loaders and cuts them into chunks; batches are handed to the event loop
+through a bounded queue, so the producer blocks (backpressure) whenever
+embedding or upserting falls behind. Upserting a batch overlaps with
+embedding the next one. At most `max_pending_batches + 3` batches are alive
+at any time, so memory stays flat however large the corpus is.
+
+`astream` yields a progress event per upserted batch (the streaming endpoint
+forwards them) and the summary last; `ainvoke`/`invoke` return the summary.
+Chunk ids are content hashes, so re-ingesting the same corpus updates rather
+than duplicates.
+"""
+import asyncio
+import hashlib
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from core.text_splitter import ChunkSplitter, SplitLoader
+
+_DONE = object()
+
+
+def chunk_id(document: Document) -> str:
+    source = str(document.metadata.get("source", ""))
+    start = str(document.metadata.get("start_index", ""))
+    return hashlib.sha256(f"{source}\0{start}\0{document.page_content}".encode("utf-8")).hexdigest()
+
+
+def _clean_metadata(metadata: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    # Chroma only stores scalar metadata values, and rejects empty dicts (None is accepted)
+    cleaned = {
+        key: value if isinstance(value, (str, int, float, bool)) else str(value)
+        for key, value in metadata.items()
+        if value is not None
+    }
+    return cleaned or None
+
+
+class IngestionPipeline(Runnable):
+    """Ingest the documents of `sources` into a Chroma collection"""
+
+    def __init__(
+        self,
+        sources: Iterable[Any],
+        embeddings: Embeddings,
+        collection_factory: Callable[[], Any],
+        collection_name: str,
+        splitter: Optional[ChunkSplitter] = None,
+        batch_size: int = 256,
+        max_pending_batches: int = 2
+    ):
+        self.sources = sources
+        self.embeddings = embeddings
+        self.collection_factory = collection_factory
+        self.collection_name = collection_name
+        self.splitter = splitter
+        self.batch_size = max(1, batch_size)
+        self.max_pending_batches = max(1, max_pending_batches)
+
+    def _chunks(self) -> Iterator[Document]:
+        return SplitLoader(self.sources, self.splitter or _Passthrough()).lazy_load()
+
+    async def _run(self) -> AsyncIterator[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        batches: asyncio.Queue = asyncio.Queue(maxsize=self.max_pending_batches)
+        stop = threading.Event()
+        counts = {"chunks_read": 0}
+
+        def put(item: Any):
+            # Blocks this thread while the queue is full
+            asyncio.run_coroutine_threadsafe(batches.put(item), loop).result()
+
+        def produce():
+            try:
+                batch: List[Document] = []
+                for chunk in self._chunks():
+                    if stop.is_set():
+                        return
+                    batch.append(chunk)
+                    counts["chunks_read"] += 1
+                    if len(batch) >= self.batch_size:
+                        put(batch)
+                        batch = []
+                if batch and not stop.is_set():
+                    put(batch)
+            except Exception as e:
+                if not stop.is_set():
+                    put(e)
+            finally:
+                if not stop.is_set():
+                    put(_DONE)
+
+        collection = await asyncio.to_thread(self.collection_factory)
+        producer = asyncio.ensure_future(asyncio.to_thread(produce))
+        upsert: Optional[asyncio.Future] = None
+        started = time.perf_counter()
+        stats = {"batches": 0, "chunks": 0}
+        try:
+            while True:
+                item = await batches.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                texts = [document.page_content for document in item]
+                vectors = await self.embeddings.aembed_documents(texts)
+                if upsert is not None:
+                    await upsert
+                    yield self._progress(stats, counts, started)
+                upsert = asyncio.ensure_future(asyncio.to_thread(
+                    collection.upsert,
+                    ids=[chunk_id(document) for document in item],
+                    embeddings=vectors,
+                    documents=texts,
+                    metadatas=[_clean_metadata(document.metadata) for document in item]
+                ))
+                stats["batches"] += 1
+                stats["chunks"] += len(item)
+            if upsert is not None:
+                await upsert
+                upsert = None
+                yield self._progress(stats, counts, started)
+            elapsed = time.perf_counter() - started
+            yield {
+                "type": "result",
+                "output": f"Ingested {stats['chunks']} chunks into collection '{self.collection_name}'",
+                "collection": self.collection_name,
+                "chunks": stats["chunks"],
+                "batches": stats["batches"],
+                "seconds": round(elapsed, 3),
+            }
+        finally:
+            stop.set()
+            # Unblock a producer waiting on a full queue, then let it exit
+            while not producer.done():
+                while not batches.empty():
+                    batches.get_nowait()
+                await asyncio.sleep(0.01)
+            if upsert is not None and not upsert.done():
+                await asyncio.wait([upsert])
+
+    def _progress(self, stats: Dict[str, int], counts: Dict[str, int], started: float) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - started
+        return {
+            "type": "progress",
+            "stage": "ingest",
+            "collection": self.collection_name,
+            "batches": stats["batches"],
+            "chunks_upserted": stats["chunks"],
+            "chunks_read": counts["chunks_read"],
+            "chunks_per_sec": round(stats["chunks"] / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+    async def astream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator[Dict[str, Any]]:
+        async for event in self._run():
+            yield event
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Dict[str, Any]:
+        result = None
+        async for event in self._run():
+            if event["type"] == "result":
+                result = event
+        return result
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Dict[str, Any]:
+        return asyncio.run(self.ainvoke(input, config))
+
+
+class _Passthrough:
+    """Stand-in splitter for sources that are already chunked"""
+
+    def lazy_split_documents(self, documents: Iterable[Document]) -> Iterator[Document]:
+        return iter(documents)
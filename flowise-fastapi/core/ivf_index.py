@@ -0,0 +1,311 @@
+"""
+Compressed approximate index: int8 codes grouped by inverted file (IVF).
+
+`build_ivf_index` runs offline over an `MmapVectorIndex`, so vectors are
+never embedded twice:
+
+1. k-means on a sample of the vectors gives `n_lists` centroids
+2. every vector is assigned to its nearest centroid, and vectors are stored
+   grouped by list
+3. each vector is stored as its residual from the list centroid, in int8
+   codes with one float32 scale (`v ~ centroid + codes * scale`). That is
+   about 4x smaller than float32, and quantizing the residual, which is much
+   smaller than the vector, keeps the rounding error low
+
+An IVF directory holds:
+
+    centroids.f32  n_lists x dimensions float32
+    lists.i64      n_lists + 1 offsets into the grouped rows
+    codes.i8       rows x dimensions int8, grouped by list
+    scales.f32     one scale per row
+    offsets.i64    per row, the byte offset of its record in records.jsonl
+    records.jsonl  copied from the source index
+    ivf.json       dimensions, rows, lists, metric, generation
+
+At query time everything is memory-mapped. A query is scored against the
+centroids, and only the rows of its `nprobe` best lists are read and scored,
+so resident memory is the pages of the probed lists, not the whole matrix.
+Larger `nprobe` trades latency for recall. A rebuild replaces the directory
+and bumps `generation`; `get_ivf_index` notices and loads the new build,
+while searches already running finish on the old one.
+
+Build from the command line (run from `flowise-fastapi`):
+
+    python -m core.ivf_index <collection> [--lists N] [--directory DIR]
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+
+from core.vector_index import Hit, MmapVectorIndex, VectorIndexRetriever, embed_queries, validate_index_name
+
+# Rows assigned / encoded per step while building
+_BUILD_BLOCK_ROWS = 65_536
+# k-means needs a few dozen points per centroid to place it sensibly
+_TRAIN_POINTS_PER_LIST = 64
+
+
+def default_list_count(rows: int) -> int:
+    return max(1, min(int(4 * math.sqrt(rows)), rows // 39 or 1))
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    return np.argmax(vectors @ centroids.T, axis=1)
+
+
+def train_centroids(sample: np.ndarray, n_lists: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means: centroids are re-normalised so inner product ranks them"""
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = _nearest(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        counts = np.bincount(assignment, minlength=n_lists)
+        empty = counts == 0
+        if empty.any():
+            # Re-seed empty lists with random points
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = sums / np.where(norms > 0, norms, 1.0)
+    return centroids.astype(np.float32)
+
+
+def quantize(vectors: np.ndarray) -> tuple:
+    """Per-row symmetric int8 codes and scales (`vectors ~ codes * scales[:, None]`)"""
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+def build_ivf_index(
+    source: MmapVectorIndex,
+    directory: str,
+    n_lists: Optional[int] = None,
+    iterations: int = 10,
+    seed: int = 0
+) -> Dict[str, int]:
+    """Write an IVF index of every vector in `source` to `directory` (replacing any previous build)"""
+    rows = len(source)
+    if not rows:
+        raise ValueError(f"Vector index at {source.directory} is empty")
+    matrix = source._matrix
+    dimensions = source.dimensions
+    n_lists = min(n_lists or default_list_count(rows), rows)
+
+    rng = np.random.default_rng(seed)
+    train_rows = np.sort(rng.choice(rows, min(rows, n_lists * _TRAIN_POINTS_PER_LIST), replace=False))
+    centroids = train_centroids(np.asarray(matrix[train_rows], dtype=np.float32), n_lists, iterations, seed)
+
+    assignment = np.empty(rows, dtype=np.int64)
+    for start in range(0, rows, _BUILD_BLOCK_ROWS):
+        assignment[start:start + _BUILD_BLOCK_ROWS] = _nearest(np.asarray(matrix[start:start + _BUILD_BLOCK_ROWS]), centroids)
+    order = np.argsort(assignment, kind="stable")
+    lists = np.zeros(n_lists + 1, dtype=np.int64)
+    lists[1:] = np.cumsum(np.bincount(assignment, minlength=n_lists))
+
+    temp = directory.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(temp, ignore_errors=True)
+    os.makedirs(temp)
+    path = lambda name: os.path.join(temp, name)
+    centroids.tofile(path("centroids.f32"))
+    lists.tofile(path("lists.i64"))
+    records, offsets = source._open_records()
+    # Offsets first: later writes only append, so they stay valid in the copy
+    np.asarray(offsets, dtype=np.int64)[order].tofile(path("offsets.i64"))
+    with records, open(path("records.jsonl"), "wb") as copy:
+        shutil.copyfileobj(records, copy)
+    with open(path("codes.i8"), "wb") as codes_file, open(path("scales.f32"), "wb") as scales_file:
+        for start in range(0, rows, _BUILD_BLOCK_ROWS):
+            block_rows = order[start:start + _BUILD_BLOCK_ROWS]
+            # Sorted reads keep the gather sequential on disk
+            sorted_rows = np.sort(block_rows)
+            block = np.asarray(matrix[sorted_rows])[np.searchsorted(sorted_rows, block_rows)]
+            codes, scales = quantize(block - centroids[assignment[block_rows]])
+            codes_file.write(codes.tobytes())
+            scales_file.write(scales.tobytes())
+    with open(path("ivf.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "dimensions": dimensions, "rows": rows, "lists": n_lists, "metric": source.metric, "generation": time.time_ns()
+        }, f)
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(temp, directory)
+    return {"rows": rows, "lists": n_lists, "dimensions": dimensions}
+
+
+class IVFIndex:
+    """Approximate top-k search over a memory-mapped IVF build"""
+
+    def __init__(self, directory: str, nprobe: int = 8):
+        self.directory = directory
+        self.nprobe = nprobe
+        try:
+            with open(self._path("ivf.json"), "r", encoding="utf-8") as f:
+                header = json.load(f)
+        except FileNotFoundError:
+            raise ValueError(f"No IVF index at {directory}; build it with `python -m core.ivf_index <collection>`")
+        self.dimensions = header["dimensions"]
+        self.count = header["rows"]
+        self.n_lists = header["lists"]
+        self.metric = header["metric"]
+        self.generation = header.get("generation", 0)
+        self.centroids = np.fromfile(self._path("centroids.f32"), dtype=np.float32).reshape(self.n_lists, self.dimensions)
+        self.lists = np.fromfile(self._path("lists.i64"), dtype=np.int64)
+        self.codes = np.memmap(self._path("codes.i8"), dtype=np.int8, mode="r", shape=(self.count, self.dimensions))
+        self.scales = np.memmap(self._path("scales.f32"), dtype=np.float32, mode="r", shape=(self.count,))
+        self.offsets = np.memmap(self._path("offsets.i64"), dtype=np.int64, mode="r", shape=(self.count,))
+        # Held open so this build's records stay readable after a rebuild replaces the directory
+        self._records = open(self._path("records.jsonl"), "rb")
+        self._records_lock = threading.Lock()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int = 4,
+        where: Optional[Dict] = None,
+        nprobe: Optional[int] = None
+    ) -> List[List[Hit]]:
+        """Approximate top-`k` (row, score) pairs per query from the `nprobe` nearest lists"""
+        if where:
+            raise ValueError("IVF indexes do not support metadata filters; use VectorIndexRetriever")
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if self.metric == "cosine":
+            norms = np.linalg.norm(queries, axis=1, keepdims=True)
+            queries = queries / np.where(norms > 0, norms, 1.0)
+        nprobe = max(1, min(nprobe or self.nprobe, self.n_lists))
+        centroid_scores = queries @ self.centroids.T
+        probes = np.argpartition(-centroid_scores, nprobe - 1, axis=1)[:, :nprobe]
+
+        results = []
+        for query, query_centroid_scores, lists in zip(queries, centroid_scores, probes):
+            lists = np.sort(lists)
+            sizes = self.lists[lists + 1] - self.lists[lists]
+            rows = np.concatenate([np.arange(self.lists[i], self.lists[i + 1]) for i in lists])
+            if not len(rows) or k <= 0:
+                results.append([])
+                continue
+            # q . v = q . centroid + q . residual
+            scores = (self.codes[rows].astype(np.float32) @ query) * self.scales[rows]
+            scores += np.repeat(query_centroid_scores[lists], sizes)
+            take = min(k, len(rows))
+            top = np.argpartition(-scores, take - 1)[:take]
+            top = top[np.argsort(-scores[top])]
+            results.append([(int(rows[i]), float(scores[i])) for i in top])
+        return results
+
+    def documents(self, hits: Sequence[Hit]) -> List[Document]:
+        documents = []
+        with self._records_lock:
+            lines = []
+            for row, _ in hits:
+                self._records.seek(int(self.offsets[row]))
+                lines.append(self._records.readline())
+        for line, (_, score) in zip(lines, hits):
+            record = json.loads(line)
+            documents.append(Document(
+                page_content=record["text"],
+                metadata={**(record.get("metadata") or {}), "score": score},
+                id=record["id"]
+            ))
+        return documents
+
+    def __len__(self) -> int:
+        return self.count
+
+
+def read_generation(directory: str) -> Optional[int]:
+    """The generation of the IVF build in `directory`, or None if there is none"""
+    try:
+        with open(os.path.join(directory, "ivf.json"), "r", encoding="utf-8") as f:
+            return json.load(f).get("generation", 0)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+class IVFRetriever(VectorIndexRetriever):
+    """
+    `VectorIndexRetriever` over an `IVFIndex`, probing `nprobe` lists per
+    query. With `follow_rebuilds`, each search uses the current build in the
+    index's directory, so a cached flow picks up rebuilds.
+    """
+
+    nprobe: int = 8
+    follow_rebuilds: bool = False
+
+    def search(self, queries: Sequence[str]) -> List[List[Document]]:
+        index = load_ivf_index(self.index.directory) if self.follow_rebuilds else self.index
+        hits = index.search(embed_queries(self.embeddings, queries), k=self.k, nprobe=self.nprobe)
+        return [index.documents(query_hits) for query_hits in hits]
+
+
+_indexes: Dict[str, IVFIndex] = {}
+_indexes_lock = threading.Lock()
+# Rebuilds are noticed within this many seconds
+_GENERATION_CHECK_SECONDS = 1.0
+_checked: Dict[str, float] = {}
+
+
+def ivf_directory(name: str, directory: Optional[str] = None) -> str:
+    """The IVF build of index `name`, stored next to its vectors"""
+    from core.config import get_settings
+
+    validate_index_name(name)
+    return os.path.abspath(os.path.join(directory or get_settings().VECTOR_INDEX_DIRECTORY, name, "ivf"))
+
+
+def get_ivf_index(name: str, directory: Optional[str] = None) -> IVFIndex:
+    """The process-wide IVF index of `name` (built offline beforehand), reloaded after a rebuild"""
+    return load_ivf_index(ivf_directory(name, directory))
+
+
+def load_ivf_index(path: str) -> IVFIndex:
+    """The process-wide IVF index in directory `path`, reloaded when its generation changes"""
+    path = os.path.abspath(path)
+    now = time.monotonic()
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is not None and now - _checked.get(path, 0.0) < _GENERATION_CHECK_SECONDS:
+            return index
+        _checked[path] = now
+    generation = read_generation(path)
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None or (generation is not None and generation != index.generation):
+            try:
+                index = _indexes[path] = IVFIndex(path)
+            except (ValueError, OSError):
+                # Caught mid-swap: keep serving the previous build until the next check
+                if index is None:
+                    raise
+        return index
+
+
+def main():
+    from core.vector_index import get_vector_index
+
+    parser = argparse.ArgumentParser(description="Build the IVF index of a vector index collection")
+    parser.add_argument("collection", help="Collection written by ChromaIngestion (backend=vector_index)")
+    parser.add_argument("--lists", type=int, default=None, help="Number of inverted lists (default: 4 * sqrt(rows))")
+    parser.add_argument("--directory", default=None, help="Vector index directory (default: VECTOR_INDEX_DIRECTORY)")
+    args = parser.parse_args()
+
+    source = get_vector_index(args.collection, args.directory)
+    summary = build_ivf_index(source, ivf_directory(args.collection, args.directory), n_lists=args.lists)
+    print(f"✅ Built IVF index for '{args.collection}': {summary['rows']} rows in {summary['lists']} lists")
+
+
+if __name__ == "__main__":
+    main()
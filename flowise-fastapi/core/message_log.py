@@ -0,0 +1,164 @@
+"""
+Compact per-session message log.
+
+Messages are slotted records in a bounded ring buffer with interned role
+strings, so memory per session is bounded by `capacity`. Once `chat_history`
+has been used, each append renders only the new message into a window of the
+last `history_window` lines, so preparing chain inputs does not depend on how
+long the conversation is.
+"""
+import sys
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+HUMAN = sys.intern("human")
+AI = sys.intern("ai")
+
+ROLE_LABELS = {HUMAN: "Human", AI: "AI"}
+
+# Rough per-record overhead used for memory estimates (CPython, 64-bit)
+_RECORD_OVERHEAD_BYTES = 72
+
+_getsizeof = sys.getsizeof
+
+
+class Message:
+    """A single chat message"""
+    __slots__ = ("role", "content", "timestamp")
+
+    def __init__(self, role: str, content: str, timestamp: float):
+        self.role = role
+        self.content = content
+        self.timestamp = timestamp
+
+    @property
+    def approx_bytes(self) -> int:
+        return _RECORD_OVERHEAD_BYTES + sys.getsizeof(self.content)
+
+    def render(self) -> str:
+        return f"{ROLE_LABELS.get(self.role) or self.role.title()}: {self.content}"
+
+
+class MessageLog:
+    """
+    Bounded ring buffer of messages. When full, appending overwrites the
+    oldest message. Iteration is oldest-first.
+    """
+    __slots__ = ("capacity", "history_window", "_buffer", "_start", "_lines", "_history", "_bytes", "trimmed")
+
+    def __init__(self, capacity: Optional[int] = 400, history_window: int = 20):
+        self.capacity = capacity
+        self.history_window = history_window
+        # Allocated on first append; most sessions never get a message
+        self._buffer: Optional[List[Message]] = None
+        self._start = 0
+        # Rendered lines of the history window, kept once chat_history is first used
+        self._lines: Optional[deque] = None
+        self._history: Optional[str] = ""
+        self._bytes = 0
+        self.trimmed = 0
+
+    @classmethod
+    def from_exchanges(cls, exchanges: Iterable[Dict[str, Any]], **kwargs) -> "MessageLog":
+        """Build a log from `{"human", "ai", "timestamp"}` dicts"""
+        log = cls(**kwargs)
+        for exchange in exchanges:
+            timestamp = exchange.get("timestamp")
+            if isinstance(timestamp, str):
+                timestamp = datetime.fromisoformat(timestamp).timestamp()
+            elif isinstance(timestamp, datetime):
+                timestamp = timestamp.timestamp()
+            log.add_exchange(exchange.get("human", ""), exchange.get("ai", ""), timestamp)
+        return log
+
+    # --- writing -------------------------------------------------------------
+
+    def append(self, role: str, content: str, timestamp: Optional[float] = None) -> int:
+        """Append a message; returns the change in approximate bytes"""
+        return self._push(Message(sys.intern(role), content, timestamp if timestamp is not None else time.time()))
+
+    def add_exchange(self, human: str, ai: str, timestamp: Optional[float] = None) -> int:
+        """Append a human message and the AI response; returns the change in approximate bytes"""
+        if timestamp is None:
+            timestamp = time.time()
+        return self._push(Message(HUMAN, human, timestamp)) + self._push(Message(AI, ai, timestamp))
+
+    def _push(self, message: Message) -> int:
+        buffer = self._buffer
+        if buffer is None:
+            buffer = self._buffer = []
+        delta = _RECORD_OVERHEAD_BYTES + _getsizeof(message.content)
+        capacity = self.capacity
+        if capacity is not None and len(buffer) >= capacity:
+            if capacity <= 0:
+                return 0
+            start = self._start
+            delta -= _RECORD_OVERHEAD_BYTES + _getsizeof(buffer[start].content)
+            buffer[start] = message
+            self._start = (start + 1) % capacity
+            self.trimmed += 1
+        else:
+            buffer.append(message)
+        self._bytes += delta
+        if self._lines is not None:
+            self._lines.append(message.render())
+        self._history = None
+        return delta
+
+    def clear(self):
+        self._buffer = None
+        self._lines = None
+        self._start = 0
+        self._history = ""
+        self._bytes = 0
+
+    # --- reading -------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._buffer) if self._buffer else 0
+
+    def __iter__(self) -> Iterator[Message]:
+        buffer = self._buffer or []
+        for i in range(len(buffer)):
+            yield buffer[(self._start + i) % len(buffer)]
+
+    def last(self, count: int) -> List[Message]:
+        """The newest `count` messages, oldest first"""
+        buffer = self._buffer or []
+        size = len(buffer)
+        count = min(count, size)
+        return [buffer[(self._start + i) % size] for i in range(size - count, size)]
+
+    @property
+    def chat_history(self) -> str:
+        """`Human: ...`/`AI: ...` lines for the last `history_window` messages"""
+        if self._history is None:
+            if self._lines is None:
+                self._lines = deque(
+                    (message.render() for message in self.last(self.history_window)),
+                    maxlen=self.history_window
+                )
+            self._history = "\n".join(self._lines)
+        return self._history
+
+    @property
+    def exchange_count(self) -> int:
+        return sum(1 for message in self if message.role == HUMAN)
+
+    @property
+    def approx_bytes(self) -> int:
+        return self._bytes
+
+    def exchanges(self, last: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Messages grouped into `{"timestamp", "human", "ai"}` dicts (the API/storage shape)"""
+        grouped: List[Dict[str, Any]] = []
+        for message in self:
+            if message.role == HUMAN or not grouped or "ai" in grouped[-1]:
+                grouped.append({"timestamp": datetime.fromtimestamp(message.timestamp)})
+            key = "human" if message.role == HUMAN else ("ai" if message.role == AI else message.role)
+            grouped[-1][key] = message.content
+        if last is not None:
+            grouped = grouped[-last:] if last > 0 else []
+        return grouped
@@ -0,0 +1,230 @@
+"""
+Content-hash cache of parsed documents.
+
+Loader output is stored under a key made of the source's content hash (file
+bytes or a fetched body), the loader name and its parameters, so re-uploading
+the same PDF or re-running the same loader skips parsing. Each entry is one
+file of length-prefixed, zlib-compressed records followed by an offset index:
+
+    record*  (u32 length + zlib(JSON [page_content, metadata]))
+    index    (u64 offset per record)
+    footer   (u64 index offset, u32 record count, b"FPC1")
+
+Entries are memory-mapped on read and decoded one document at a time. They
+are written while the wrapped loader streams, and only kept when the loader
+ran to completion. The least recently used entries are evicted past a size cap.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+
+MAGIC = b"FPC1"
+_LENGTH = struct.Struct("<I")
+_OFFSET = struct.Struct("<Q")
+_FOOTER = struct.Struct("<QI4s")
+
+
+def _hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """Size-capped store of parsed documents keyed by content hash and loader parameters"""
+
+    def __init__(self, directory: str, max_bytes: int = 1_000_000_000, compression_level: int = 3):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+        # (path, size, mtime) -> content hash, so unchanged files are hashed once
+        self._file_hashes: Dict[Tuple[str, int, float], str] = {}
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "documents_served": 0}
+        os.makedirs(directory, exist_ok=True)
+        found = []
+        for entry in os.scandir(directory):
+            if entry.name.endswith(".docs"):
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name[:-5], stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total += size
+
+    # --- keys --------------------------------------------------------------
+
+    @staticmethod
+    def _key(content_hash: str, loader: str, params: Optional[Dict[str, Any]]) -> str:
+        material = json.dumps([content_hash, loader, params or {}], sort_keys=True, default=str)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def key_for_file(self, path: str, loader: str, params: Optional[Dict[str, Any]] = None) -> str:
+        stat = os.stat(path)
+        identity = (os.path.abspath(path), stat.st_size, stat.st_mtime)
+        content_hash = self._file_hashes.get(identity)
+        if content_hash is None:
+            content_hash = self._file_hashes[identity] = _hash_file(path)
+        return self._key(content_hash, loader, params)
+
+    def key_for_bytes(self, content: bytes, loader: str, params: Optional[Dict[str, Any]] = None) -> str:
+        return self._key(hashlib.sha256(content).hexdigest(), loader, params)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.docs")
+
+    # --- reads -------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[Iterator[Document]]:
+        """Lazily decoded documents of an entry, or None on a miss"""
+        try:
+            handle = open(self._path(key), "rb")
+        except OSError:
+            self._miss()
+            return None
+        try:
+            view = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            index_offset, count, magic = _FOOTER.unpack_from(view, len(view) - _FOOTER.size)
+            if magic != MAGIC:
+                raise ValueError("bad magic")
+        except (ValueError, struct.error, OSError):
+            handle.close()
+            self.discard(key)
+            self._miss()
+            return None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+        return self._iter_records(handle, view, index_offset, count)
+
+    def _iter_records(self, handle, view: mmap.mmap, index_offset: int, count: int) -> Iterator[Document]:
+        try:
+            for i in range(count):
+                offset, = _OFFSET.unpack_from(view, index_offset + i * _OFFSET.size)
+                length, = _LENGTH.unpack_from(view, offset)
+                start = offset + _LENGTH.size
+                page_content, metadata = json.loads(zlib.decompress(view[start:start + length]))
+                self.stats["documents_served"] += 1
+                yield Document(page_content=page_content, metadata=metadata)
+        finally:
+            view.close()
+            handle.close()
+
+    def _miss(self):
+        with self._lock:
+            self.stats["misses"] += 1
+
+    # --- writes ------------------------------------------------------------
+
+    def write_through(self, key: str, documents: Iterable[Document]) -> Iterator[Document]:
+        """Yield `documents` while recording them; the entry is kept only if iteration completes"""
+        path = self._path(key)
+        temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        offsets = []
+        completed = False
+        with open(temp, "wb") as out:
+            try:
+                for document in documents:
+                    record = zlib.compress(
+                        json.dumps([document.page_content, document.metadata], default=str).encode("utf-8"),
+                        self.compression_level
+                    )
+                    offsets.append(out.tell())
+                    out.write(_LENGTH.pack(len(record)))
+                    out.write(record)
+                    yield document
+                index_offset = out.tell()
+                out.write(b"".join(_OFFSET.pack(offset) for offset in offsets))
+                out.write(_FOOTER.pack(index_offset, len(offsets), MAGIC))
+                completed = True
+            finally:
+                if not completed:
+                    out.close()
+                    os.remove(temp)
+        size = os.path.getsize(temp)
+        if size > self.max_bytes:
+            os.remove(temp)
+            return
+        os.replace(temp, path)
+        with self._lock:
+            self._total += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self.stats["stores"] += 1
+            self._evict()
+
+    def put(self, key: str, documents: Iterable[Document]):
+        for _ in self.write_through(key, documents):
+            pass
+
+    def discard(self, key: str):
+        with self._lock:
+            self._total -= self._entries.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        while self._total > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total -= size
+            self.stats["evictions"] += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def summary(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries), "bytes": self._total}
+
+
+class CachedLoader(BaseLoader):
+    """
+    Serve a loader's documents from the parse cache, filling it on a miss.
+    `metadata` overrides per-request fields (e.g. `source`) on every document, whether
+    parsed now or served from the cache.
+    """
+
+    def __init__(self, loader: BaseLoader, cache: ParseCache, key: str, metadata: Optional[Dict[str, Any]] = None):
+        self.loader = loader
+        self.cache = cache
+        self.key = key
+        self.metadata = metadata or {}
+
+    def lazy_load(self) -> Iterator[Document]:
+        documents = self.cache.get(self.key)
+        if documents is None:
+            documents = self.cache.write_through(self.key, self.loader.lazy_load())
+        for document in documents:
+            document.metadata.update(self.metadata)
+            yield document
+
+
+@lru_cache()
+def get_parse_cache() -> Optional[ParseCache]:
+    """Process-wide parse cache configured from settings (None when disabled)"""
+    from core.config import get_settings
+
+    settings = get_settings()
+    if settings.PARSE_CACHE_MAX_BYTES <= 0:
+        return None
+    return ParseCache(settings.PARSE_CACHE_DIRECTORY, max_bytes=settings.PARSE_CACHE_MAX_BYTES)
@@ -0,0 +1,227 @@
+"""
+Lazy, page-parallel PDF loading.
+
+`LazyPdfLoader` yields one Document per page as soon as it is extracted, so
+a consumer that only needs the first pages stops the work early, and memory
+does not grow with the page count:
+
+- the file is read through an open handle (pypdf buffers the whole file when
+  handed a path) and objects parsed for finished pages are dropped from the
+  reader's cache every batch;
+- large selections are extracted in batches across worker processes, each
+  keeping its own reader per file, with a bounded number of batches in flight
+  and results yielded in page order.
+"""
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+
+# (page index, page label, text)
+PageText = Tuple[int, str, str]
+
+
+def parse_page_ranges(spec: Optional[str], page_count: int) -> List[int]:
+    """Zero-based page indices for a 1-based spec like "1-3, 7, 10-" (empty: every page)"""
+    if spec is None or not str(spec).strip():
+        return list(range(page_count))
+    selected = set()
+    for part in str(spec).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if "-" in part:
+                start, end = part.split("-", 1)
+                first = int(start) if start.strip() else 1
+                last = int(end) if end.strip() else page_count
+            else:
+                first = last = int(part)
+        except ValueError:
+            raise ValueError(f"Invalid page range '{part}'")
+        if first < 1 or last < first:
+            raise ValueError(f"Invalid page range '{part}'")
+        selected.update(range(first - 1, min(last, page_count)))
+    return sorted(selected)
+
+
+class _PdfReader:
+    """A pypdf reader over an open file handle that can shed parsed objects"""
+
+    def __init__(self, path: str, password: Optional[str] = None):
+        from pypdf import PdfReader
+
+        self.path = path
+        self._handle = open(path, "rb")
+        try:
+            self.reader = PdfReader(self._handle, password=password)
+            self.page_count = len(self.reader.pages)
+        except Exception:
+            self._handle.close()
+            raise
+        self._has_labels = "/PageLabels" in self.reader.trailer["/Root"]
+        self._labels: Optional[List[str]] = None
+        self._baseline = set(self.reader.resolved_objects)
+
+    def label(self, index: int) -> str:
+        if not self._has_labels:
+            return str(index + 1)
+        if self._labels is None:
+            # pypdf recomputes every label on each access; do it once
+            self._labels = self.reader.page_labels
+        return self._labels[index]
+
+    def metadata(self) -> Dict[str, Any]:
+        metadata = {}
+        for key, value in (self.reader.metadata or {}).items():
+            if isinstance(value, (str, int, float)):
+                metadata[key.lstrip("/").lower()] = str(value)
+        metadata["source"] = self.path
+        metadata["total_pages"] = self.page_count
+        return metadata
+
+    def extract(self, indices: Sequence[int], extraction_mode: str = "plain") -> List[PageText]:
+        pages = []
+        for index in indices:
+            text = self.reader.pages[index].extract_text(extraction_mode=extraction_mode)
+            pages.append((index, self.label(index), text.strip()))
+        self.forget()
+        return pages
+
+    def forget(self):
+        """Drop objects parsed since the reader was opened"""
+        resolved = self.reader.resolved_objects
+        for key in [key for key in resolved if key not in self._baseline]:
+            del resolved[key]
+
+    def close(self):
+        self._handle.close()
+
+
+# One open reader per worker process, reused by every batch of the same file
+_worker_reader: Optional[_PdfReader] = None
+
+
+def _extract_batch(path: str, mtime: float, password: Optional[str], indices: List[int], extraction_mode: str) -> List[PageText]:
+    global _worker_reader
+    key = (path, mtime)
+    if _worker_reader is None or getattr(_worker_reader, "key", None) != key:
+        if _worker_reader is not None:
+            _worker_reader.close()
+        _worker_reader = _PdfReader(path, password)
+        _worker_reader.key = key
+    return _worker_reader.extract(indices, extraction_mode)
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def pdf_worker_count() -> int:
+    from core.config import get_settings
+
+    return get_settings().PDF_WORKERS or min(4, os.cpu_count() or 1)
+
+
+def get_pdf_executor() -> ProcessPoolExecutor:
+    """Process pool shared by all PDF loads (spawned workers: safe next to threads)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=pdf_worker_count(), mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def shutdown_pdf_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+class LazyPdfLoader(BaseLoader):
+    """
+    Load a PDF page by page. `pages` selects 1-based ranges ("1-5,9"),
+    `max_pages` stops after that many pages, and selections of at least
+    `parallel_threshold` pages are extracted across worker processes.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        pages: Optional[str] = None,
+        max_pages: Optional[int] = None,
+        parallel: bool = True,
+        parallel_threshold: int = 64,
+        batch_size: int = 16,
+        extraction_mode: str = "plain",
+        password: Optional[str] = None,
+        executor: Optional[ProcessPoolExecutor] = None
+    ):
+        if not os.path.isfile(file_path):
+            raise ValueError(f"PDF file not found: {file_path}")
+        self.file_path = file_path
+        self.pages = pages
+        self.max_pages = max_pages
+        self.parallel = parallel
+        self.parallel_threshold = parallel_threshold
+        self.batch_size = max(1, batch_size)
+        self.extraction_mode = extraction_mode
+        self.password = password
+        self.executor = executor
+
+    def lazy_load(self) -> Iterator[Document]:
+        reader = _PdfReader(self.file_path, self.password)
+        try:
+            metadata = reader.metadata()
+            indices = parse_page_ranges(self.pages, reader.page_count)
+            if self.max_pages:
+                indices = indices[:self.max_pages]
+            batches = [indices[i:i + self.batch_size] for i in range(0, len(indices), self.batch_size)]
+            # A single worker process would only add IPC on top of sequential extraction
+            workers = self.executor._max_workers if self.executor else pdf_worker_count()
+            if self.parallel and workers > 1 and len(indices) >= self.parallel_threshold:
+                reader.close()
+                results = self._extract_parallel(batches)
+            else:
+                results = (reader.extract(batch, self.extraction_mode) for batch in batches)
+            for batch in results:
+                for index, label, text in batch:
+                    yield Document(page_content=text, metadata={**metadata, "page": index, "page_label": label})
+        finally:
+            reader.close()
+
+    def _extract_parallel(self, batches: List[List[int]]) -> Iterator[List[PageText]]:
+        executor = self.executor or get_pdf_executor()
+        mtime = os.path.getmtime(self.file_path)
+        # Keep every worker busy without queueing the whole file
+        in_flight = 2 * executor._max_workers
+        pending: "deque[Future]" = deque()
+        remaining = iter(batches)
+
+        def submit(batch: List[int]):
+            pending.append(executor.submit(
+                _extract_batch, self.file_path, mtime, self.password, batch, self.extraction_mode
+            ))
+
+        try:
+            for batch in remaining:
+                submit(batch)
+                if len(pending) >= in_flight:
+                    break
+            while pending:
+                result = pending.popleft().result()
+                batch = next(remaining, None)
+                if batch is not None:
+                    submit(batch)
+                yield result
+        finally:
+            # The consumer stopped early: drop batches that have not started
+            for future in pending:
+                future.cancel()
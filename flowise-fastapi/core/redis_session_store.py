@@ -0,0 +1,225 @@
+"""
+Redis-backed session store, so sessions are shared between uvicorn workers and pods.
+
+Each session is a hash (`<prefix><id>`) holding JSON-encoded fields plus a list
+(`<prefix><id>:messages`) of JSON messages. The session's idle TTL is kept in
+the hash and every access re-arms both keys with it; idle expiry is left to
+Redis key TTLs. Writes WATCH the hash, read the TTL and check the session
+still exists, then run in MULTI/EXEC, so a write racing with expiry or
+deletion never recreates a half session. Reads take two round trips: one
+pipelined read of the hash and messages, then the EXPIREs, which need the
+TTL stored in the hash.
+"""
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import uuid
+
+from core.message_log import MessageLog
+from core.session_store import SessionStore
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+# Hash field holding the session's idle TTL (not part of the session dict)
+_TTL_FIELD = "_ttl"
+
+
+class RedisSessionStore(SessionStore):
+    """Session store keeping all state in Redis with server-side idle expiry"""
+    needs_sweeping = False
+
+    def __init__(
+        self,
+        client: Any,
+        ttl_seconds: Optional[float] = 86_400,
+        max_messages: Optional[int] = 200,
+        key_prefix: str = "flowise:session:"
+    ):
+        # `client` must be created with decode_responses=True
+        self.client = client
+        self.ttl_seconds = int(ttl_seconds) if ttl_seconds else None
+        self.max_messages = max_messages
+        self.key_prefix = key_prefix
+        self._stats = {"created": 0, "deleted": 0, "messages_appended": 0, "round_trips": 0}
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisSessionStore":
+        if redis is None:
+            raise ImportError("The 'redis' package is required for the Redis session store. Install it with: pip install redis")
+        return cls(redis.Redis.from_url(url, decode_responses=True), **kwargs)
+
+    # --- keys and encoding ---------------------------------------------------
+
+    def _meta_key(self, session_id: str) -> str:
+        return f"{self.key_prefix}{session_id}"
+
+    def _messages_key(self, session_id: str) -> str:
+        return f"{self.key_prefix}{session_id}:messages"
+
+    @staticmethod
+    def _encode(value: Any) -> str:
+        if isinstance(value, datetime):
+            return json.dumps(value.isoformat())
+        return json.dumps(value, default=str)
+
+    def _decode_session(self, meta: Dict[str, str], raw_messages: List[str]) -> Optional[Dict[str, Any]]:
+        if "id" not in meta:
+            # Missing, expired, or only touched by a write racing with expiry
+            return None
+        session = {field: json.loads(value) for field, value in meta.items() if field != _TTL_FIELD}
+        session["created_at"] = datetime.fromisoformat(session["created_at"])
+        session["messages"] = MessageLog.from_exchanges(
+            (json.loads(raw) for raw in raw_messages),
+            capacity=2 * self.max_messages if self.max_messages else None
+        )
+        session.setdefault("context", {})
+        return session
+
+    def _session_ttl(self, raw: Optional[str]) -> Optional[int]:
+        # Sessions written before the TTL was stored fall back to the default
+        return json.loads(raw) if raw is not None else self.ttl_seconds
+
+    def _refresh(self, pipe, session_id: str, ttl: Optional[int]):
+        if ttl:
+            pipe.expire(self._meta_key(session_id), ttl)
+            pipe.expire(self._messages_key(session_id), ttl)
+
+    def _write(self, session_id: str, write: Callable[[Any], None]) -> bool:
+        """Run `write` in MULTI/EXEC if the session exists, re-arming its TTL; False if it does not"""
+        meta_key = self._meta_key(session_id)
+
+        def transaction(pipe) -> bool:
+            # Immediate mode while watching: the MULTI only runs if the hash is unchanged meanwhile
+            session_id_field, raw_ttl = pipe.hmget(meta_key, ["id", _TTL_FIELD])
+            if session_id_field is None:
+                return False
+            pipe.multi()
+            write(pipe)
+            self._refresh(pipe, session_id, self._session_ttl(raw_ttl))
+            return True
+
+        self._stats["round_trips"] += 2
+        return self.client.transaction(transaction, meta_key, value_from_callable=True)
+
+    def _execute(self, pipe) -> List[Any]:
+        self._stats["round_trips"] += 1
+        return pipe.execute()
+
+    # --- session API ---------------------------------------------------------
+
+    def create_session(self, session_id: Optional[str] = None, ttl_seconds: Optional[float] = None) -> str:
+        if not session_id:
+            session_id = str(uuid.uuid4())
+
+        meta = {
+            "id": session_id,
+            "created_at": datetime.now(),
+            "context": {},
+            "last_workflow": None
+        }
+        ttl = int(ttl_seconds) if ttl_seconds else self.ttl_seconds
+        meta[_TTL_FIELD] = ttl
+        pipe = self.client.pipeline(transaction=True)
+        pipe.delete(self._meta_key(session_id), self._messages_key(session_id))
+        pipe.hset(self._meta_key(session_id), mapping={k: self._encode(v) for k, v in meta.items()})
+        if ttl:
+            pipe.expire(self._meta_key(session_id), ttl)
+        self._execute(pipe)
+        self._stats["created"] += 1
+        return session_id
+
+    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hgetall(self._meta_key(session_id))
+        if self.max_messages:
+            pipe.lrange(self._messages_key(session_id), -self.max_messages, -1)
+        else:
+            pipe.lrange(self._messages_key(session_id), 0, -1)
+        results = self._execute(pipe)
+        session = self._decode_session(results[0], results[1])
+        ttl = self._session_ttl(results[0].get(_TTL_FIELD))
+        if session is not None and ttl:
+            pipe = self.client.pipeline(transaction=False)
+            self._refresh(pipe, session_id, ttl)
+            self._execute(pipe)
+        return session
+
+    def update_session(self, session_id: str, data: Dict[str, Any]):
+        mapping = {k: self._encode(v) for k, v in data.items() if k not in ("messages", _TTL_FIELD)}
+        if not mapping:
+            return
+        self._write(session_id, lambda pipe: pipe.hset(self._meta_key(session_id), mapping=mapping))
+
+    def add_message(self, session_id: str, message: str, response: str):
+        record = json.dumps({
+            "timestamp": datetime.now().isoformat(),
+            "human": message,
+            "ai": response
+        })
+        key = self._messages_key(session_id)
+
+        def append(pipe):
+            pipe.rpush(key, record)
+            if self.max_messages:
+                pipe.ltrim(key, -self.max_messages, -1)
+
+        if self._write(session_id, append):
+            self._stats["messages_appended"] += 1
+
+    def delete_session(self, session_id: str) -> bool:
+        pipe = self.client.pipeline(transaction=True)
+        pipe.delete(self._meta_key(session_id), self._messages_key(session_id))
+        deleted = self._execute(pipe)[0]
+        if deleted:
+            self._stats["deleted"] += 1
+        return bool(deleted)
+
+    def _session_ids(self) -> Iterator[str]:
+        prefix_length = len(self.key_prefix)
+        for key in self.client.scan_iter(match=f"{self.key_prefix}*", count=500):
+            if not key.endswith(":messages"):
+                yield key[prefix_length:]
+
+    def iter_sessions(self, batch_size: int = 100) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Scan all sessions (O(n), intended for debugging) without refreshing their TTL"""
+        batch: List[str] = []
+
+        def fetch(session_ids: List[str]):
+            pipe = self.client.pipeline(transaction=False)
+            for sid in session_ids:
+                pipe.hgetall(self._meta_key(sid))
+                pipe.lrange(self._messages_key(sid), 0, -1)
+            results = self._execute(pipe)
+            for i, sid in enumerate(session_ids):
+                session = self._decode_session(results[2 * i], results[2 * i + 1])
+                if session is not None:
+                    yield sid, session
+
+        for session_id in self._session_ids():
+            batch.append(session_id)
+            if len(batch) >= batch_size:
+                yield from fetch(batch)
+                batch = []
+        if batch:
+            yield from fetch(batch)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._session_ids())
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            "backend": "redis",
+            "ttl_seconds": self.ttl_seconds,
+            "max_messages": self.max_messages,
+            **self._stats,
+        }
+        try:
+            memory = self.client.info("memory")
+            stats["used_memory_bytes"] = memory.get("used_memory")
+        except Exception as e:
+            stats["used_memory_bytes"] = None
+            stats["info_error"] = str(e)
+        return stats
@@ -0,0 +1,78 @@
+"""
+Conversation memory bound to the session store.
+
+`SessionBufferMemory` holds no history itself: the session is resolved from
+the chain input (`session_id`) on every call, the last `k` exchanges are read
+from the session's message log and new exchanges are appended to the store.
+One instance can therefore be shared by every request that runs a cached flow.
+"""
+from typing import Any, Dict, List, Optional
+
+from langchain.memory.chat_memory import BaseChatMemory
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, get_buffer_string
+
+from core.message_log import AI, HUMAN, MessageLog
+
+SESSION_ID_KEY = "session_id"
+
+
+class SessionBufferMemory(BaseChatMemory):
+    """Window memory over the last `k` exchanges of the current session"""
+    k: int = 5
+    memory_key: str = "chat_history"
+    human_prefix: str = "Human"
+    ai_prefix: str = "AI"
+    return_messages: bool = True
+    input_key: Optional[str] = "input"
+    session_key: str = SESSION_ID_KEY
+    # Defaults to the process-wide store; set explicitly in tests
+    store: Optional[Any] = None
+
+    @property
+    def memory_variables(self) -> List[str]:
+        return [self.memory_key]
+
+    def _get_store(self):
+        if self.store is None:
+            from core.session_store import get_session_store
+
+            self.store = get_session_store()
+        return self.store
+
+    def _message_log(self, inputs: Dict[str, Any]) -> Optional[MessageLog]:
+        session_id = inputs.get(self.session_key)
+        if not session_id:
+            return None
+        session = self._get_store().get_session(session_id)
+        return session["messages"] if session else None
+
+    def load_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        log = self._message_log(inputs)
+        messages: List[BaseMessage] = []
+        if log is not None and self.k > 0:
+            for message in log.last(2 * self.k):
+                if message.role == HUMAN:
+                    messages.append(HumanMessage(content=message.content))
+                elif message.role == AI:
+                    messages.append(AIMessage(content=message.content))
+        if self.return_messages:
+            return {self.memory_key: messages}
+        return {self.memory_key: get_buffer_string(messages, human_prefix=self.human_prefix, ai_prefix=self.ai_prefix)}
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        session_id = inputs.get(self.session_key)
+        if not session_id:
+            return
+        input_str, output_str = self._get_input_output(inputs, outputs)
+        self._get_store().add_message(session_id, input_str, output_str)
+
+    async def asave_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        # BaseChatMemory writes to `chat_memory` directly here; store appends are cheap and synchronous
+        self.save_context(inputs, outputs)
+
+    def clear(self) -> None:
+        # History belongs to the session store; delete the session to clear it
+        pass
+
+    async def aclear(self) -> None:
+        pass
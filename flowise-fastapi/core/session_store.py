@@ -0,0 +1,379 @@
+"""
+Session storage.
+
+`SessionStore` is the interface used by the API; `InMemorySessionStore` is the
+default single-process backend, `SqliteSessionStore` (core.sqlite_session_store)
+persists it across restarts and `RedisSessionStore` (core.redis_session_store)
+shares sessions across workers. `get_session_store()` picks the backend from
+settings.
+
+The in-memory store keeps sessions in LRU order capped at `max_sessions`; idle
+sessions expire after `ttl_seconds` via a min-heap of deadlines, and each
+session keeps at most `max_messages` exchanges in a `MessageLog`. `sweep()` only touches expired
+heap entries, so it is cheap enough to run periodically from a background task.
+"""
+import asyncio
+import heapq
+from abc import ABC, abstractmethod
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import uuid
+
+from core.message_log import MessageLog
+
+# Rough per-session overhead used for the memory estimate (CPython, 64-bit)
+_SESSION_OVERHEAD_BYTES = 1200
+
+
+# Sizes that getsizeof would report, looked up by type (ASCII text for strings)
+_STR_BYTES = sys.getsizeof("")
+_FIXED_BYTES = {type(None): sys.getsizeof(None), bool: sys.getsizeof(True), int: sys.getsizeof(1), float: sys.getsizeof(1.0)}
+
+
+def _field_bytes(value: Any) -> int:
+    """Rough deep size of a session field; message logs track their own size"""
+    kind = type(value)
+    if kind is str:
+        return _STR_BYTES + len(value)
+    fixed = _FIXED_BYTES.get(kind)
+    if fixed is not None:
+        return fixed
+    if kind is dict:
+        return sys.getsizeof(value) + sum(_field_bytes(key) + _field_bytes(item) for key, item in value.items())
+    if kind is list or kind is tuple:
+        return sys.getsizeof(value) + sum(_field_bytes(item) for item in value)
+    if kind is MessageLog:
+        return value.approx_bytes
+    return sys.getsizeof(value)
+
+
+# Fields of a new session other than its id: created_at, an empty log, {} and None
+_NEW_SESSION_FIELDS_BYTES = _STR_BYTES + _field_bytes(datetime.now()) + _field_bytes({}) + _FIXED_BYTES[type(None)]
+
+
+SESSION_BACKENDS = ("memory", "redis", "sqlite")
+
+
+class SessionStore(ABC):
+    """Interface shared by all session backends"""
+    # Whether expiry relies on `sweep()` being called (False for server-side expiry)
+    needs_sweeping: bool = True
+
+    @abstractmethod
+    def create_session(self, session_id: Optional[str] = None, ttl_seconds: Optional[float] = None) -> str:
+        pass
+
+    @abstractmethod
+    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return the session (refreshing its idle timeout) or None"""
+        pass
+
+    @abstractmethod
+    def update_session(self, session_id: str, data: Dict[str, Any]):
+        pass
+
+    @abstractmethod
+    def add_message(self, session_id: str, message: str, response: str):
+        """Append one human/AI exchange, keeping at most `max_messages` exchanges"""
+        pass
+
+    @abstractmethod
+    def delete_session(self, session_id: str) -> bool:
+        pass
+
+    @abstractmethod
+    def iter_sessions(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    def sweep(self) -> int:
+        """Expire idle sessions; returns how many expired"""
+        return 0
+
+    def close(self):
+        """Release resources and persist pending writes"""
+        pass
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        pass
+
+
+class _Entry:
+    """A stored session plus the bookkeeping needed for LRU/TTL eviction"""
+    __slots__ = ("session", "last_access", "ttl", "size")
+
+    def __init__(self, session: Dict[str, Any], last_access: float, ttl: float):
+        self.session = session
+        self.last_access = last_access
+        self.ttl = ttl
+        self.size = _SESSION_OVERHEAD_BYTES
+
+    @property
+    def deadline(self) -> float:
+        return self.last_access + self.ttl
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Session store with a max-sessions bound (LRU eviction), idle-TTL expiry
+    and per-session message caps. Safe to use from the event loop and from
+    threadpool background tasks.
+    """
+
+    def __init__(
+        self,
+        max_sessions: Optional[int] = 100_000,
+        ttl_seconds: Optional[float] = 86_400,
+        max_messages: Optional[int] = 200,
+        clock=time.monotonic
+    ):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+        self._clock = clock
+        self._sessions: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+        self._approx_bytes = 0
+        self._stats = {
+            "created": 0,
+            "evicted_lru": 0,
+            "expired_ttl": 0,
+            "deleted": 0,
+            "messages_trimmed": 0,
+            "sweeps": 0,
+            "last_sweep_seconds": 0.0,
+        }
+
+    # --- session API -------------------------------------------------------
+
+    def create_session(self, session_id: Optional[str] = None, ttl_seconds: Optional[float] = None) -> str:
+        if not session_id:
+            session_id = str(uuid.uuid4())
+
+        session = {
+            "id": session_id,
+            "created_at": datetime.now(),
+            "messages": self._new_log(),
+            "context": {},
+            "last_workflow": None
+        }
+        # Every field but the id has a fixed size in a new session
+        self._insert(session_id, session, ttl_seconds, fields_bytes=_NEW_SESSION_FIELDS_BYTES + len(session_id))
+        with self._lock:
+            self._stats["created"] += 1
+        return session_id
+
+    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._touch(session_id)
+            return entry.session if entry else None
+
+    def update_session(self, session_id: str, data: Dict[str, Any]):
+        with self._lock:
+            entry = self._touch(session_id)
+            if not entry:
+                return
+            session = entry.session
+            size = 0
+            for key, value in data.items():
+                size += _field_bytes(value)
+                if key in session:
+                    size -= _field_bytes(session[key])
+            session.update(data)
+            entry.size += size
+            self._approx_bytes += size
+
+    def add_message(self, session_id: str, message: str, response: str):
+        with self._lock:
+            entry = self._touch(session_id)
+            if not entry:
+                return
+            log: MessageLog = entry.session["messages"]
+            trimmed = log.trimmed
+            size = log.add_exchange(message, response)
+            self._stats["messages_trimmed"] += (log.trimmed - trimmed) // 2
+            entry.size += size
+            self._approx_bytes += size
+
+    def delete_session(self, session_id: str) -> bool:
+        with self._lock:
+            if session_id not in self._sessions:
+                return False
+            self._remove(session_id)
+            self._stats["deleted"] += 1
+            return True
+
+    def iter_sessions(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Snapshot of (session_id, session) pairs without refreshing their LRU position"""
+        with self._lock:
+            items = [(sid, entry.session) for sid, entry in self._sessions.items()]
+        return iter(items)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def _insert(
+        self,
+        session_id: str,
+        session: Dict[str, Any],
+        ttl_seconds: Optional[float] = None,
+        fields_bytes: Optional[int] = None
+    ):
+        """Cache a session dict, replacing any existing entry and evicting LRU overflow"""
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        if fields_bytes is None:
+            fields_bytes = sum(_field_bytes(value) for value in session.values())
+        with self._lock:
+            if session_id in self._sessions:
+                self._remove(session_id)
+            entry = _Entry(session, self._clock(), ttl if ttl is not None else float("inf"))
+            entry.size += fields_bytes
+            self._sessions[session_id] = entry
+            self._approx_bytes += entry.size
+            if ttl is not None:
+                heapq.heappush(self._expiry_heap, (entry.deadline, session_id))
+            self._evict_overflow()
+
+    def _new_log(self) -> MessageLog:
+        return MessageLog(capacity=2 * self.max_messages if self.max_messages is not None else None)
+
+    # --- eviction ----------------------------------------------------------
+
+    def _touch(self, session_id: str) -> Optional[_Entry]:
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        now = self._clock()
+        if entry.deadline <= now:
+            # Expired but not swept yet
+            self._remove(session_id)
+            self._stats["expired_ttl"] += 1
+            return None
+        # The heap entry is left as is; sweep() reschedules it lazily
+        entry.last_access = now
+        self._sessions.move_to_end(session_id)
+        return entry
+
+    def _remove(self, session_id: str):
+        entry = self._sessions.pop(session_id)
+        self._approx_bytes -= entry.size
+
+    def _evict_overflow(self):
+        if self.max_sessions is None:
+            return
+        while len(self._sessions) > self.max_sessions:
+            session_id = next(iter(self._sessions))
+            self._remove(session_id)
+            self._stats["evicted_lru"] += 1
+
+    def sweep(self) -> int:
+        """Remove idle sessions whose TTL has passed; returns how many expired"""
+        started = time.perf_counter()
+        expired = 0
+        with self._lock:
+            now = self._clock()
+            heap = self._expiry_heap
+            while heap and heap[0][0] <= now:
+                _, session_id = heapq.heappop(heap)
+                entry = self._sessions.get(session_id)
+                if entry is None:
+                    continue  # already evicted or deleted
+                if entry.deadline > now:
+                    # Accessed since it was scheduled: push the real deadline back
+                    heapq.heappush(heap, (entry.deadline, session_id))
+                    continue
+                self._remove(session_id)
+                expired += 1
+
+            # Entries of evicted/deleted sessions linger until their deadline;
+            # rebuild the heap if they start to dominate it.
+            if len(heap) > 2 * len(self._sessions) + 1024:
+                self._expiry_heap = [
+                    (entry.deadline, sid) for sid, entry in self._sessions.items() if entry.ttl != float("inf")
+                ]
+                heapq.heapify(self._expiry_heap)
+
+            self._stats["expired_ttl"] += expired
+            self._stats["sweeps"] += 1
+            self._stats["last_sweep_seconds"] = time.perf_counter() - started
+        return expired
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count = len(self._sessions)
+            return {
+                "backend": "memory",
+                "sessions": count,
+                "max_sessions": self.max_sessions,
+                "ttl_seconds": self.ttl_seconds,
+                "max_messages": self.max_messages,
+                "approx_bytes": self._approx_bytes,
+                "approx_bytes_per_session": self._approx_bytes / count if count else 0,
+                "expiry_heap_size": len(self._expiry_heap),
+                **self._stats,
+            }
+
+
+async def run_session_sweeper(store: SessionStore, interval_seconds: float):
+    """Periodically expire idle sessions until cancelled"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            expired = store.sweep()
+            if expired:
+                print(f"🧹 Session sweeper expired {expired} idle sessions")
+        except Exception as e:
+            print(f"❌ Session sweep failed: {e}")
+
+
+@lru_cache()
+def get_session_store() -> SessionStore:
+    """Process-wide session store configured from settings"""
+    from core.config import get_settings
+
+    settings = get_settings()
+    backend = settings.SESSION_BACKEND or ("redis" if settings.REDIS_URL else "memory")
+    if backend not in SESSION_BACKENDS:
+        raise ValueError(f"Unknown session backend '{backend}'. Expected one of: {', '.join(SESSION_BACKENDS)}")
+
+    if backend == "sqlite":
+        from core.sqlite_session_store import SqliteSessionStore
+
+        return SqliteSessionStore(
+            settings.SESSION_SQLITE_PATH,
+            max_sessions=settings.SESSION_MAX_SESSIONS or None,
+            ttl_seconds=settings.SESSION_TTL_SECONDS or None,
+            max_messages=settings.SESSION_MAX_MESSAGES or None,
+            flush_interval_seconds=settings.SESSION_FLUSH_INTERVAL_SECONDS,
+            flush_batch_size=settings.SESSION_FLUSH_BATCH_SIZE,
+        )
+
+    if backend == "redis":
+        from core.redis_session_store import RedisSessionStore
+
+        if not settings.REDIS_URL:
+            raise ValueError("SESSION_BACKEND=redis requires REDIS_URL")
+        return RedisSessionStore.from_url(
+            settings.REDIS_URL,
+            ttl_seconds=settings.SESSION_TTL_SECONDS or None,
+            max_messages=settings.SESSION_MAX_MESSAGES or None,
+        )
+
+    return InMemorySessionStore(
+        max_sessions=settings.SESSION_MAX_SESSIONS or None,
+        ttl_seconds=settings.SESSION_TTL_SECONDS or None,
+        max_messages=settings.SESSION_MAX_MESSAGES or None,
+    )
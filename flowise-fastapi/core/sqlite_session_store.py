@@ -0,0 +1,340 @@
+"""
+SQLite-backed session store for single-node deployments without Redis.
+
+Sessions live in the in-memory LRU/TTL cache and are persisted to a WAL-mode
+SQLite database by a write-behind thread: creates, updates, touches and
+message appends are queued and flushed in batches (one transaction per batch),
+so request handlers never wait on disk writes. Sessions not in the cache are
+loaded lazily on first access; a session evicted before its writes were
+flushed is served from the write-behind buffer instead. The ids of persisted
+sessions are kept in memory, so counts and existence checks never query the
+database.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from core.message_log import MessageLog
+from core.session_store import InMemorySessionStore, _Entry
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    human TEXT NOT NULL,
+    ai TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_session ON messages (session_id, id);
+CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions (last_access);
+"""
+
+# Session fields stored in their own columns or tables rather than in `data`
+_RESERVED_FIELDS = ("id", "created_at", "messages")
+
+
+class SqliteSessionStore(InMemorySessionStore):
+    """In-memory session cache with write-behind persistence to SQLite"""
+
+    def __init__(
+        self,
+        path: str,
+        max_sessions: Optional[int] = 100_000,
+        ttl_seconds: Optional[float] = 86_400,
+        max_messages: Optional[int] = 200,
+        flush_interval_seconds: float = 0.5,
+        flush_batch_size: int = 500
+    ):
+        super().__init__(max_sessions=max_sessions, ttl_seconds=ttl_seconds, max_messages=max_messages)
+        self.path = path
+        self.flush_interval_seconds = flush_interval_seconds
+        self.flush_batch_size = flush_batch_size
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only syncs at checkpoints; a crash can lose the last batch but not corrupt the db
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._db_lock = threading.Lock()
+        # Every session that exists once queued writes are flushed
+        self._known = {row[0] for row in self._conn.execute("SELECT id FROM sessions")}
+
+        # Write-behind queue: ordered ops plus coalesced last-access touches
+        self._pending: List[Tuple[str, tuple]] = []
+        self._touches: Dict[str, float] = {}
+        # Sessions with unflushed writes: their cache entry, or None once deleted
+        self._dirty: Dict[str, Optional[_Entry]] = {}
+        self._pending_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._db_stats = {"flushes": 0, "flushed_ops": 0, "last_flush_seconds": 0.0, "loads": 0, "flush_errors": 0}
+
+        self._writer = threading.Thread(target=self._run_writer, name="session-writer", daemon=True)
+        self._writer.start()
+
+    # --- session API -------------------------------------------------------
+
+    def create_session(self, session_id: Optional[str] = None, ttl_seconds: Optional[float] = None) -> str:
+        session_id = super().create_session(session_id, ttl_seconds)
+        entry = self._sessions.get(session_id)
+        if entry is not None:
+            self._enqueue(session_id, "delete_messages", (session_id,))
+            self._enqueue(session_id, "upsert", self._session_row(session_id, entry.session))
+        return session_id
+
+    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        session = super().get_session(session_id)
+        if session is None:
+            return self._load(session_id)
+        self._touch_later(session_id)
+        return session
+
+    def update_session(self, session_id: str, data: Dict[str, Any]):
+        if not self._ensure_loaded(session_id):
+            return
+        super().update_session(session_id, data)
+        entry = self._sessions.get(session_id)
+        if entry is not None:
+            self._enqueue(session_id, "upsert", self._session_row(session_id, entry.session))
+
+    def add_message(self, session_id: str, message: str, response: str):
+        if not self._ensure_loaded(session_id):
+            return
+        super().add_message(session_id, message, response)
+        self._enqueue(session_id, "message", (session_id, time.time(), message, response))
+        self._touch_later(session_id)
+
+    def delete_session(self, session_id: str) -> bool:
+        deleted = super().delete_session(session_id)
+        with self._pending_lock:
+            deleted = session_id in self._known or deleted
+        self._enqueue(session_id, "delete", (session_id,))
+        return deleted
+
+    def iter_sessions(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """All persisted sessions (flushes pending writes first; intended for debugging)"""
+        self.flush()
+        with self._db_lock:
+            session_ids = [row[0] for row in self._conn.execute("SELECT id FROM sessions")]
+        for session_id in session_ids:
+            session = self._read(session_id)
+            if session is not None:
+                yield session_id, session[0]
+
+    def __len__(self) -> int:
+        with self._pending_lock:
+            return len(self._known)
+
+    def sweep(self) -> int:
+        expired = super().sweep()
+        if self.ttl_seconds is not None:
+            self._enqueue(None, "expire", (time.time() - self.ttl_seconds,))
+        return expired
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        with self._pending_lock:
+            pending = len(self._pending) + len(self._touches)
+        stats.update({
+            "backend": "sqlite",
+            "cached_sessions": stats["sessions"],
+            "sessions": len(self),
+            "path": self.path,
+            "pending_writes": pending,
+            **self._db_stats,
+        })
+        return stats
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._writer.join()
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
+
+    # --- lazy loading ------------------------------------------------------
+
+    def _ensure_loaded(self, session_id: str) -> bool:
+        if session_id in self._sessions:
+            return True
+        return self._load(session_id) is not None
+
+    def _load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._pending_lock:
+            if session_id not in self._known:
+                return None
+            dirty = session_id in self._dirty
+            buffered = self._dirty.get(session_id)
+        if dirty and buffered is None:
+            # Written while not cached (a race with eviction): only the database has it
+            self.flush()
+        elif buffered is not None:
+            # Evicted from the cache before its writes were flushed: the entry is still current
+            if buffered.deadline <= self._clock():
+                self._enqueue(session_id, "delete", (session_id,))
+                return None
+            self._insert(session_id, buffered.session, None if buffered.ttl == float("inf") else buffered.ttl)
+            self._db_stats["loads"] += 1
+            self._touch_later(session_id)
+            return buffered.session
+        loaded = self._read(session_id)
+        if loaded is None:
+            return None
+        session, idle_seconds = loaded
+        if self.ttl_seconds is not None and idle_seconds >= self.ttl_seconds:
+            self._enqueue(session_id, "delete", (session_id,))
+            return None
+        self._insert(session_id, session)
+        self._db_stats["loads"] += 1
+        self._touch_later(session_id)
+        return session
+
+    def _read(self, session_id: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT created_at, data, last_access FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            limit = self.max_messages if self.max_messages is not None else -1
+            messages = self._conn.execute(
+                "SELECT timestamp, human, ai FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+                (session_id, limit)
+            ).fetchall()
+
+        created_at, data, last_access = row
+        session = json.loads(data)
+        session["id"] = session_id
+        session["created_at"] = datetime.fromisoformat(created_at)
+        session["messages"] = MessageLog.from_exchanges(
+            ({"timestamp": ts, "human": human, "ai": ai} for ts, human, ai in reversed(messages)),
+            capacity=2 * self.max_messages if self.max_messages is not None else None
+        )
+        session.setdefault("context", {})
+        return session, max(0.0, time.time() - last_access)
+
+    # --- write-behind ------------------------------------------------------
+
+    @staticmethod
+    def _session_row(session_id: str, session: Dict[str, Any]) -> tuple:
+        data = {k: v for k, v in session.items() if k not in _RESERVED_FIELDS}
+        return (session_id, session["created_at"].isoformat(), json.dumps(data, default=str), time.time())
+
+    def _enqueue(self, session_id: Optional[str], op: str, params: tuple):
+        with self._pending_lock:
+            self._pending.append((op, params))
+            if session_id is not None:
+                if op == "delete":
+                    self._dirty[session_id] = None
+                    self._known.discard(session_id)
+                else:
+                    entry = self._sessions.get(session_id)
+                    if entry is not None or session_id not in self._dirty:
+                        self._dirty[session_id] = entry
+                    self._known.add(session_id)
+            full = len(self._pending) >= self.flush_batch_size
+        if full:
+            self._wakeup.set()
+
+    def _touch_later(self, session_id: str):
+        with self._pending_lock:
+            self._touches[session_id] = time.time()
+
+    def _run_writer(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval_seconds)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                self._db_stats["flush_errors"] += 1
+                print(f"❌ Session flush failed: {e}")
+
+    def flush(self) -> int:
+        """Write all queued operations in one transaction; returns how many were written"""
+        # Holding the db lock across the swap keeps concurrent flushes in queue order
+        with self._db_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, []
+                touches, self._touches = self._touches, {}
+                dirty, self._dirty = self._dirty, {}
+            if not pending and not touches:
+                return 0
+
+            started = time.perf_counter()
+            trimmed = set()
+            expired: List[str] = []
+            conn = self._conn
+            conn.execute("BEGIN")
+            try:
+                # Touches first, so an expiry in this batch sees recent activity
+                conn.executemany(
+                    "UPDATE sessions SET last_access = MAX(last_access, ?) WHERE id = ?",
+                    [(ts, sid) for sid, ts in touches.items()]
+                )
+                for op, params in pending:
+                    if op == "upsert":
+                        conn.execute(
+                            "INSERT INTO sessions (id, created_at, data, last_access) VALUES (?, ?, ?, ?) "
+                            "ON CONFLICT(id) DO UPDATE SET data = excluded.data, last_access = excluded.last_access",
+                            params
+                        )
+                    elif op == "message":
+                        conn.execute(
+                            "INSERT INTO messages (session_id, timestamp, human, ai) VALUES (?, ?, ?, ?)", params
+                        )
+                        trimmed.add(params[0])
+                    elif op == "delete_messages":
+                        conn.execute("DELETE FROM messages WHERE session_id = ?", params)
+                    elif op == "delete":
+                        conn.execute("DELETE FROM messages WHERE session_id = ?", params)
+                        conn.execute("DELETE FROM sessions WHERE id = ?", params)
+                    elif op == "expire":
+                        expired.extend(
+                            row[0] for row in conn.execute("SELECT id FROM sessions WHERE last_access < ?", params)
+                        )
+                        conn.execute(
+                            "DELETE FROM messages WHERE session_id IN (SELECT id FROM sessions WHERE last_access < ?)",
+                            params
+                        )
+                        conn.execute("DELETE FROM sessions WHERE last_access < ?", params)
+                if self.max_messages is not None:
+                    # Keep only the newest `max_messages` rows of sessions that grew
+                    conn.executemany(
+                        "DELETE FROM messages WHERE session_id = ? AND id <= "
+                        "(SELECT id FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                        [(sid, sid, self.max_messages) for sid in trimmed]
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                # Requeue so the batch is retried by the next flush
+                with self._pending_lock:
+                    self._pending[:0] = pending
+                    self._touches = {**touches, **self._touches}
+                    self._dirty = {**dirty, **self._dirty}
+                raise
+            if expired:
+                with self._pending_lock:
+                    # Sessions written again since this batch was taken are not expired
+                    self._known.difference_update(sid for sid in expired if sid not in self._dirty)
+
+        self._db_stats["flushes"] += 1
+        self._db_stats["flushed_ops"] += len(pending) + len(touches)
+        self._db_stats["last_flush_seconds"] = time.perf_counter() - started
+        return len(pending) + len(touches)
@@ -0,0 +1,155 @@
+"""
+Span-based text splitting.
+
+`ChunkSplitter` computes chunk boundaries as (start, end) offsets into the
+original text and slices each chunk out once, instead of splitting into
+substrings, re-joining them with separators and searching the text again for
+each chunk's position (what LangChain's splitters do). Two modes:
+
+- "recursive": each chunk ends at the last occurrence, within `chunk_size`
+  characters, of the first separator present in that window ("\\n\\n",
+  "\\n", " ", else a hard cut), and the next one starts at the first such
+  separator in the last `chunk_overlap` characters. Like LangChain's
+  recursive splitter it prefers paragraph, then line, then word breaks, but
+  the separator is chosen per window rather than for the whole text, so the
+  tail of a long paragraph can share a chunk with the next paragraph and
+  boundaries often differ from `RecursiveCharacterTextSplitter`'s. Chunks
+  still never exceed `chunk_size` and together cover all of the text;
+- "token": fixed windows of `chunk_size` tokens overlapping by `chunk_overlap`
+  tokens, with text recovered from the tokenizer's character offsets.
+
+Documents are split lazily, so loaders keep streaming through the splitter.
+"""
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+from langchain_text_splitters import TextSplitter
+
+from core.token_memory import _APPROX_TOKEN_RE, _load_encoding
+
+SPLIT_MODES = ("recursive", "token")
+DEFAULT_SEPARATORS = ["\n\n", "\n", " ", ""]
+
+Span = Tuple[int, int]
+
+
+class ChunkSplitter(TextSplitter):
+    """Recursive-character or token-window splitter working on offsets"""
+
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        mode: str = "recursive",
+        separators: Optional[Sequence[str]] = None,
+        encoding_name: str = "cl100k_base",
+        add_start_index: bool = True,
+        **kwargs: Any
+    ):
+        if mode not in SPLIT_MODES:
+            raise ValueError(f"Unknown split mode '{mode}'. Expected one of: {', '.join(SPLIT_MODES)}")
+        if chunk_overlap >= chunk_size:
+            # Windows advance by chunk_size - chunk_overlap, which must be positive
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})")
+        super().__init__(chunk_size=chunk_size, chunk_overlap=chunk_overlap, add_start_index=add_start_index, **kwargs)
+        self.mode = mode
+        self.separators = list(separators) if separators else DEFAULT_SEPARATORS
+        self.encoding = _load_encoding(encoding_name) if mode == "token" else None
+
+    # --- spans ---------------------------------------------------------------
+
+    def _recursive_spans(self, text: str) -> Iterator[Span]:
+        size, overlap = self._chunk_size, self._chunk_overlap
+        length = len(text)
+        start = 0
+        while start < length:
+            if length - start <= size:
+                yield start, length
+                return
+            # Cut at the last occurrence of the first separator present in the window;
+            # the separator starts the next chunk, so the chunk is text[start:end]
+            for separator in self.separators:
+                if not separator:
+                    end = start + size
+                    yield start, end
+                    start = max(end - overlap, start + 1)
+                    break
+                end = text.rfind(separator, start + 1, start + size + len(separator))
+                if end != -1:
+                    yield start, end
+                    # Carry the trailing pieces that fit in the overlap
+                    resume = text.find(separator, max(end - overlap, start + 1), end) if overlap else -1
+                    start = resume if resume != -1 else end
+                    break
+
+    def _token_spans(self, text: str) -> Iterator[Span]:
+        if self.encoding is not None:
+            _, starts = self.encoding.decode_with_offsets(self.encoding.encode(text, disallowed_special=()))
+        else:
+            starts = [match.start() for match in _APPROX_TOKEN_RE.finditer(text)]
+        count = len(starts)
+        step = self._chunk_size - self._chunk_overlap
+        for first in range(0, count, step):
+            last = min(first + self._chunk_size, count)
+            yield starts[first], starts[last] if last < count else len(text)
+            if last == count:
+                break
+
+    def iter_chunks(self, text: str) -> Iterator[Tuple[int, str]]:
+        """(start offset, chunk) pairs for `text`"""
+        spans = self._token_spans(text) if self.mode == "token" else self._recursive_spans(text)
+        strip = self._strip_whitespace
+        for start, end in spans:
+            chunk = text[start:end]
+            if strip and chunk and (chunk[0].isspace() or chunk[-1].isspace()):
+                stripped = chunk.lstrip()
+                start += len(chunk) - len(stripped)
+                chunk = stripped.rstrip()
+            if chunk:
+                yield start, chunk
+
+    # --- TextSplitter API ----------------------------------------------------
+
+    def split_text(self, text: str) -> List[str]:
+        return [chunk for _, chunk in self.iter_chunks(text)]
+
+    def lazy_split_documents(self, documents: Iterable[Document]) -> Iterator[Document]:
+        for document in documents:
+            for start, chunk in self.iter_chunks(document.page_content):
+                metadata = dict(document.metadata)
+                if self._add_start_index:
+                    metadata["start_index"] = start
+                yield Document(page_content=chunk, metadata=metadata)
+
+    def split_documents(self, documents: Iterable[Document]) -> List[Document]:
+        return list(self.lazy_split_documents(documents))
+
+    def create_documents(self, texts: List[str], metadatas: Optional[List[dict]] = None) -> List[Document]:
+        metadatas = metadatas or [{}] * len(texts)
+        return self.split_documents(Document(page_content=text, metadata=metadata) for text, metadata in zip(texts, metadatas))
+
+
+class SplitLoader(BaseLoader):
+    """
+    Chunks of the documents produced by `sources`: loaders, documents or
+    plain strings, consumed lazily in order.
+    """
+
+    def __init__(self, sources: Iterable[Any], splitter: ChunkSplitter):
+        self.sources = sources
+        self.splitter = splitter
+
+    def _documents(self) -> Iterator[Document]:
+        for source in self.sources:
+            if isinstance(source, BaseLoader):
+                yield from source.lazy_load()
+            elif isinstance(source, Document):
+                yield source
+            elif isinstance(source, str):
+                yield Document(page_content=source)
+            else:
+                raise ValueError(f"Cannot split input of type {type(source).__name__}")
+
+    def lazy_load(self) -> Iterator[Document]:
+        return self.splitter.lazy_split_documents(self._documents())
@@ -0,0 +1,303 @@
+"""
+Token-budgeted conversation memory.
+
+Recent turns are kept verbatim while they fit in the token budget; older turns
+are folded into a rolling summary by a background worker, so the prompt size
+stays bounded however long the conversation runs. Tokens are counted locally
+with tiktoken (falling back to an approximate count if the encoding cannot be
+loaded).
+"""
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, get_buffer_string
+from langchain_core.runnables import Runnable
+from pydantic import PrivateAttr
+
+from core.message_log import AI, HUMAN
+from core.session_memory import SessionBufferMemory
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+# Tokens added per chat message for role/formatting (OpenAI chat format)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PROMPT = """Progressively summarize the lines of conversation provided, adding onto the previous summary and returning a new, concise summary.
+
+Current summary:
+{summary}
+
+New lines of conversation:
+{new_lines}
+
+New summary:"""
+
+SUMMARY_HEADER = "Summary of the earlier conversation:\n"
+# Session field holding the rolling summary ({"text", "through"})
+SUMMARY_FIELD = "memory_summary"
+
+_APPROX_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+_summary_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_summary_executor() -> ThreadPoolExecutor:
+    global _summary_executor
+    with _executor_lock:
+        if _summary_executor is None:
+            _summary_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="memory-summary")
+        return _summary_executor
+
+
+@lru_cache(maxsize=None)
+def _load_encoding(encoding_name: str):
+    if tiktoken is None:
+        print("⚠️ tiktoken is not installed; using approximate token counts")
+        return None
+    try:
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        print(f"⚠️ Could not load tiktoken encoding '{encoding_name}' ({e}); using approximate token counts")
+        return None
+
+
+class TokenCounter:
+    """Counts and truncates text in tokens of a tiktoken encoding"""
+
+    def __init__(self, encoding_name: Optional[str] = "cl100k_base"):
+        self.encoding = _load_encoding(encoding_name) if encoding_name else None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return len(_APPROX_TOKEN_RE.findall(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Keep the last `max_tokens` tokens of `text`"""
+        if max_tokens <= 0:
+            return ""
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text, disallowed_special=())
+            return text if len(tokens) <= max_tokens else self.encoding.decode(tokens[-max_tokens:])
+        matches = list(_APPROX_TOKEN_RE.finditer(text))
+        return text if len(matches) <= max_tokens else text[matches[-max_tokens].start():]
+
+
+class _Conversation:
+    """Verbatim turns, their token counts and the rolling summary of one conversation"""
+
+    def __init__(self):
+        self.messages: List[BaseMessage] = []
+        self.message_tokens: deque = deque()
+        self.buffer_tokens = 0
+        self.summary = ""
+        self.summary_tokens = 0
+        # Timestamp of the newest message folded into the summary
+        self.summarized_through = 0.0
+        self.pending: List[Tuple[BaseMessage, float]] = []
+        self.timestamps: deque = deque()
+        self.future: Optional[Future] = None
+        self.lock = threading.Lock()
+
+
+class TokenBudgetMemory(SessionBufferMemory):
+    """
+    Chat memory bounded by `max_token_limit` tokens: a rolling summary of at
+    most `summary_token_limit` tokens plus the most recent turns verbatim.
+    Without an `llm`, older turns are kept as a truncated transcript instead
+    of being summarized.
+
+    Like `SessionBufferMemory`, state is keyed by the `session_id` chain input:
+    exchanges are appended to the session store, the summary is saved on the
+    session, and a conversation evicted from the in-process cache (or lost to
+    a restart) is rebuilt from both. Calls without a session share one
+    unpersisted conversation.
+    """
+    llm: Optional[Runnable] = None
+    max_token_limit: int = 2000
+    summary_token_limit: int = 400
+    encoding_name: Optional[str] = "cl100k_base"
+    summarize_in_background: bool = True
+    max_sessions: int = 1000
+
+    _counter: TokenCounter = PrivateAttr()
+    _conversations: "OrderedDict[str, _Conversation]" = PrivateAttr(default_factory=OrderedDict)
+    _conversations_lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        if self.summary_token_limit >= self.max_token_limit:
+            raise ValueError("summary_token_limit must be smaller than max_token_limit")
+        self._counter = TokenCounter(self.encoding_name)
+
+    @property
+    def summary(self) -> str:
+        """Summary of the session-less conversation (see `conversation` for sessions)"""
+        return self.conversation().summary
+
+    @property
+    def buffer_tokens(self) -> int:
+        """Tokens in the summary and the verbatim turns of the session-less conversation"""
+        conversation = self.conversation()
+        return conversation.buffer_tokens + conversation.summary_tokens
+
+    def _message_tokens(self, message: BaseMessage) -> int:
+        content = message.content if isinstance(message.content, str) else str(message.content)
+        return self._counter.count(content) + MESSAGE_OVERHEAD_TOKENS
+
+    def conversation(self, session_id: Optional[str] = None) -> _Conversation:
+        """The state of `session_id`, rebuilt from the session store when not cached"""
+        key = session_id or ""
+        with self._conversations_lock:
+            conversation = self._conversations.get(key)
+            if conversation is not None:
+                self._conversations.move_to_end(key)
+                return conversation
+
+        conversation = self._restore(session_id) if session_id else _Conversation()
+        with self._conversations_lock:
+            existing = self._conversations.get(key)
+            if existing is not None:
+                return existing
+            self._conversations[key] = conversation
+            while len(self._conversations) > self.max_sessions:
+                self._conversations.popitem(last=False)
+        return conversation
+
+    def _restore(self, session_id: str) -> _Conversation:
+        conversation = _Conversation()
+        session = self._get_store().get_session(session_id)
+        if session is None:
+            return conversation
+        saved = session.get(SUMMARY_FIELD) or {}
+        conversation.summary = saved.get("text", "")
+        conversation.summarized_through = float(saved.get("through", 0.0))
+        if conversation.summary:
+            conversation.summary_tokens = self._counter.count(SUMMARY_HEADER + conversation.summary) + MESSAGE_OVERHEAD_TOKENS
+        for message in session["messages"]:
+            if message.timestamp <= conversation.summarized_through:
+                continue
+            if message.role == HUMAN:
+                restored: BaseMessage = HumanMessage(content=message.content)
+            elif message.role == AI:
+                restored = AIMessage(content=message.content)
+            else:
+                continue
+            self._append(conversation, restored, message.timestamp)
+        self._prune(conversation)
+        self._schedule(conversation, session_id)
+        return conversation
+
+    def load_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        conversation = self.conversation(inputs.get(self.session_key))
+        with conversation.lock:
+            summary = conversation.summary
+            messages = list(conversation.messages)
+        if summary:
+            messages.insert(0, SystemMessage(content=SUMMARY_HEADER + summary))
+        if self.return_messages:
+            return {self.memory_key: messages}
+        return {self.memory_key: get_buffer_string(messages, human_prefix=self.human_prefix, ai_prefix=self.ai_prefix)}
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        session_id = inputs.get(self.session_key)
+        conversation = self.conversation(session_id)
+        # Appends the exchange to the session store (no-op without a session)
+        super().save_context(inputs, outputs)
+        input_str, output_str = self._get_input_output(inputs, outputs)
+        now = time.time()
+        with conversation.lock:
+            self._append(conversation, HumanMessage(content=input_str), now)
+            self._append(conversation, AIMessage(content=output_str), now)
+            self._prune(conversation)
+        self._schedule(conversation, session_id)
+
+    async def asave_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        # BaseChatMemory's async path would skip token accounting; summarizing is already off-thread
+        self.save_context(inputs, outputs)
+
+    def _append(self, conversation: _Conversation, message: BaseMessage, timestamp: float):
+        tokens = self._message_tokens(message)
+        conversation.messages.append(message)
+        conversation.message_tokens.append(tokens)
+        conversation.timestamps.append(timestamp)
+        conversation.buffer_tokens += tokens
+
+    def _prune(self, conversation: _Conversation):
+        """Move the oldest turns out of the buffer until it fits next to the summary"""
+        budget = self.max_token_limit - self.summary_token_limit
+        # Whole exchanges at a time, so `summarized_through` never splits one;
+        # the latest exchange is always kept verbatim
+        while conversation.buffer_tokens > budget and len(conversation.messages) > 2:
+            for _ in range(2):
+                conversation.pending.append((conversation.messages.pop(0), conversation.timestamps.popleft()))
+                conversation.buffer_tokens -= conversation.message_tokens.popleft()
+
+    def _schedule(self, conversation: _Conversation, session_id: Optional[str]):
+        with conversation.lock:
+            schedule = bool(conversation.pending) and conversation.future is None
+            if schedule and self.summarize_in_background:
+                conversation.future = _get_summary_executor().submit(self._summarize_pending, conversation, session_id)
+        if schedule and not self.summarize_in_background:
+            self._summarize_pending(conversation, session_id)
+
+    def _summarize_pending(self, conversation: _Conversation, session_id: Optional[str] = None):
+        """Fold pruned turns into the summary until none are left"""
+        while True:
+            with conversation.lock:
+                if not conversation.pending:
+                    conversation.future = None
+                    return
+                batch, conversation.pending = conversation.pending, []
+                summary = conversation.summary
+
+            new_lines = get_buffer_string([message for message, _ in batch], human_prefix=self.human_prefix, ai_prefix=self.ai_prefix)
+            new_summary = None
+            if self.llm is not None:
+                try:
+                    result = self.llm.invoke(SUMMARY_PROMPT.format(summary=summary, new_lines=new_lines))
+                    new_summary = (result.content if isinstance(result, BaseMessage) else str(result)).strip()
+                except Exception as e:
+                    print(f"❌ Conversation summary failed, keeping a transcript instead: {e}")
+            if new_summary is None:
+                new_summary = f"{summary}\n{new_lines}".strip()
+
+            # The header and message overhead count against the summary's share of the budget
+            overhead = self._counter.count(SUMMARY_HEADER) + MESSAGE_OVERHEAD_TOKENS
+            new_summary = self._counter.truncate(new_summary, self.summary_token_limit - overhead)
+            with conversation.lock:
+                conversation.summary = new_summary
+                conversation.summary_tokens = self._counter.count(SUMMARY_HEADER + new_summary) + MESSAGE_OVERHEAD_TOKENS
+                conversation.summarized_through = max(conversation.summarized_through, batch[-1][1])
+                saved = {"text": new_summary, "through": conversation.summarized_through}
+            if session_id:
+                try:
+                    self._get_store().update_session(session_id, {SUMMARY_FIELD: saved})
+                except Exception as e:
+                    print(f"⚠️ Could not save the conversation summary of session {session_id}: {e}")
+
+    def wait_for_summary(self, timeout: Optional[float] = None, session_id: Optional[str] = None):
+        """Block until the background summarizer of the conversation has caught up"""
+        future = self.conversation(session_id).future
+        if future is not None:
+            future.result(timeout)
+
+    def clear(self) -> None:
+        # Drops the cached conversations; history and saved summaries belong to the session store
+        with self._conversations_lock:
+            conversations = list(self._conversations.values())
+            self._conversations.clear()
+        for conversation in conversations:
+            if conversation.future is not None:
+                conversation.future.result()
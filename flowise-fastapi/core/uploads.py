@@ -0,0 +1,188 @@
+"""
+Content-addressed storage for uploaded files.
+
+Request bodies are streamed to a temporary file chunk by chunk while being
+hashed, and the size limit is enforced as bytes arrive. The finished file is
+moved to `objects/<sha[:2]>/<sha256>`, so identical uploads are stored once.
+Each upload of the same content adds a reference and each delete drops one;
+the object is removed with its last reference. Loader nodes accept the
+returned `upload://<sha256>` handle wherever they take a file path.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+import threading
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import AsyncIterator, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: commits are serialised within the process only
+    fcntl = None
+
+UPLOAD_SCHEME = "upload://"
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+# Chunks are collected up to this size before each (threaded) disk write
+_WRITE_BUFFER = 1 << 20
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size limit"""
+
+
+@dataclass
+class StoredFile:
+    """An uploaded file and the handle loaders accept for it"""
+    sha256: str
+    size: int
+    filename: Optional[str] = None
+    content_type: Optional[str] = None
+    created_at: float = 0.0
+    deduplicated: bool = False
+    # Uploads of this content not yet deleted
+    references: int = 1
+
+    @property
+    def handle(self) -> str:
+        return f"{UPLOAD_SCHEME}{self.sha256}"
+
+
+class UploadStore:
+    """Streams uploads to disk under their content hash"""
+
+    def __init__(self, directory: str, max_bytes: int = 10_000_000):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._objects = os.path.join(directory, "objects")
+        self._incoming = os.path.join(directory, "incoming")
+        os.makedirs(self._objects, exist_ok=True)
+        os.makedirs(self._incoming, exist_ok=True)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Serialise commits and deletes across threads and (where supported) worker processes"""
+        with self._lock, open(os.path.join(self.directory, "objects.lock"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def path(self, sha256: str) -> str:
+        if not _SHA256_RE.match(sha256):
+            raise ValueError(f"Invalid upload id: {sha256}")
+        return os.path.join(self._objects, sha256[:2], sha256)
+
+    async def save(
+        self,
+        chunks: AsyncIterator[bytes],
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None
+    ) -> StoredFile:
+        """Write a stream of chunks to the store; raises UploadTooLargeError past `max_bytes`"""
+        digest = hashlib.sha256()
+        temp = os.path.join(self._incoming, uuid.uuid4().hex)
+        size = 0
+        pending = []
+        pending_bytes = 0
+        out = open(temp, "wb")
+        try:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise UploadTooLargeError(f"Upload exceeds {self.max_bytes} bytes")
+                digest.update(chunk)
+                pending.append(chunk)
+                pending_bytes += len(chunk)
+                if pending_bytes >= _WRITE_BUFFER:
+                    await asyncio.to_thread(out.write, b"".join(pending))
+                    pending, pending_bytes = [], 0
+            if pending:
+                await asyncio.to_thread(out.write, b"".join(pending))
+            out.close()
+            return await asyncio.to_thread(self._commit, temp, digest.hexdigest(), size, filename, content_type)
+        finally:
+            out.close()
+            if os.path.exists(temp):
+                os.remove(temp)
+
+    def _commit(self, temp: str, sha256: str, size: int, filename: Optional[str], content_type: Optional[str]) -> StoredFile:
+        path = self.path(sha256)
+        with self._locked():
+            existing = self.info(sha256)
+            if existing is not None:
+                existing.references += 1
+                self._write_info(existing)
+                existing.deduplicated = True
+                return existing
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            stored = StoredFile(sha256=sha256, size=size, filename=filename, content_type=content_type, created_at=time.time())
+            os.replace(temp, path)
+            self._write_info(stored)
+            return stored
+
+    def _write_info(self, stored: StoredFile):
+        path = f"{self.path(stored.sha256)}.json"
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump({**asdict(stored), "deduplicated": False}, f)
+        os.replace(f"{path}.tmp", path)
+
+    def info(self, sha256: str) -> Optional[StoredFile]:
+        path = self.path(sha256)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(f"{path}.json", "r", encoding="utf-8") as f:
+                return StoredFile(**{**json.load(f), "deduplicated": False})
+        except (OSError, ValueError, TypeError):
+            return StoredFile(sha256=sha256, size=os.path.getsize(path))
+
+    def delete(self, sha256: str) -> Optional[int]:
+        """Drop one reference; returns the references left (0: file removed), or None if unknown"""
+        path = self.path(sha256)
+        with self._locked():
+            stored = self.info(sha256)
+            if stored is None:
+                return None
+            stored.references -= 1
+            if stored.references > 0:
+                self._write_info(stored)
+                return stored.references
+            for target in (path, f"{path}.json"):
+                try:
+                    os.remove(target)
+                except OSError:
+                    pass
+            return 0
+
+    def resolve(self, value: str) -> str:
+        """Local path for an `upload://<sha256>` handle (other values are returned unchanged)"""
+        if not value.startswith(UPLOAD_SCHEME):
+            return value
+        path = self.path(value[len(UPLOAD_SCHEME):])
+        if not os.path.exists(path):
+            raise ValueError(f"Unknown upload: {value}")
+        return path
+
+
+@lru_cache()
+def get_upload_store() -> UploadStore:
+    """Process-wide upload store configured from settings"""
+    from core.config import get_settings
+
+    settings = get_settings()
+    return UploadStore(settings.UPLOAD_DIRECTORY, max_bytes=settings.MAX_UPLOAD_SIZE)
+
+
+def resolve_file_path(value: str) -> str:
+    """Turn a node's file input (local path or upload handle) into a local path"""
+    if value and value.startswith(UPLOAD_SCHEME):
+        return get_upload_store().resolve(value)
+    return value
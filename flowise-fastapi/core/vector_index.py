@@ -0,0 +1,363 @@
+"""
+In-process exact vector index over a memory-mapped float32 matrix.
+
+An index directory holds:
+
+    vectors.f32    contiguous float32 rows (L2-normalised for cosine)
+    records.jsonl  one line per write: {"row", "id", "text", "metadata"}
+    index.json     dimensions, row count and metric
+
+The matrix is memory-mapped, so only the pages a query touches are read and
+the OS page cache is shared between workers. Search is one matrix product per
+block of rows for all queries at once, with `argpartition` top-k per block.
+Texts stay on disk (read by offset for the hits only); metadata is kept in
+memory and equality filters are answered from cached boolean masks, so a
+filtered query adds a couple of vectorised ANDs rather than a scan.
+
+`upsert` takes the same arguments as a Chroma collection's, so the ingestion
+pipeline can write here directly, and `import_collection` copies an existing
+Chroma collection. Overwriting a row appends a new record line; once the
+superseded lines outweigh the live ones, `records.jsonl` is compacted.
+"""
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+METRICS = ("cosine", "dot")
+# Rows scored per matrix product; bounds the temporary score matrix
+_BLOCK_ROWS = 262_144
+# Superseded record bytes tolerated before records.jsonl is rewritten
+_COMPACT_MIN_BYTES = 1_048_576
+# Index names become directory names; they come from workflow JSON
+_INDEX_NAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,127}$")
+
+Hit = Tuple[int, float]
+
+
+def validate_index_name(name: str) -> str:
+    """Reject index names that are not a single safe path component"""
+    if not isinstance(name, str) or not _INDEX_NAME_RE.match(name):
+        raise ValueError(f"Invalid index name '{name}': use letters, digits, '.', '_' or '-' (starting with a letter or digit)")
+    return name
+
+
+def embed_queries(embeddings: Embeddings, texts: Sequence[str]) -> np.ndarray:
+    """Query embeddings as a float32 matrix, batched where the embedding object allows it"""
+    from core.embedding_batcher import BatchedEmbeddings
+    from core.embedding_cache import CachedEmbeddings
+    from core.hashing_embeddings import HashingEmbeddings
+
+    if isinstance(embeddings, BatchedEmbeddings):
+        return embeddings.batcher.embed(list(texts), kind="query")
+    if isinstance(embeddings, CachedEmbeddings):
+        return embeddings.embed_arrays(list(texts), kind="query")
+    if isinstance(embeddings, HashingEmbeddings):
+        return np.stack([embeddings.embed_array(text) for text in texts])
+    return np.asarray([embeddings.embed_query(text) for text in texts], dtype=np.float32)
+
+
+class MmapVectorIndex:
+    """Exact top-k search over a memory-mapped float32 matrix"""
+
+    def __init__(self, directory: str, metric: str = "cosine"):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric '{metric}'. Expected one of: {', '.join(METRICS)}")
+        self.directory = directory
+        self.metric = metric
+        self.dimensions: Optional[int] = None
+        self.count = 0
+        self._ids: Dict[str, int] = {}
+        self._offsets: List[int] = []
+        self._lengths: List[int] = []
+        # Bytes of records.jsonl taken by superseded lines
+        self._stale_bytes = 0
+        self._metadata: List[Dict[str, Any]] = []
+        self._masks: Dict[Tuple[str, str], np.ndarray] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    # --- files ---------------------------------------------------------------
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load(self):
+        try:
+            with open(self._path("index.json"), "r", encoding="utf-8") as f:
+                header = json.load(f)
+        except FileNotFoundError:
+            return
+        self.dimensions = header["dimensions"]
+        self.metric = header.get("metric", self.metric)
+        self.count = header["count"]
+        self._offsets = [0] * self.count
+        self._lengths = [0] * self.count
+        self._metadata = [{} for _ in range(self.count)]
+        with open(self._path("records.jsonl"), "rb") as f:
+            offset = 0
+            for line in f:
+                record = json.loads(line)
+                row = record["row"]
+                if row < self.count:
+                    self._offsets[row] = offset
+                    self._lengths[row] = len(line)
+                    self._metadata[row] = record.get("metadata") or {}
+                    self._ids[record["id"]] = row
+                offset += len(line)
+        self._stale_bytes = offset - sum(self._lengths)
+        self._remap()
+
+    def _remap(self):
+        if self.count and self.dimensions:
+            self._matrix = np.memmap(self._path("vectors.f32"), dtype=np.float32, mode="r", shape=(self.count, self.dimensions))
+        else:
+            self._matrix = None
+
+    def _write_header(self):
+        temp = self._path("index.json.tmp")
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump({"dimensions": self.dimensions, "count": self.count, "metric": self.metric}, f)
+        os.replace(temp, self._path("index.json"))
+
+    # --- writes --------------------------------------------------------------
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Sequence[str],
+        metadatas: Optional[Sequence[Optional[Dict[str, Any]]]] = None
+    ):
+        """Insert rows, or overwrite the rows of ids already present"""
+        if not ids:
+            return
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(ids):
+            raise ValueError("Expected one embedding per id")
+        if self.metric == "cosine":
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms > 0, norms, 1.0)
+        metadatas = metadatas or [None] * len(ids)
+        with self._lock:
+            if self.dimensions is None:
+                self.dimensions = vectors.shape[1]
+            elif vectors.shape[1] != self.dimensions:
+                raise ValueError(f"Embedding size {vectors.shape[1]} does not match the index ({self.dimensions})")
+            # Rows of known ids are overwritten in place; new ids are appended
+            rows = []
+            new_rows = []
+            for i, id_ in enumerate(ids):
+                row = self._ids.get(id_)
+                if row is None:
+                    row = self._ids[id_] = self.count + len(new_rows)
+                    new_rows.append(i)
+                rows.append(row)
+            with open(self._path("vectors.f32"), "r+b" if os.path.exists(self._path("vectors.f32")) else "wb") as f:
+                for i, row in enumerate(rows):
+                    if row < self.count:
+                        f.seek(row * self.dimensions * 4)
+                        f.write(vectors[i].tobytes())
+                f.seek(self.count * self.dimensions * 4)
+                f.write(vectors[new_rows].tobytes())
+            with open(self._path("records.jsonl"), "ab") as f:
+                for i, row in enumerate(rows):
+                    line = json.dumps(
+                        {"row": row, "id": ids[i], "text": documents[i], "metadata": metadatas[i] or {}},
+                        default=str
+                    ).encode("utf-8") + b"\n"
+                    offset = f.tell()
+                    f.write(line)
+                    if row < len(self._offsets):
+                        self._stale_bytes += self._lengths[row]
+                        self._offsets[row] = offset
+                        self._lengths[row] = len(line)
+                        self._metadata[row] = metadatas[i] or {}
+                    else:
+                        self._offsets.append(offset)
+                        self._lengths.append(len(line))
+                        self._metadata.append(metadatas[i] or {})
+            self.count += len(new_rows)
+            self._write_header()
+            self._masks.clear()
+            self._remap()
+            if self._stale_bytes > max(_COMPACT_MIN_BYTES, sum(self._lengths)):
+                self._compact()
+
+    def compact(self):
+        """Rewrite records.jsonl with only the current line of each row"""
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        temp = self._path("records.jsonl.tmp")
+        offsets = []
+        with open(self._path("records.jsonl"), "rb") as source, open(temp, "wb") as target:
+            for offset in self._offsets:
+                source.seek(offset)
+                offsets.append(target.tell())
+                target.write(source.readline())
+        os.replace(temp, self._path("records.jsonl"))
+        # Readers hold the old file and offset list until they finish
+        self._offsets = offsets
+        self._stale_bytes = 0
+
+    def _open_records(self) -> Tuple[Any, List[int]]:
+        """records.jsonl and the matching offsets, consistent across a compaction"""
+        with self._lock:
+            return open(self._path("records.jsonl"), "rb"), self._offsets
+
+    def import_collection(self, collection: Any, batch_size: int = 1000) -> int:
+        """Copy every record of a Chroma collection into the index"""
+        total = collection.count()
+        for offset in range(0, total, batch_size):
+            page = collection.get(offset=offset, limit=batch_size, include=["embeddings", "documents", "metadatas"])
+            self.upsert(page["ids"], page["embeddings"], page["documents"], page["metadatas"])
+        return total
+
+    # --- reads ---------------------------------------------------------------
+
+    def _mask(self, key: str, value: Any) -> np.ndarray:
+        cache_key = (key, json.dumps(value, sort_keys=True, default=str))
+        mask = self._masks.get(cache_key)
+        if mask is None:
+            mask = self._masks[cache_key] = np.fromiter(
+                (metadata.get(key) == value for metadata in self._metadata), dtype=bool, count=self.count
+            )
+        return mask
+
+    def filter_mask(self, where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Rows matching every `key: value` of `where` (a list value matches any of its items)"""
+        if not where:
+            return None
+        with self._lock:
+            return self._filter_mask(where)
+
+    def _filter_mask(self, where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        # Caller holds the lock: masks are cached per (key, value) and dropped on upsert
+        if not where:
+            return None
+        result = np.ones(self.count, dtype=bool)
+        for key, value in where.items():
+            if isinstance(value, (list, tuple, set)):
+                any_of = np.zeros(self.count, dtype=bool)
+                for item in value:
+                    any_of |= self._mask(key, item)
+                result &= any_of
+            else:
+                result &= self._mask(key, value)
+        return result
+
+    def search(self, queries: np.ndarray, k: int = 4, where: Optional[Dict[str, Any]] = None) -> List[List[Hit]]:
+        """Top-`k` (row, score) pairs for each query row, best first"""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        with self._lock:
+            matrix = self._matrix
+            mask = self._filter_mask(where) if matrix is not None else None
+        if matrix is None or k <= 0:
+            return [[] for _ in queries]
+        if self.metric == "cosine":
+            norms = np.linalg.norm(queries, axis=1, keepdims=True)
+            queries = queries / np.where(norms > 0, norms, 1.0)
+
+        candidate_rows: List[np.ndarray] = []
+        candidate_scores: List[np.ndarray] = []
+        for start in range(0, len(matrix), _BLOCK_ROWS):
+            block = matrix[start:start + _BLOCK_ROWS]
+            scores = queries @ block.T
+            if mask is not None:
+                scores[:, ~mask[start:start + len(block)]] = -np.inf
+            take = min(k, scores.shape[1])
+            top = np.argpartition(-scores, take - 1, axis=1)[:, :take]
+            candidate_rows.append(top + start)
+            candidate_scores.append(np.take_along_axis(scores, top, axis=1))
+        rows = np.concatenate(candidate_rows, axis=1)
+        scores = np.concatenate(candidate_scores, axis=1)
+
+        results = []
+        for query_rows, query_scores in zip(rows, scores):
+            order = np.argsort(-query_scores)[:k]
+            results.append([
+                (int(query_rows[i]), float(query_scores[i]))
+                for i in order
+                if query_scores[i] != -np.inf
+            ])
+        return results
+
+    def row_of(self, id_: str) -> Optional[int]:
+        return self._ids.get(id_)
+
+    def records(self) -> Iterator[Tuple[str, str]]:
+        """(id, text) of every current row, in row order"""
+        f, offsets = self._open_records()
+        with f:
+            for offset in list(offsets):
+                f.seek(offset)
+                record = json.loads(f.readline())
+                yield record["id"], record["text"]
+
+    def documents(self, hits: Iterable[Hit]) -> List[Document]:
+        documents = []
+        f, offsets = self._open_records()
+        with f:
+            for row, score in hits:
+                f.seek(offsets[row])
+                record = json.loads(f.readline())
+                documents.append(Document(
+                    page_content=record["text"],
+                    metadata={**(record.get("metadata") or {}), "score": score},
+                    id=record["id"]
+                ))
+        return documents
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class VectorIndexRetriever(BaseRetriever):
+    """LangChain retriever over an `MmapVectorIndex`; `batch` embeds and searches all queries at once"""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    index: Any
+    embeddings: Embeddings
+    k: int = 4
+    where: Optional[Dict[str, Any]] = None
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.search([query])[0]
+
+    def search(self, queries: Sequence[str]) -> List[List[Document]]:
+        hits = self.index.search(embed_queries(self.embeddings, queries), k=self.k, where=self.where)
+        return [self.index.documents(query_hits) for query_hits in hits]
+
+    def batch(self, inputs: List[Any], config: Any = None, *, return_exceptions: bool = False, **kwargs: Any) -> List[List[Document]]:
+        if not inputs or not all(isinstance(query, str) for query in inputs):
+            return super().batch(inputs, config, return_exceptions=return_exceptions, **kwargs)
+        return self.search(inputs)
+
+
+_indexes: Dict[str, MmapVectorIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_vector_index(name: str, directory: Optional[str] = None) -> MmapVectorIndex:
+    """The process-wide index `name` under `directory` (default: VECTOR_INDEX_DIRECTORY)"""
+    from core.config import get_settings
+
+    validate_index_name(name)
+    path = os.path.abspath(os.path.join(directory or get_settings().VECTOR_INDEX_DIRECTORY, name))
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = _indexes[path] = MmapVectorIndex(path)
+        return index
@@ -0,0 +1,188 @@
+"""
+Long-term conversation memory retrieved by vector similarity.
+
+Each session gets an in-process index of its exchanges (one embedding per
+human/AI turn). For every call the memory returns the `recent_k` latest turns
+plus the `k` earlier turns most similar to the current input, in chronological
+order, instead of a fixed window. Indexes are kept for the most recently used
+sessions only and are rebuilt from the session store when a session returns.
+"""
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, get_buffer_string
+from pydantic import ConfigDict, PrivateAttr
+
+from core.hashing_embeddings import HashingEmbeddings
+from core.session_memory import SessionBufferMemory
+
+
+def _turn_text(human: str, ai: str) -> str:
+    return f"{human}\n{ai}"
+
+
+class TurnIndex:
+    """
+    Bounded, append-only matrix of turn embeddings for one session. Readers
+    take a snapshot under the lock; `add` never rewrites rows a snapshot can see.
+    """
+    __slots__ = ("max_turns", "vectors", "turns", "_lock")
+
+    def __init__(self, dimensions: int, max_turns: int = 1000):
+        self.max_turns = max_turns
+        self.vectors = np.zeros((min(16, max_turns), dimensions), dtype=np.float32)
+        self.turns: List[Tuple[str, str]] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    def add(self, vector: np.ndarray, human: str, ai: str):
+        with self._lock:
+            size = len(self.turns)
+            if size == self.max_turns:
+                # Drop the oldest half at once so eviction stays amortised O(1); copy
+                # rather than shift in place, since searches may hold the old matrix
+                keep = size // 2
+                kept = np.zeros_like(self.vectors)
+                kept[:keep] = self.vectors[size - keep:size]
+                self.vectors = kept
+                self.turns = self.turns[size - keep:]
+                size = keep
+            elif size == len(self.vectors):
+                grown = np.zeros((min(2 * size, self.max_turns), self.vectors.shape[1]), dtype=np.float32)
+                grown[:size] = self.vectors
+                self.vectors = grown
+            self.vectors[size] = vector
+            self.turns.append((human, ai))
+
+    def _snapshot(self) -> Tuple[np.ndarray, List[Tuple[str, str]], int]:
+        with self._lock:
+            return self.vectors, self.turns, len(self.turns)
+
+    @staticmethod
+    def _top(vectors: np.ndarray, candidates: int, query: np.ndarray, k: int) -> List[int]:
+        if k <= 0 or candidates <= 0:
+            return []
+        if k >= candidates:
+            return list(range(candidates))
+        scores = vectors[:candidates] @ query
+        top = np.argpartition(-scores, k - 1)[:k]
+        return sorted(int(i) for i in top)
+
+    def search(self, query: np.ndarray, k: int, exclude_last: int = 0) -> List[int]:
+        """Positions of the `k` most similar turns, ignoring the newest `exclude_last`"""
+        vectors, _, count = self._snapshot()
+        return self._top(vectors, count - exclude_last, query, k)
+
+    def recall(self, query: Optional[np.ndarray], k: int, recent: int) -> List[Tuple[str, str]]:
+        """The `k` earlier turns most similar to `query` followed by the latest `recent`, oldest first"""
+        vectors, turns, count = self._snapshot()
+        recent = min(recent, count)
+        positions = self._top(vectors, count - recent, query, k) if query is not None else []
+        positions.extend(range(count - recent, count))
+        return [turns[i] for i in positions]
+
+
+class VectorRetrieverMemory(SessionBufferMemory):
+    """
+    Session memory returning the latest `recent_k` turns plus the `k` most
+    relevant earlier turns. Exchanges are still appended to the session store.
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    k: int = 4
+    recent_k: int = 2
+    max_turns: int = 1000
+    max_indexed_sessions: int = 1000
+    embeddings: Optional[Embeddings] = None
+
+    _indexes: "OrderedDict[str, TurnIndex]" = PrivateAttr(default_factory=OrderedDict)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    def model_post_init(self, __context: Any) -> None:
+        super().model_post_init(__context)
+        if self.embeddings is None:
+            self.embeddings = HashingEmbeddings()
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        if isinstance(self.embeddings, HashingEmbeddings):
+            return np.stack([self.embeddings.embed_array(text) for text in texts])
+        vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1.0)
+
+    def _embed_query(self, text: str) -> np.ndarray:
+        return self._embed([text])[0]
+
+    def _index(self, session_id: str) -> Optional[TurnIndex]:
+        """The session's index, built from its stored history on first use"""
+        with self._lock:
+            index = self._indexes.get(session_id)
+            if index is not None:
+                self._indexes.move_to_end(session_id)
+                return index
+
+        session = self._get_store().get_session(session_id)
+        if session is None:
+            return None
+        exchanges = [(e.get("human", ""), e.get("ai", "")) for e in session["messages"].exchanges()][-self.max_turns:]
+        vectors = self._embed([_turn_text(h, a) for h, a in exchanges]) if exchanges else None
+        index = TurnIndex(self._dimensions(vectors), self.max_turns)
+        for i, (human, ai) in enumerate(exchanges):
+            index.add(vectors[i], human, ai)
+
+        with self._lock:
+            existing = self._indexes.get(session_id)
+            if existing is not None:
+                return existing
+            self._indexes[session_id] = index
+            while len(self._indexes) > self.max_indexed_sessions:
+                self._indexes.popitem(last=False)
+        return index
+
+    def _dimensions(self, vectors: Optional[np.ndarray]) -> int:
+        if vectors is not None:
+            return vectors.shape[1]
+        if isinstance(self.embeddings, HashingEmbeddings):
+            return self.embeddings.dimensions
+        return len(self._embed_query("dimension probe"))
+
+    def load_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        session_id = inputs.get(self.session_key)
+        index = self._index(session_id) if session_id else None
+        messages: List[BaseMessage] = []
+        if index is not None and len(index):
+            query = str(inputs.get(self.input_key or "input", ""))
+            for human, ai in index.recall(self._embed_query(query) if query else None, self.k, self.recent_k):
+                messages.append(HumanMessage(content=human))
+                messages.append(AIMessage(content=ai))
+        if self.return_messages:
+            return {self.memory_key: messages}
+        return {self.memory_key: get_buffer_string(messages, human_prefix=self.human_prefix, ai_prefix=self.ai_prefix)}
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        session_id = inputs.get(self.session_key)
+        if not session_id:
+            return
+        index = self._index(session_id)
+        input_str, output_str = self._get_input_output(inputs, outputs)
+        self._get_store().add_message(session_id, input_str, output_str)
+        if index is not None:
+            index.add(self._embed_query(_turn_text(input_str, output_str)), input_str, output_str)
+
+    async def asave_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        if isinstance(self.embeddings, HashingEmbeddings):
+            self.save_context(inputs, outputs)
+        else:
+            # Remote embedding calls must not block the event loop
+            await asyncio.to_thread(self.save_context, inputs, outputs)
+
+    def forget(self, session_id: str):
+        """Drop the in-process index of a session"""
+        with self._lock:
+            self._indexes.pop(session_id, None)
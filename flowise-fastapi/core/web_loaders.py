@@ -0,0 +1,312 @@
+"""
+Document loaders for web pages and sitemaps built on the shared fetch engine.
+
+Pages are fetched concurrently via `core.http_fetch`, reduced to their main
+text by `core.html_extract` in a worker thread (so extraction does not stall
+the event loop) and yielded as documents as soon as each one arrives. Use `alazy_load`/`aload` from async code; the sync `lazy_load`/`load`
+drive a private event loop and must not be called from inside one.
+"""
+import asyncio
+import re
+import xml.etree.ElementTree as ET
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+import httpx
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+
+from core.html_extract import extract_html
+from core.http_fetch import FetchResult, HttpFetcher, get_http_fetcher
+from core.parse_cache import ParseCache
+
+_SITEMAP_NS = re.compile(r"^\{[^}]*\}")
+# Largest (uncompressed) sitemap file the sitemap protocol allows
+SITEMAP_MAX_BYTES = 50 * 1024 * 1024
+
+
+def html_to_document(result: FetchResult, main_content: bool = True, strip_boilerplate: bool = True) -> Document:
+    """
+    Turn a fetched page into a Document with WebBaseLoader-style metadata.
+    `main_content` keeps only the page's <main>/<article> text when it marks
+    one; `strip_boilerplate` drops navigation, headers, footers and the like.
+    """
+    metadata = {"source": result.url}
+    content_type = result.headers.get("content-type", "")
+    if "html" not in content_type and not result.content.lstrip()[:1] == b"<":
+        return Document(page_content=result.text, metadata=metadata)
+
+    page = extract_html(result.content, result.encoding, main_content=main_content, strip_boilerplate=strip_boilerplate)
+    if page.title:
+        metadata["title"] = page.title
+    if page.description:
+        metadata["description"] = page.description
+    if page.language:
+        metadata["language"] = page.language
+    if result.truncated:
+        metadata["truncated"] = True
+    return Document(page_content=page.text, metadata=metadata)
+
+
+def cached_page_document(
+    result: FetchResult,
+    main_content: bool,
+    parse_cache: Optional[ParseCache],
+    strip_boilerplate: bool = True
+) -> Document:
+    """`html_to_document` behind the parse cache, keyed by the body's content hash"""
+    if parse_cache is None:
+        return html_to_document(result, main_content, strip_boilerplate)
+    key = parse_cache.key_for_bytes(result.content, "html", {
+        "main_content": main_content,
+        "strip_boilerplate": strip_boilerplate,
+        "content_type": result.headers.get("content-type", ""),
+        "encoding": result.encoding,
+    })
+    cached = parse_cache.get(key)
+    if cached is not None:
+        document = next(cached, None)
+        cached.close()
+        if document is not None:
+            document.metadata["source"] = result.url
+            if result.truncated:
+                document.metadata["truncated"] = True
+            return document
+    document = html_to_document(result, main_content, strip_boilerplate)
+    parse_cache.put(key, [document])
+    return document
+
+
+class _AsyncLoader(BaseLoader):
+    """Shared sync entry point for loaders implemented with `alazy_load`"""
+    fetcher: HttpFetcher
+
+    def lazy_load(self) -> Iterator[Document]:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError(f"{type(self).__name__}.load() cannot run inside an event loop; use aload() or alazy_load()")
+
+        # Step the async generator on a private loop so each document is
+        # handed over as it arrives; fetches in flight resume on the next step
+        loop = asyncio.new_event_loop()
+        documents = self.alazy_load()
+        try:
+            while True:
+                try:
+                    document = loop.run_until_complete(documents.__anext__())
+                except StopAsyncIteration:
+                    break
+                yield document
+        finally:
+            try:
+                loop.run_until_complete(self._shutdown(documents))
+                loop.run_until_complete(loop.shutdown_asyncgens())
+                loop.run_until_complete(loop.shutdown_default_executor())
+            finally:
+                loop.close()
+
+    async def _shutdown(self, documents: AsyncIterator[Document]):
+        await documents.aclose()
+        await self.fetcher.aclose()
+        remaining = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in remaining:
+            task.cancel()
+        await asyncio.gather(*remaining, return_exceptions=True)
+
+    async def aload(self) -> List[Document]:
+        return [document async for document in self.alazy_load()]
+
+
+class HttpWebLoader(_AsyncLoader):
+    """Fetch a list of URLs concurrently and yield one document per page"""
+
+    def __init__(
+        self,
+        urls: List[str],
+        headers: Optional[Dict[str, str]] = None,
+        verify_ssl: bool = True,
+        max_bytes: Optional[int] = None,
+        continue_on_failure: bool = True,
+        main_content: bool = True,
+        strip_boilerplate: bool = True,
+        fetcher: Optional[HttpFetcher] = None,
+        parse_cache: Optional[ParseCache] = None
+    ):
+        self.urls = urls
+        self.headers = headers or {}
+        self.verify_ssl = verify_ssl
+        self.max_bytes = max_bytes
+        self.continue_on_failure = continue_on_failure
+        self.main_content = main_content
+        self.strip_boilerplate = strip_boilerplate
+        self.fetcher = fetcher or get_http_fetcher()
+        self.parse_cache = parse_cache
+
+    async def alazy_load(self) -> AsyncIterator[Document]:
+        async for result in self.fetcher.iter_fetch(
+            self.urls, headers=self.headers, verify=self.verify_ssl, max_bytes=self.max_bytes
+        ):
+            if not result.ok:
+                message = f"Failed to load {result.url}: {result.error}"
+                if not self.continue_on_failure:
+                    raise ValueError(message)
+                print(f"❌ {message}")
+                continue
+            yield await asyncio.to_thread(
+                cached_page_document, result, self.main_content, self.parse_cache, self.strip_boilerplate
+            )
+
+
+class HttpSitemapLoader(_AsyncLoader):
+    """
+    Discover page URLs from a sitemap (or sitemap index) and load them
+    concurrently. The sitemap is parsed as it streams in and the URL filter is
+    applied before any page is fetched; pages are fetched while the sitemap is
+    still being read. `limit` caps the documents loaded: pages that fail do
+    not count, and reading stops once `limit` pages have loaded.
+    """
+
+    def __init__(
+        self,
+        sitemap_url: str,
+        filter_urls: Optional[List[str]] = None,
+        limit: int = 0,
+        headers: Optional[Dict[str, str]] = None,
+        verify_ssl: bool = True,
+        max_bytes: Optional[int] = None,
+        max_sitemaps: int = 50,
+        max_in_flight: int = 16,
+        main_content: bool = True,
+        strip_boilerplate: bool = True,
+        fetcher: Optional[HttpFetcher] = None,
+        parse_cache: Optional[ParseCache] = None,
+        max_sitemap_bytes: int = SITEMAP_MAX_BYTES
+    ):
+        self.sitemap_url = sitemap_url
+        self.filters = [re.compile(pattern) for pattern in (filter_urls or [])]
+        self.limit = limit
+        self.headers = headers or {}
+        self.verify_ssl = verify_ssl
+        self.max_bytes = max_bytes
+        self.max_sitemaps = max_sitemaps
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_sitemap_bytes = max_sitemap_bytes
+        self.main_content = main_content
+        self.strip_boilerplate = strip_boilerplate
+        self.fetcher = fetcher or get_http_fetcher()
+        self.parse_cache = parse_cache
+
+    def _wanted(self, url: str) -> bool:
+        return not self.filters or any(pattern.search(url) for pattern in self.filters)
+
+    async def iter_urls(self, limit: Optional[int] = None) -> AsyncIterator[str]:
+        """
+        Stream wanted page URLs from the sitemap, following nested sitemap
+        indexes, up to `limit` URLs (default: the loader's limit; 0 for all)
+        """
+        limit = self.limit if limit is None else limit
+        found = 0
+        pending = [self.sitemap_url]
+        seen = set()
+        while pending and len(seen) < self.max_sitemaps:
+            sitemap_url = pending.pop(0)
+            if sitemap_url in seen:
+                continue
+            seen.add(sitemap_url)
+            parser = ET.XMLPullParser(events=("end",))
+            location = None
+            received = 0
+            try:
+                # Sitemaps have their own size cap rather than the per-page one, and
+                # do not hold a per-host slot the page fetches are waiting for
+                async for chunk in self.fetcher.stream(
+                    sitemap_url, headers=self.headers, verify=self.verify_ssl,
+                    max_bytes=self.max_sitemap_bytes + 1, host_limit=False
+                ):
+                    received += len(chunk)
+                    if received > self.max_sitemap_bytes:
+                        raise ValueError(f"Sitemap {sitemap_url} is larger than {self.max_sitemap_bytes} bytes")
+                    parser.feed(chunk)
+                    for _, element in parser.read_events():
+                        tag = _SITEMAP_NS.sub("", element.tag)
+                        if tag == "loc":
+                            location = (element.text or "").strip()
+                        elif tag == "sitemap" and location:
+                            pending.append(location)
+                        elif tag == "url" and location and self._wanted(location):
+                            found += 1
+                            yield location
+                            if limit and found >= limit:
+                                # Leaving the stream closes the connection without reading the rest
+                                return
+                        if tag in ("url", "sitemap"):
+                            location = None
+                            element.clear()
+            except ET.ParseError as e:
+                raise ValueError(f"Invalid sitemap {sitemap_url}: {e}")
+            except httpx.HTTPError as e:
+                raise ValueError(f"Failed to load sitemap {sitemap_url}: {e}")
+
+    async def discover_urls(self) -> List[str]:
+        """Wanted page URLs from the sitemap (up to `limit`)"""
+        return [url async for url in self.iter_urls()]
+
+    async def alazy_load(self) -> AsyncIterator[Document]:
+        in_flight = set()
+        loaded = 0
+
+        async def completed(block: bool) -> List[FetchResult]:
+            if block:
+                await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            done = [task for task in in_flight if task.done()]
+            in_flight.difference_update(done)
+            return [task.result() for task in done]
+
+        def fetch(url: str) -> asyncio.Task:
+            return asyncio.ensure_future(self.fetcher.fetch(
+                url, headers=self.headers, verify=self.verify_ssl, max_bytes=self.max_bytes
+            ))
+
+        def saturated() -> bool:
+            # Never fetch more pages than could still count towards the limit
+            return len(in_flight) >= self.max_in_flight or bool(self.limit and loaded + len(in_flight) >= self.limit)
+
+        # Discovery runs past `limit` URLs so that failed pages are replaced
+        urls = self.iter_urls(limit=0)
+        try:
+            async for url in urls:
+                in_flight.add(fetch(url))
+                while True:
+                    block = saturated()
+                    for result in await completed(block=block):
+                        document = await self._to_document(result)
+                        if document is not None:
+                            loaded += 1
+                            yield document
+                    if self.limit and loaded >= self.limit:
+                        return
+                    if not block or not saturated():
+                        break
+            while in_flight:
+                for result in await completed(block=True):
+                    document = await self._to_document(result)
+                    if document is not None:
+                        loaded += 1
+                        yield document
+                if self.limit and loaded >= self.limit:
+                    return
+        finally:
+            # The consumer stopped early or the limit was reached: don't leave fetches running
+            for task in in_flight:
+                task.cancel()
+            await urls.aclose()
+
+    async def _to_document(self, result: FetchResult) -> Optional[Document]:
+        if not result.ok:
+            print(f"❌ Failed to load {result.url}: {result.error}")
+            return None
+        return await asyncio.to_thread(
+            cached_page_document, result, self.main_content, self.parse_cache, self.strip_boilerplate
+        )
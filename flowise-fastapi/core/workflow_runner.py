@@ -1,12 +1,23 @@
 from typing import Dict, Any, List, Optional, AsyncGenerator
 import asyncio
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from langchain_core.memory import BaseMemory
 from langchain_core.runnables import Runnable
+from langchain_core.messages import BaseMessage
 from langchain.callbacks.manager import CallbackManager
 from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
 from langchain.callbacks.base import AsyncCallbackHandler
 
+from core.cassette import Cassette, CassetteRecorder
+from core.message_log import MessageLog
 from core.dynamic_chain_builder import DynamicChainBuilder
 from core.node_discovery import get_registry
+from core.session_memory import SESSION_ID_KEY, SessionBufferMemory
 
 class StreamingCallbackHandler(AsyncCallbackHandler):
     """Custom callback for streaming responses"""
@@ -31,14 +42,126 @@ class StreamingCallbackHandler(AsyncCallbackHandler):
             "outputs": outputs
         })
 
+@dataclass
+class CompiledFlow:
+    """A built chain plus what the runner needs to know about it"""
+    chain: Any
+    execution_order: List[str]
+    # A session-bound memory node persists each exchange itself
+    uses_session_memory: bool
+    # False when a node holds per-conversation state (e.g. a non-session memory)
+    cacheable: bool
+
+
+class CompiledFlowCache:
+    """LRU of compiled flows keyed by a hash of the flow definition"""
+
+    def __init__(self, max_size: int = 128):
+        self.max_size = max_size
+        self._flows: "OrderedDict[str, CompiledFlow]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(workflow_data: Dict[str, Any], variant: str = "") -> str:
+        canonical = json.dumps(
+            {"nodes": workflow_data.get("nodes", []), "edges": workflow_data.get("edges", []), "variant": variant},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[CompiledFlow]:
+        with self._lock:
+            flow = self._flows.get(key)
+            if flow is None:
+                self.misses += 1
+                return None
+            self._flows.move_to_end(key)
+            self.hits += 1
+            return flow
+
+    def put(self, key: str, flow: CompiledFlow):
+        if self.max_size <= 0 or not flow.cacheable:
+            return
+        with self._lock:
+            self._flows[key] = flow
+            self._flows.move_to_end(key)
+            while len(self._flows) > self.max_size:
+                self._flows.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._flows.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"size": len(self._flows), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
+
+
+@lru_cache()
+def get_flow_cache() -> CompiledFlowCache:
+    """Process-wide cache of compiled flows shared by all runners"""
+    from core.config import get_settings
+
+    return CompiledFlowCache(max_size=get_settings().FLOW_CACHE_SIZE)
+
+
 class WorkflowRunner:
     """
     Executes workflows built by DynamicChainBuilder
     """
     
-    def __init__(self, registry: Dict[str, Any] = None):
+    def __init__(
+        self,
+        registry: Dict[str, Any] = None,
+        cassette: Optional[Cassette] = None,
+        flow_cache: Optional[CompiledFlowCache] = None
+    ):
         self.registry = registry or get_registry()
-        self.builder = DynamicChainBuilder(self.registry)
+        self.cassette = cassette
+        self.flow_cache = flow_cache
+        replaying = cassette is not None and cassette.mode == "replay"
+        self._cache_variant = "replay" if replaying else "live"
+        self.builder = DynamicChainBuilder(
+            self.registry,
+            output_transform=cassette.replace_provider if replaying else None
+        )
+    
+    def compile(self, workflow_data: Dict[str, Any]) -> CompiledFlow:
+        """Build a workflow, reusing a cached build of the same definition when possible"""
+        key = None
+        if self.flow_cache is not None:
+            key = self.flow_cache.key(workflow_data, self._cache_variant)
+            cached = self.flow_cache.get(key)
+            if cached is not None:
+                return cached
+        
+        print(f"🔨 Building workflow from {len(workflow_data['nodes'])} nodes...")
+        chain = self.builder.build_from_flow(workflow_data)
+        outputs = [value for node in self.builder.nodes.values() for value in node.outputs.values()]
+        memories = [value for value in outputs if isinstance(value, BaseMemory)]
+        compiled = CompiledFlow(
+            chain=chain,
+            execution_order=list(self.builder.nodes.keys()),
+            uses_session_memory=any(isinstance(memory, SessionBufferMemory) for memory in memories),
+            cacheable=all(isinstance(memory, SessionBufferMemory) for memory in memories)
+        )
+        if key is not None:
+            self.flow_cache.put(key, compiled)
+        return compiled
+    
+    def _start_recording(self, workflow_data: Dict[str, Any], input_text: str) -> Optional[CassetteRecorder]:
+        """Create a recorder for this execution when the cassette is in record mode"""
+        if self.cassette is None or self.cassette.mode != "record":
+            return None
+        recorder = CassetteRecorder()
+        recorder.record_run(workflow_data, input_text)
+        return recorder
+    
+    def _finish_recording(self, recorder: Optional[CassetteRecorder]):
+        if recorder is not None:
+            self.cassette.append(recorder.entries)
     
     async def execute_workflow(
         self, 
@@ -47,10 +170,13 @@ class WorkflowRunner:
         session_context: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """Execute a workflow with given input"""
+        recorder = self._start_recording(workflow_data, input_text)
+        config = {"callbacks": [recorder]} if recorder else None
+        compiled = None
         try:
-            # Build the chain
-            print(f"🔨 Building workflow from {len(workflow_data['nodes'])} nodes...")
-            chain = self.builder.build_from_flow(workflow_data)
+            # Build the chain (or reuse a cached build)
+            compiled = self.compile(workflow_data)
+            chain = compiled.chain
             
             # Prepare input
             chain_input = self._prepare_chain_input(input_text, session_context)
@@ -59,23 +185,26 @@ class WorkflowRunner:
             print(f"🚀 Executing workflow with input: {input_text[:100]}...")
             
             if hasattr(chain, 'ainvoke'):
-                result = await chain.ainvoke(chain_input)
+                result = await chain.ainvoke(chain_input, config=config)
             elif hasattr(chain, 'invoke'):
-                result = await asyncio.to_thread(chain.invoke, chain_input)
+                result = await asyncio.to_thread(chain.invoke, chain_input, config)
             else:
                 result = str(chain)
             
             # Process result
             if isinstance(result, dict):
                 output = result.get("output", result.get("text", str(result)))
+            elif isinstance(result, BaseMessage):
+                output = result.content
             else:
                 output = str(result)
             
             return {
                 "result": output,
-                "execution_order": list(self.builder.nodes.keys()),
+                "execution_order": compiled.execution_order,
                 "status": "completed",
-                "node_count": len(self.builder.nodes)
+                "node_count": len(compiled.execution_order),
+                "memory_persisted": compiled.uses_session_memory and bool(session_context)
             }
             
         except Exception as e:
@@ -88,8 +217,10 @@ class WorkflowRunner:
                 "error": str(e),
                 "error_type": type(e).__name__,
                 "status": "failed",
-                "execution_order": list(self.builder.nodes.keys()) if hasattr(self.builder, 'nodes') else []
+                "execution_order": compiled.execution_order if compiled else list(self.builder.nodes.keys())
             }
+        finally:
+            self._finish_recording(recorder)
     
     async def execute_workflow_stream(
         self,
@@ -98,10 +229,12 @@ class WorkflowRunner:
         session_context: Optional[Dict[str, Any]] = None
     ) -> AsyncGenerator[Dict[str, Any], None]:
         """Execute workflow with streaming output"""
+        recorder = self._start_recording(workflow_data, input_text)
+        config = {"callbacks": [recorder]} if recorder else None
         try:
             # Build the chain
             yield {"type": "status", "message": "Building workflow..."}
-            chain = self.builder.build_from_flow(workflow_data)
+            chain = self.compile(workflow_data).chain
             
             # Setup streaming
             yield {"type": "status", "message": "Initializing stream..."}
@@ -112,9 +245,15 @@ class WorkflowRunner:
             if hasattr(chain, 'astream'):
                 # Stream tokens
                 full_response = ""
-                async for chunk in chain.astream(chain_input):
+                async for chunk in chain.astream(chain_input, config=config):
+                    if isinstance(chunk, dict) and chunk.get("type") == "progress":
+                        # Long-running nodes (e.g. ingestion) report progress as they go
+                        yield chunk
+                        continue
                     if isinstance(chunk, dict):
                         token = chunk.get("output", chunk.get("text", ""))
+                    elif isinstance(chunk, BaseMessage):
+                        token = chunk.content
                     else:
                         token = str(chunk)
                     
@@ -127,9 +266,9 @@ class WorkflowRunner:
                 yield {"type": "status", "message": "Executing (non-streaming)..."}
                 
                 if hasattr(chain, 'ainvoke'):
-                    result = await chain.ainvoke(chain_input)
+                    result = await chain.ainvoke(chain_input, config=config)
                 elif hasattr(chain, 'invoke'):
-                    result = await asyncio.to_thread(chain.invoke, chain_input)
+                    result = await asyncio.to_thread(chain.invoke, chain_input, config)
                 else:
                     result = str(chain)
                 
@@ -137,6 +276,8 @@ class WorkflowRunner:
                 
         except Exception as e:
             yield {"type": "error", "error": str(e), "error_type": type(e).__name__}
+        finally:
+            self._finish_recording(recorder)
     
     def _prepare_chain_input(self, input_text: str, session_context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
         """Prepare input for chain execution"""
@@ -144,10 +285,16 @@ class WorkflowRunner:
         
         # Add session context if available
         if session_context:
-            if "messages" in session_context:
-                # Format chat history
+            if session_context.get("id"):
+                # Lets session-bound memory nodes find their history
+                chain_input[SESSION_ID_KEY] = session_context["id"]
+            messages = session_context.get("messages")
+            if isinstance(messages, MessageLog):
+                # Rendered incrementally by the log (last 10 exchanges)
+                chain_input["chat_history"] = messages.chat_history
+            elif messages:
                 chat_history = []
-                for msg in session_context["messages"][-10:]:  # Last 10 messages
+                for msg in messages[-10:]:  # Last 10 messages
                     chat_history.append(f"Human: {msg['human']}")
                     chat_history.append(f"AI: {msg['ai']}")
                 
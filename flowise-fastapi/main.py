@@ -1,8 +1,16 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from api.routers import workflows, nodes
+from api.routers import workflows, nodes, files
 from core.config import get_settings, setup_logging, setup_langsmith, validate_api_keys
 from core.node_discovery import discover_nodes
+from core.http_fetch import get_http_fetcher
+from core.pdf_loader import shutdown_pdf_executor
+from core.embedding_batcher import shutdown_embedding_batchers
+from core.chroma_registry import preload_chroma_collections
+from core.session_store import get_session_store, run_session_sweeper
 
 # Initialize settings and setup
 settings = get_settings()
@@ -14,11 +22,33 @@ validate_api_keys(settings)
 print("🔍 Discovering available nodes...")
 discover_nodes()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background sweeper for idle sessions
+    sweeper = None
+    store = get_session_store()
+    if store.needs_sweeping and settings.SESSION_SWEEP_INTERVAL_SECONDS > 0:
+        sweeper = asyncio.create_task(
+            run_session_sweeper(store, settings.SESSION_SWEEP_INTERVAL_SECONDS)
+        )
+    # Open warm vector collections before the first retrieval needs them
+    preloaded = await asyncio.to_thread(preload_chroma_collections)
+    if preloaded:
+        print(f"📚 Preloaded Chroma collections: {', '.join(preloaded)}")
+    yield
+    if sweeper:
+        sweeper.cancel()
+    store.close()
+    await get_http_fetcher().aclose()
+    shutdown_pdf_executor()
+    shutdown_embedding_batchers()
+
 app = FastAPI(
     title=settings.APP_NAME,
     description="LangChain, LangGraph ve FastAPI ile güçlendirilmiş, Flowise benzeri bir workflow motoru.",
     version=settings.VERSION,
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -33,6 +63,7 @@ app.add_middleware(
 # Include API routers
 app.include_router(workflows.router, prefix="/api/v1/workflows", tags=["Workflows"])
 app.include_router(nodes.router, prefix="/api/v1/nodes", tags=["Nodes"])
+app.include_router(files.router, prefix="/api/v1/files", tags=["Files"])
 
 # Health check endpoint
 @app.get("/", tags=["Health Check"])
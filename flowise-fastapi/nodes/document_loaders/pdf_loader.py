@@ -1,34 +1,44 @@
 
-from typing import List
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_core.documents import Document
-from langchain_core.runnables import Runnable
+from typing import Optional
+from langchain_core.document_loaders import BaseLoader
+from core.parse_cache import CachedLoader, get_parse_cache
+from core.pdf_loader import LazyPdfLoader
+from core.uploads import resolve_file_path
 from ..base import ProviderNode, NodeInput, NodeType
 
 class PDFLoaderNode(ProviderNode):
     _metadatas = {
         "name": "PDFLoader",
-        "description": "Loads a PDF file and extracts its content into documents.",
+        "description": "Loads a PDF file page by page and extracts its content into documents.",
         "node_type": NodeType.PROVIDER,
         "inputs": [
-            NodeInput(name="file_path", type="string", description="The absolute path to the PDF file.", required=True, is_connection=False),
+            NodeInput(name="file_path", type="string", description="The absolute path to the PDF file, or an upload handle (upload://<sha256>) from /api/v1/files.", required=True, is_connection=False),
+            NodeInput(name="pages", type="string", description="Pages to load, e.g. '1-5,9,20-' (default: all).", required=False, is_connection=False),
+            NodeInput(name="max_pages", type="number", description="Stop after this many pages.", required=False, is_connection=False),
+            NodeInput(name="parallel", type="boolean", description="Extract large selections across worker processes.", required=False, default=True, is_connection=False),
         ],
-        "outputs": [{"name": "documents", "type": "List[Document]", "description": "A list of documents extracted from the PDF."}]
+        "outputs": [{"name": "documents", "type": "List[Document]", "description": "One document per page, produced lazily."}]
     }
 
-    def _execute(self, file_path: str = None) -> Runnable:
+    def _execute(self, file_path: str = None, pages: Optional[str] = None, max_pages: Optional[int] = None, parallel: bool = True, **kwargs) -> BaseLoader:
         if not file_path:
             raise ValueError("PDF file path is required.")
-        
-        # For security and practical reasons, we need to handle file uploads properly.
-        # In a real web application, this would involve receiving a file stream,
-        # saving it to a temporary location, and then passing that path to the loader.
-        # For now, we'll assume the file path is accessible on the local filesystem.
-        
+
         try:
-            loader = PyPDFLoader(file_path)
-            return loader
+            # Uploaded files are referenced by handle; plain paths pass through unchanged
+            source = file_path
+            file_path = resolve_file_path(file_path)
+
+            # Pages are extracted lazily, so downstream consumers only pay for what they read
+            max_pages = int(max_pages) if max_pages else None
+            loader = LazyPdfLoader(file_path, pages=pages, max_pages=max_pages, parallel=parallel)
+            
+            # Same bytes + same page selection = same documents, whatever the file is called
+            cache = get_parse_cache()
+            if cache is None:
+                return loader
+            key = cache.key_for_file(file_path, "pdf", {"pages": pages, "max_pages": max_pages})
+            return CachedLoader(loader, cache, key, metadata={"source": source})
         except Exception as e:
             # Proper error handling is crucial.
             raise ValueError(f"Failed to load or process the PDF file at {file_path}. Error: {e}")
-
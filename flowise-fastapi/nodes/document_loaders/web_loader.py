@@ -1,7 +1,23 @@
-from typing import Dict, Any, List
+import json
+from typing import Dict, Any, Iterator, List, Optional
 from nodes.base import ProviderNode, NodeInput, NodeType
-from langchain_community.document_loaders import WebBaseLoader
 from langchain.schema import Document
+from langchain_core.document_loaders import BaseLoader
+from core.http_cache import HttpCache, get_http_cache
+from core.parse_cache import get_parse_cache
+from core.web_loaders import HttpSitemapLoader, HttpWebLoader
+
+def _parse_headers(headers_input: Any) -> Dict[str, str]:
+    """Custom HTTP headers from a JSON string or dict"""
+    if isinstance(headers_input, dict):
+        return dict(headers_input)
+    headers = {}
+    if headers_input:
+        try:
+            headers = json.loads(headers_input)
+        except json.JSONDecodeError:
+            print(f"Warning: Invalid JSON in headers, using empty headers")
+    return headers
 
 class WebLoaderNode(ProviderNode):
     """
@@ -36,58 +52,66 @@ class WebLoaderNode(ProviderNode):
                     description="Custom HTTP headers as JSON string",
                     required=False,
                     is_connection=False
+                ),
+                NodeInput(
+                    name="max_bytes",
+                    type="number",
+                    description="Maximum bytes to read per page (default: HTTP_MAX_RESPONSE_BYTES)",
+                    required=False,
+                    is_connection=False
+                ),
+                NodeInput(
+                    name="main_content_only",
+                    type="boolean",
+                    description="Keep only the page's main content (<main>/<article>) when the page marks it",
+                    required=False,
+                    default=True,
+                    is_connection=False
+                ),
+                NodeInput(
+                    name="strip_boilerplate",
+                    type="boolean",
+                    description="Strip navigation, headers, footers and other boilerplate",
+                    required=False,
+                    default=True,
+                    is_connection=False
                 )
             ]
         }
     
-    async def _execute(self, inputs: Dict[str, Any]) -> List[Document]:
+    def _execute(self, **inputs) -> BaseLoader:
         """
-        Web sayfalarından içerik yükle
+        Web sayfalarından içerik yükleyen loader'ı oluştur (sayfalar eşzamanlı çekilir)
         """
         urls_input = inputs.get("urls", "")
         verify_ssl = inputs.get("verify_ssl", True)
         headers_input = inputs.get("headers", "{}")
+        max_bytes = inputs.get("max_bytes")
         
         # URLs'i parse et
         if isinstance(urls_input, str):
             urls = [url.strip() for url in urls_input.split(",") if url.strip()]
+        elif isinstance(urls_input, list):
+            urls = [str(url).strip() for url in urls_input if str(url).strip()]
         else:
             urls = [str(urls_input)]
         
         if not urls:
             raise ValueError("At least one URL must be provided")
         
-        # Headers'ı parse et
-        headers = {}
-        if headers_input:
-            try:
-                import json
-                headers = json.loads(headers_input)
-            except json.JSONDecodeError:
-                print(f"Warning: Invalid JSON in headers, using empty headers")
+        headers = _parse_headers(headers_input)
         
-        # Default user agent
-        if not headers.get("User-Agent"):
-            headers["User-Agent"] = "Mozilla/5.0 (compatible; FlowiseBot/1.0)"
-        
-        try:
-            # Web loader oluştur
-            loader = WebBaseLoader(
-                web_paths=urls,
-                verify_ssl=verify_ssl,
-                header_template=headers
-            )
-            
-            # Belgeleri yükle
-            documents = loader.load()
-            
-            print(f"✅ Loaded {len(documents)} documents from {len(urls)} URLs")
-            
-            return documents
-            
-        except Exception as e:
-            print(f"❌ Web loading failed: {str(e)}")
-            raise ValueError(f"Failed to load web content: {str(e)}")
+        loader = HttpWebLoader(
+            urls=urls,
+            headers=headers,
+            verify_ssl=verify_ssl,
+            max_bytes=int(max_bytes) if max_bytes else None,
+            main_content=inputs.get("main_content_only", True),
+            strip_boilerplate=inputs.get("strip_boilerplate", True),
+            parse_cache=get_parse_cache()
+        )
+        print(f"✅ Web loader ready for {len(urls)} URLs")
+        return loader
 
 class SitemapLoaderNode(ProviderNode):
     """
@@ -122,44 +146,95 @@ class SitemapLoaderNode(ProviderNode):
                     required=False,
                     default=10,
                     is_connection=False
+                ),
+                NodeInput(
+                    name="headers",
+                    type="string",
+                    description="Custom HTTP headers as JSON string",
+                    required=False,
+                    is_connection=False
+                ),
+                NodeInput(
+                    name="main_content_only",
+                    type="boolean",
+                    description="Keep only the page's main content (<main>/<article>) when the page marks it",
+                    required=False,
+                    default=True,
+                    is_connection=False
+                ),
+                NodeInput(
+                    name="strip_boilerplate",
+                    type="boolean",
+                    description="Strip navigation, headers, footers and other boilerplate",
+                    required=False,
+                    default=True,
+                    is_connection=False
                 )
             ]
         }
     
-    async def _execute(self, inputs: Dict[str, Any]) -> List[Document]:
+    def _execute(self, **inputs) -> BaseLoader:
         """
-        Sitemap'den URL'leri keşfet ve içerik yükle
+        Sitemap'den URL'leri keşfedip içerik yükleyen loader'ı oluştur
         """
         sitemap_url = inputs.get("sitemap_url")
         filter_pattern = inputs.get("filter_urls")
-        limit = int(inputs.get("limit", 10))
+        limit = int(inputs.get("limit", 10) or 0)
         
         if not sitemap_url:
             raise ValueError("Sitemap URL is required")
         
+        # Limit ve filtre sayfalar çekilmeden önce uygulanır
+        return HttpSitemapLoader(
+            sitemap_url=sitemap_url,
+            filter_urls=[filter_pattern] if filter_pattern else None,
+            limit=limit,
+            headers=_parse_headers(inputs.get("headers")),
+            main_content=inputs.get("main_content_only", True),
+            strip_boilerplate=inputs.get("strip_boilerplate", True),
+            parse_cache=get_parse_cache()
+        )
+
+class CachedYoutubeLoader(BaseLoader):
+    """
+    YouTube transcript loader; transcripts go through the shared HTTP cache
+    under a synthetic URL
+    """
+    
+    def __init__(self, video_id: str, language: str = "en", add_video_info: bool = True, cache: Optional[HttpCache] = None):
+        self.video_id = video_id
+        self.language = language
+        self.add_video_info = add_video_info
+        self.cache = cache
+    
+    @property
+    def cache_url(self) -> str:
+        return f"youtube://{self.video_id}?language={self.language}&video_info={self.add_video_info}"
+    
+    def lazy_load(self) -> Iterator[Document]:
+        cached = self.cache.read_fresh(self.cache_url) if self.cache else None
+        if cached is not None:
+            print(f"✅ Loaded cached transcript for YouTube video: {self.video_id}")
+            yield from (Document(**item) for item in json.loads(cached))
+            return
+        
         try:
-            from langchain_community.document_loaders import SitemapLoader
-            
-            # Sitemap loader oluştur
-            loader = SitemapLoader(
-                web_path=sitemap_url,
-                filter_urls=[filter_pattern] if filter_pattern else None
-            )
-            
-            # Belgeleri yükle (limit ile)
-            documents = loader.load()
-            
-            # Limit uygula
-            if limit > 0:
-                documents = documents[:limit]
-            
-            print(f"✅ Loaded {len(documents)} documents from sitemap")
-            
-            return documents
+            from langchain_community.document_loaders import YoutubeLoader
             
+            documents = YoutubeLoader(
+                video_id=self.video_id,
+                language=self.language,
+                add_video_info=self.add_video_info
+            ).load()
         except Exception as e:
-            print(f"❌ Sitemap loading failed: {str(e)}")
-            raise ValueError(f"Failed to load sitemap content: {str(e)}")
+            print(f"❌ YouTube loading failed: {str(e)}")
+            raise ValueError(f"Failed to load YouTube transcript: {str(e)}")
+        
+        if self.cache:
+            payload = [{"page_content": d.page_content, "metadata": d.metadata} for d in documents]
+            self.cache.put(self.cache_url, json.dumps(payload).encode("utf-8"), headers={"content-type": "application/json"})
+        print(f"✅ Loaded transcript from YouTube video: {self.video_id}")
+        yield from documents
 
 class YoutubeLoaderNode(ProviderNode):
     """
@@ -199,40 +274,21 @@ class YoutubeLoaderNode(ProviderNode):
             ]
         }
     
-    async def _execute(self, inputs: Dict[str, Any]) -> List[Document]:
+    def _execute(self, **inputs) -> BaseLoader:
         """
-        YouTube videosundan transcript yükle
+        YouTube videosundan transcript yükleyen loader'ı oluştur
         """
         video_url = inputs.get("video_url")
-        language = inputs.get("language", "en")
-        add_video_info = inputs.get("add_video_info", True)
         
         if not video_url:
             raise ValueError("Video URL is required")
         
-        try:
-            from langchain_community.document_loaders import YoutubeLoader
-            
-            # Video ID'yi extract et
-            video_id = self._extract_video_id(video_url)
-            
-            # YouTube loader oluştur
-            loader = YoutubeLoader(
-                video_id=video_id,
-                language=language,
-                add_video_info=add_video_info
-            )
-            
-            # Transcript'i yükle
-            documents = loader.load()
-            
-            print(f"✅ Loaded transcript from YouTube video: {video_id}")
-            
-            return documents
-            
-        except Exception as e:
-            print(f"❌ YouTube loading failed: {str(e)}")
-            raise ValueError(f"Failed to load YouTube transcript: {str(e)}")
+        return CachedYoutubeLoader(
+            video_id=self._extract_video_id(video_url),
+            language=inputs.get("language") or "en",
+            add_video_info=inputs.get("add_video_info", True),
+            cache=get_http_cache()
+        )
     
     def _extract_video_id(self, url: str) -> str:
         """
@@ -0,0 +1,88 @@
+
+import hashlib
+import os
+from typing import Optional
+from langchain_core.embeddings import Embeddings
+from core.config import get_settings
+from core.embedding_batcher import BatchedEmbeddings, get_embedding_batcher
+from core.embedding_cache import PROVIDER_LIMITS, CachedEmbeddings, get_embedding_cache
+from core.hashing_embeddings import HashingEmbeddings
+from ..base import ProviderNode, NodeInput, NodeType
+
+DEFAULT_MODELS = {
+    "openai": "text-embedding-3-small",
+    "google": "models/text-embedding-004",
+    "hashing": "hashing",
+}
+
+class EmbeddingsNode(ProviderNode):
+    _metadatas = {
+        "name": "Embeddings",
+        "description": "Provides an embedding function with batched requests and a persistent content-hash cache.",
+        "node_type": NodeType.PROVIDER,
+        "inputs": [
+            NodeInput(name="provider", type="string", description=f"Embedding backend: {', '.join(PROVIDER_LIMITS)}. 'hashing' runs locally without an API key.", required=False, default="hashing"),
+            NodeInput(name="model_name", type="string", description="Embedding model (default depends on the provider).", required=False),
+            NodeInput(name="api_key", type="string", description="Provider API key. If not provided, it is taken from OPENAI_API_KEY / GOOGLE_API_KEY.", required=False),
+            NodeInput(name="dimensions", type="int", description="Vector size of the hashing backend.", required=False, default=512),
+            NodeInput(name="batch_size", type="int", description="Maximum texts per provider request (capped at the provider limit).", required=False),
+            NodeInput(name="use_cache", type="boolean", description="Reuse vectors of previously embedded texts from the on-disk cache.", required=False, default=True),
+            NodeInput(name="micro_batch", type="boolean", description="Coalesce concurrent requests from all executions into shared batched calls.", required=False, default=True),
+        ],
+        "outputs": [{"name": "embeddings", "type": "Embeddings", "description": "Embedding function for vector stores and retrievers."}]
+    }
+
+    def _execute(
+        self,
+        provider: str = "hashing",
+        model_name: Optional[str] = None,
+        api_key: Optional[str] = None,
+        dimensions: int = 512,
+        batch_size: Optional[int] = None,
+        use_cache: bool = True,
+        micro_batch: bool = True,
+        **kwargs
+    ) -> Embeddings:
+        provider = (provider or "hashing").lower()
+        if provider not in PROVIDER_LIMITS:
+            raise ValueError(f"Unknown embedding provider '{provider}'. Expected one of: {', '.join(PROVIDER_LIMITS)}")
+        model_name = model_name or DEFAULT_MODELS[provider]
+        max_batch_size, max_batch_tokens = PROVIDER_LIMITS[provider]
+        if batch_size:
+            max_batch_size = min(int(batch_size), max_batch_size)
+
+        if provider == "openai":
+            from langchain_openai import OpenAIEmbeddings
+
+            api_key = api_key or os.getenv("OPENAI_API_KEY")
+            if not api_key:
+                raise ValueError("OpenAI API Key is required.")
+            # Batches are sized here; keep the client from re-splitting them
+            embeddings = OpenAIEmbeddings(model=model_name, openai_api_key=api_key, chunk_size=max_batch_size)
+        elif provider == "google":
+            from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+            api_key = api_key or os.getenv("GOOGLE_API_KEY")
+            if not api_key:
+                raise ValueError("Google API Key is required.")
+            embeddings = GoogleGenerativeAIEmbeddings(model=model_name, google_api_key=api_key)
+        else:
+            dimensions = int(dimensions)
+            embeddings = HashingEmbeddings(dimensions=dimensions)
+            model_name = f"hashing-{dimensions}"
+
+        namespace = f"{provider}/{model_name}"
+        cached = CachedEmbeddings(
+            embeddings,
+            namespace=namespace,
+            cache=get_embedding_cache() if use_cache else None,
+            max_batch_size=max_batch_size,
+            max_batch_tokens=max_batch_tokens
+        )
+        if not micro_batch or get_settings().EMBEDDING_BATCH_MAX_SIZE <= 0:
+            return cached
+
+        # Executions share a batcher only when they would make the same provider call
+        credentials = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:12]
+        key = f"{namespace}|{credentials}|{max_batch_size}|{'cache' if use_cache else 'nocache'}"
+        return BatchedEmbeddings(get_embedding_batcher(key, cached))
@@ -0,0 +1,29 @@
+
+from ..base import ProviderNode, NodeInput, NodeType
+from core.fake_providers import FakeChatModel, FakeLLM, FAKE_MODEL_INPUTS, build_behaviour
+from langchain_core.runnables import Runnable
+
+class FakeChatModelNode(ProviderNode):
+    _metadatas = {
+        "name": "FakeChatModel",
+        "description": "Provides a deterministic fake chat model for offline load testing.",
+        "category": "Testing",
+        "node_type": NodeType.PROVIDER,
+        "inputs": FAKE_MODEL_INPUTS,
+    }
+
+    def _execute(self, **kwargs) -> Runnable:
+        return FakeChatModel(behaviour=build_behaviour(**kwargs))
+
+
+class FakeLLMNode(ProviderNode):
+    _metadatas = {
+        "name": "FakeLLM",
+        "description": "Provides a deterministic fake text-completion LLM for offline load testing.",
+        "category": "Testing",
+        "node_type": NodeType.PROVIDER,
+        "inputs": FAKE_MODEL_INPUTS,
+    }
+
+    def _execute(self, **kwargs) -> Runnable:
+        return FakeLLM(behaviour=build_behaviour(**kwargs))
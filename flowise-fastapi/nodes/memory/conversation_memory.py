@@ -1,12 +1,12 @@
 
 from ..base import ProviderNode, NodeMetadata, NodeInput, NodeType
-from langchain.memory import ConversationBufferWindowMemory
+from core.session_memory import SessionBufferMemory
 from langchain_core.runnables import Runnable
 
 class ConversationMemoryNode(ProviderNode):
     _metadatas = {
         "name": "ConversationMemory",
-        "description": "Provides a conversation buffer window memory.",
+        "description": "Provides a conversation buffer window memory backed by the session store.",
         "node_type": NodeType.PROVIDER,
         "inputs": [
             NodeInput(name="k", type="int", description="The number of messages to keep in the buffer.", default=5),
@@ -15,8 +15,10 @@ class ConversationMemoryNode(ProviderNode):
     }
 
     def _execute(self, k: int = 5, memory_key: str = "chat_history") -> Runnable:
-        return ConversationBufferWindowMemory(
-            k=k, 
-            memory_key=memory_key, 
+        # History is loaded from (and appended to) the session named by the
+        # `session_id` chain input, so the memory survives between requests
+        return SessionBufferMemory(
+            k=int(k),
+            memory_key=memory_key,
             return_messages=True
         )
@@ -0,0 +1,35 @@
+
+from ..base import ProviderNode, NodeMetadata, NodeInput, NodeType
+from core.token_memory import TokenBudgetMemory
+from langchain_core.runnables import Runnable
+
+class TokenBudgetMemoryNode(ProviderNode):
+    _metadatas = {
+        "name": "TokenBudgetMemory",
+        "description": "Session conversation memory with a token budget: recent turns verbatim plus a rolling summary of older turns, saved on the session.",
+        "node_type": NodeType.PROVIDER,
+        "inputs": [
+            NodeInput(name="llm", type="Runnable", description="Model used to summarize older turns. Without it older turns are kept as a truncated transcript.", is_connection=True, required=False),
+            NodeInput(name="max_token_limit", type="int", description="Maximum tokens returned by the memory (summary + recent turns).", default=2000),
+            NodeInput(name="summary_token_limit", type="int", description="Maximum tokens of the rolling summary.", default=400),
+            NodeInput(name="memory_key", type="string", description="The key for the memory in the chat history.", default="chat_history"),
+            NodeInput(name="encoding_name", type="string", description="tiktoken encoding used to count tokens.", default="cl100k_base", required=False)
+        ]
+    }
+
+    def _execute(
+        self,
+        llm: Runnable = None,
+        max_token_limit: int = 2000,
+        summary_token_limit: int = 400,
+        memory_key: str = "chat_history",
+        encoding_name: str = "cl100k_base"
+    ) -> Runnable:
+        return TokenBudgetMemory(
+            llm=llm,
+            max_token_limit=int(max_token_limit),
+            summary_token_limit=int(summary_token_limit),
+            memory_key=memory_key,
+            encoding_name=encoding_name or None,
+            return_messages=True
+        )
@@ -0,0 +1,35 @@
+
+from ..base import ProviderNode, NodeMetadata, NodeInput, NodeType
+from core.vector_memory import VectorRetrieverMemory
+from langchain_core.runnables import Runnable
+
+class VectorMemoryNode(ProviderNode):
+    _metadatas = {
+        "name": "VectorMemory",
+        "description": "Session memory that retrieves the past exchanges most relevant to the current input.",
+        "node_type": NodeType.PROVIDER,
+        "inputs": [
+            NodeInput(name="embeddings", type="Embeddings", description="Embeddings used to index turns. Defaults to local hashing embeddings.", is_connection=True, required=False),
+            NodeInput(name="k", type="int", description="The number of relevant past exchanges to retrieve.", default=4),
+            NodeInput(name="recent_k", type="int", description="The number of latest exchanges always included.", default=2),
+            NodeInput(name="max_turns", type="int", description="Maximum exchanges indexed per session.", default=1000, required=False),
+            NodeInput(name="memory_key", type="string", description="The key for the memory in the chat history.", default="chat_history")
+        ]
+    }
+
+    def _execute(
+        self,
+        embeddings=None,
+        k: int = 4,
+        recent_k: int = 2,
+        max_turns: int = 1000,
+        memory_key: str = "chat_history"
+    ) -> Runnable:
+        return VectorRetrieverMemory(
+            embeddings=embeddings,
+            k=int(k),
+            recent_k=int(recent_k),
+            max_turns=int(max_turns),
+            memory_key=memory_key,
+            return_messages=True
+        )
@@ -1,10 +1,11 @@
 
 from ..base import ProcessorNode, NodeInput, NodeType
-from langchain_community.vectorstores import Chroma
 from langchain_core.vectorstores import VectorStoreRetriever
 from langchain_core.runnables import Runnable
 from typing import Dict, Any
 
+from core.chroma_registry import get_chroma_registry
+
 class ChromaRetrieverNode(ProcessorNode):
     _metadatas = {
         "name": "ChromaRetriever",
@@ -19,8 +20,14 @@ class ChromaRetrieverNode(ProcessorNode):
             NodeInput(
                 name="embedding_function",
                 type="object",
-                description="The embedding function to use.",
+                description="The embedding function to use (e.g. from an Embeddings node).",
                 is_connection=True
+            ),
+            NodeInput(
+                name="persist_directory",
+                type="string",
+                description="Chroma directory, relative to and inside CHROMA_PERSIST_DIRECTORY (default: CHROMA_PERSIST_DIRECTORY).",
+                required=False
             )
         ]
     }
@@ -32,5 +39,8 @@ class ChromaRetrieverNode(ProcessorNode):
         if not embedding_function:
             raise ValueError("Embedding function must be provided as connected node")
         
-        vectorstore = Chroma(collection_name=collection_name, embedding_function=embedding_function)
+        # Client and collection handle are shared across builds and requests
+        vectorstore = get_chroma_registry().vectorstore(
+            collection_name, embedding_function, directory=inputs.get("persist_directory")
+        )
         return vectorstore.as_retriever()
@@ -0,0 +1,77 @@
+from ..base import ProcessorNode, NodeInput, NodeType
+from langchain_core.runnables import Runnable
+from typing import Dict, Any
+import json
+
+from core.bm25_index import HybridRetriever, get_bm25_index
+from core.vector_index import get_vector_index
+
+class HybridRetrieverNode(ProcessorNode):
+    _metadatas = {
+        "name": "HybridRetriever",
+        "description": "Combines BM25 keyword search (exact terms, product codes) with vector search over the same collection using reciprocal rank fusion.",
+        "node_type": NodeType.PROCESSOR,
+        "inputs": [
+            NodeInput(
+                name="collection_name",
+                type="string",
+                description="The collection ingested with ChromaIngestion (backend 'hybrid' or 'vector_index')."
+            ),
+            NodeInput(
+                name="embedding_function",
+                type="object",
+                description="The embedding function the collection was ingested with.",
+                is_connection=True
+            ),
+            NodeInput(
+                name="k",
+                type="int",
+                description="Number of documents to return.",
+                required=False,
+                default=4
+            ),
+            NodeInput(
+                name="fetch_k",
+                type="int",
+                description="Candidates taken from each ranking before fusion.",
+                required=False,
+                default=20
+            ),
+            NodeInput(
+                name="filter",
+                type="string",
+                description='Metadata filter as JSON, e.g. {"source": "a.pdf"}.',
+                required=False
+            )
+        ]
+    }
+
+    def _execute(self, inputs: Dict[str, Any], connected_nodes: Dict[str, Runnable]) -> Runnable:
+        collection_name = inputs.get("collection_name", "default_collection")
+        embedding_function = connected_nodes.get("embedding_function")
+
+        if not embedding_function:
+            raise ValueError("Embedding function must be provided as connected node")
+
+        where = inputs.get("filter")
+        if isinstance(where, str):
+            try:
+                where = json.loads(where) if where.strip() else None
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid filter JSON: {e}")
+
+        vectors = get_vector_index(collection_name)
+        keywords = get_bm25_index(collection_name)
+        # Rows ingested without the keyword index (or before it existed); searches keep it topped up
+        added = keywords.top_up(vectors)
+        if added:
+            print(f"📥 Indexed {added} documents for keyword search in '{collection_name}'")
+
+        return HybridRetriever(
+            vectors=vectors,
+            keywords=keywords,
+            embeddings=embedding_function,
+            k=int(inputs.get("k", 4)),
+            fetch_k=int(inputs.get("fetch_k", 20)),
+            where=where
+        )
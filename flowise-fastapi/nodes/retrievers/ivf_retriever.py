@@ -0,0 +1,58 @@
+from ..base import ProcessorNode, NodeInput, NodeType
+from langchain_core.runnables import Runnable
+from typing import Dict, Any
+
+from core.ivf_index import IVFRetriever, get_ivf_index
+
+class IVFRetrieverNode(ProcessorNode):
+    _metadatas = {
+        "name": "IVFRetriever",
+        "description": "Approximate search over a compressed (int8, inverted-file) index for very large collections. Build it offline with `python -m core.ivf_index <collection>`.",
+        "node_type": NodeType.PROCESSOR,
+        "inputs": [
+            NodeInput(
+                name="collection_name",
+                type="string",
+                description="The vector index collection the IVF index was built from."
+            ),
+            NodeInput(
+                name="embedding_function",
+                type="object",
+                description="The embedding function the collection was ingested with.",
+                is_connection=True
+            ),
+            NodeInput(
+                name="k",
+                type="int",
+                description="Number of documents to return.",
+                required=False,
+                default=4
+            ),
+            NodeInput(
+                name="nprobe",
+                type="int",
+                description="Inverted lists searched per query; higher is slower but finds more of the true top-k.",
+                required=False,
+                default=8
+            )
+        ]
+    }
+
+    def _execute(self, inputs: Dict[str, Any], connected_nodes: Dict[str, Runnable]) -> Runnable:
+        collection_name = inputs.get("collection_name", "default_collection")
+        embedding_function = connected_nodes.get("embedding_function")
+
+        if not embedding_function:
+            raise ValueError("Embedding function must be provided as connected node")
+
+        nprobe = int(inputs.get("nprobe", 8))
+        if nprobe < 1:
+            raise ValueError("nprobe must be at least 1")
+
+        return IVFRetriever(
+            index=get_ivf_index(collection_name),
+            follow_rebuilds=True,
+            embeddings=embedding_function,
+            k=int(inputs.get("k", 4)),
+            nprobe=nprobe
+        )
@@ -0,0 +1,70 @@
+from ..base import ProcessorNode, NodeInput, NodeType
+from langchain_core.runnables import Runnable
+from typing import Dict, Any
+import json
+
+from core.chroma_registry import get_chroma_registry
+from core.vector_index import VectorIndexRetriever, get_vector_index
+
+class VectorIndexRetrieverNode(ProcessorNode):
+    _metadatas = {
+        "name": "VectorIndexRetriever",
+        "description": "Exact in-process vector search over a memory-mapped NumPy index; a drop-in for ChromaRetriever on small and medium corpora.",
+        "node_type": NodeType.PROCESSOR,
+        "inputs": [
+            NodeInput(
+                name="collection_name",
+                type="string",
+                description="The name of the index (and of the Chroma collection to import on first use)."
+            ),
+            NodeInput(
+                name="embedding_function",
+                type="object",
+                description="The embedding function to use (e.g. from an Embeddings node).",
+                is_connection=True
+            ),
+            NodeInput(
+                name="k",
+                type="int",
+                description="Number of documents to return.",
+                required=False,
+                default=4
+            ),
+            NodeInput(
+                name="filter",
+                type="string",
+                description='Metadata filter as JSON, e.g. {"source": "a.pdf"} or {"lang": ["en", "de"]}.',
+                required=False
+            ),
+            NodeInput(
+                name="persist_directory",
+                type="string",
+                description="Chroma directory to import from when the index is empty, relative to and inside CHROMA_PERSIST_DIRECTORY (default: CHROMA_PERSIST_DIRECTORY).",
+                required=False
+            )
+        ]
+    }
+
+    def _execute(self, inputs: Dict[str, Any], connected_nodes: Dict[str, Runnable]) -> Runnable:
+        collection_name = inputs.get("collection_name", "default_collection")
+        embedding_function = connected_nodes.get("embedding_function")
+
+        if not embedding_function:
+            raise ValueError("Embedding function must be provided as connected node")
+
+        where = inputs.get("filter")
+        if isinstance(where, str):
+            try:
+                where = json.loads(where) if where.strip() else None
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid filter JSON: {e}")
+
+        index = get_vector_index(collection_name)
+        if not len(index):
+            # First use of a collection ingested into Chroma: copy it over once
+            collection = get_chroma_registry().collection(collection_name, inputs.get("persist_directory"))
+            if collection.count():
+                imported = index.import_collection(collection)
+                print(f"📥 Imported {imported} vectors from Chroma collection '{collection_name}'")
+
+        return VectorIndexRetriever(index=index, embeddings=embedding_function, k=int(inputs.get("k", 4)), where=where)
@@ -0,0 +1,46 @@
+
+from typing import Any, List, Optional
+from langchain_core.document_loaders import BaseLoader
+from core.text_splitter import SPLIT_MODES, ChunkSplitter, SplitLoader
+from ..base import ProviderNode, NodeInput, NodeType
+
+class TextSplitterNode(ProviderNode):
+    _metadatas = {
+        "name": "TextSplitter",
+        "description": "Splits documents into overlapping chunks by characters (recursive) or by tokens.",
+        "node_type": NodeType.PROVIDER,
+        "inputs": [
+            NodeInput(name="documents", type="List[Document]", description="Loaders, documents or texts to split.", is_connection=True),
+            NodeInput(name="mode", type="string", description=f"Chunking mode: {', '.join(SPLIT_MODES)}.", required=False, default="recursive"),
+            NodeInput(name="chunk_size", type="int", description="Maximum chunk size in characters (recursive) or tokens (token).", required=False, default=1000),
+            NodeInput(name="chunk_overlap", type="int", description="Characters or tokens shared by consecutive chunks.", required=False, default=200),
+            NodeInput(name="separators", type="string", description="Comma-separated separators for recursive mode, most significant first (\\n and \\t are unescaped).", required=False),
+            NodeInput(name="encoding_name", type="string", description="tiktoken encoding used in token mode.", required=False, default="cl100k_base"),
+        ],
+        "outputs": [{"name": "documents", "type": "List[Document]", "description": "Chunks with a start_index in their metadata, produced lazily."}]
+    }
+
+    def _execute(
+        self,
+        documents: List[Any] = None,
+        mode: str = "recursive",
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        separators: Optional[str] = None,
+        encoding_name: str = "cl100k_base",
+        **kwargs
+    ) -> BaseLoader:
+        if not documents:
+            raise ValueError("At least one loader or document is required.")
+        if not isinstance(documents, list):
+            documents = [documents]
+        if separators:
+            separators = [s.replace("\\n", "\n").replace("\\t", "\t") for s in separators.split(",")] + [""]
+        splitter = ChunkSplitter(
+            chunk_size=int(chunk_size),
+            chunk_overlap=int(chunk_overlap),
+            mode=mode,
+            separators=separators or None,
+            encoding_name=encoding_name
+        )
+        return SplitLoader(documents, splitter)
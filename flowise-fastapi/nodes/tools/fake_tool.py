@@ -0,0 +1,25 @@
+
+from ..base import ProviderNode, NodeInput, NodeType
+from core.fake_providers import FakeTool, FAKE_LATENCY_INPUTS, build_behaviour
+from langchain_core.runnables import Runnable
+
+class FakeToolNode(ProviderNode):
+    _metadatas = {
+        "name": "FakeTool",
+        "description": "Provides a deterministic fake tool for offline load testing.",
+        "category": "Testing",
+        "node_type": NodeType.PROVIDER,
+        "inputs": [
+            NodeInput(name="name", type="string", description="The tool name the agent calls.", default="fake_search", required=False),
+            NodeInput(name="description", type="string", description="The tool description shown to the agent.", default="Searches a fake index and returns a canned result.", required=False),
+            NodeInput(name="responses", type="string", description="Observations as a JSON list or '||'-separated string. '{input}' is replaced with the tool input.", required=False),
+        ] + FAKE_LATENCY_INPUTS,
+    }
+
+    def _execute(
+        self,
+        name: str = "fake_search",
+        description: str = "Searches a fake index and returns a canned result.",
+        **kwargs
+    ) -> Runnable:
+        return FakeTool(name=name, description=description, behaviour=build_behaviour(**kwargs))
@@ -0,0 +1,115 @@
+from ..base import ProcessorNode, NodeInput, NodeType
+from langchain_core.runnables import Runnable
+from typing import Dict, Any
+
+from core.bm25_index import HybridCollection, get_bm25_index
+from core.chroma_registry import get_chroma_registry
+from core.ingestion import IngestionPipeline
+from core.text_splitter import ChunkSplitter
+from core.vector_index import get_vector_index
+
+class ChromaIngestionNode(ProcessorNode):
+    _metadatas = {
+        "name": "ChromaIngestion",
+        "description": "Streams loader output through split -> embed -> upsert into the Chroma collection used by ChromaRetriever.",
+        "node_type": NodeType.PROCESSOR,
+        "inputs": [
+            NodeInput(
+                name="documents",
+                type="List[Document]",
+                description="Loaders (or documents) to ingest.",
+                is_connection=True
+            ),
+            NodeInput(
+                name="embedding_function",
+                type="object",
+                description="The embedding function to use (e.g. from an Embeddings node).",
+                is_connection=True
+            ),
+            NodeInput(
+                name="collection_name",
+                type="string",
+                description="The name of the Chroma collection to write to."
+            ),
+            NodeInput(
+                name="backend",
+                type="string",
+                description="Where to write: 'chroma' (ChromaRetriever), 'vector_index' (VectorIndexRetriever) or 'hybrid' (vector index plus BM25 keyword index, for HybridRetriever).",
+                required=False,
+                default="chroma"
+            ),
+            NodeInput(
+                name="persist_directory",
+                type="string",
+                description="Chroma directory, relative to and inside CHROMA_PERSIST_DIRECTORY (default: CHROMA_PERSIST_DIRECTORY).",
+                required=False
+            ),
+            NodeInput(
+                name="chunk_size",
+                type="int",
+                description="Chunk size in characters; 0 ingests documents as they are (e.g. after a TextSplitter node).",
+                required=False,
+                default=1000
+            ),
+            NodeInput(
+                name="chunk_overlap",
+                type="int",
+                description="Characters shared by consecutive chunks.",
+                required=False,
+                default=200
+            ),
+            NodeInput(
+                name="batch_size",
+                type="int",
+                description="Chunks embedded and upserted per batch.",
+                required=False,
+                default=256
+            ),
+            NodeInput(
+                name="max_pending_batches",
+                type="int",
+                description="Batches read ahead of the embedder before loading pauses.",
+                required=False,
+                default=2
+            )
+        ],
+        "outputs": [{"name": "output", "type": "Runnable", "description": "Runs the ingestion; streams progress events."}]
+    }
+
+    def _execute(self, inputs: Dict[str, Any], connected_nodes: Dict[str, Runnable]) -> Runnable:
+        collection_name = inputs.get("collection_name", "default_collection")
+        documents = connected_nodes.get("documents") or inputs.get("documents")
+        embedding_function = connected_nodes.get("embedding_function")
+
+        if not documents:
+            raise ValueError("At least one loader must be connected to 'documents'")
+        if not embedding_function:
+            raise ValueError("Embedding function must be provided as connected node")
+        if not isinstance(documents, list):
+            documents = [documents]
+
+        backend = inputs.get("backend") or "chroma"
+        if backend == "chroma":
+            collection_factory = lambda: get_chroma_registry().collection(collection_name, inputs.get("persist_directory"))
+        elif backend == "vector_index":
+            collection_factory = lambda: get_vector_index(collection_name)
+        elif backend == "hybrid":
+            collection_factory = lambda: HybridCollection(get_vector_index(collection_name), get_bm25_index(collection_name))
+        else:
+            raise ValueError(f"Unknown ingestion backend '{backend}'. Expected 'chroma', 'vector_index' or 'hybrid'")
+
+        chunk_size = int(inputs.get("chunk_size", 1000) or 0)
+        splitter = ChunkSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=int(inputs.get("chunk_overlap", 200) or 0)
+        ) if chunk_size > 0 else None
+
+        return IngestionPipeline(
+            sources=documents,
+            embeddings=embedding_function,
+            collection_factory=collection_factory,
+            collection_name=collection_name,
+            splitter=splitter,
+            batch_size=int(inputs.get("batch_size", 256)),
+            max_pending_batches=int(inputs.get("max_pending_batches", 2))
+        )
@@ -0,0 +1,76 @@
+from langchain_core.documents import Document
+
+from core.bm25_index import BM25Index, reciprocal_rank_fusion, tokenize
+from core.hashing_embeddings import HashingEmbeddings
+from core.vector_index import MmapVectorIndex
+from nodes.retrievers.hybrid_retriever import HybridRetrieverNode
+from nodes.vectorstores.chroma_ingestion import ChromaIngestionNode
+
+def test_tokenize_and_fusion():
+    assert tokenize("Order AB-1234 shipped") == ["order", "ab-1234", "ab", "1234", "shipped"]
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]])
+    assert [key for key, _ in fused] == ["a", "c", "b"]
+
+def test_bm25_ranks_updates_incrementally_and_persists(tmp_path):
+    path = str(tmp_path / "bm25.db")
+    index = BM25Index(path)
+    assert index.add(["1", "2", "3"], ["the red widget XK-200", "the blue widget", "red red apples and the rest"]) == 3
+    assert [id_ for id_, _ in index.search("xk-200")] == ["1"]
+    assert [id_ for id_, _ in index.search("red")] == ["3", "1"]
+
+    # Same text again is skipped; changed text replaces the old posting
+    assert index.add(["1"], ["the red widget XK-200"]) == 0
+    assert index.add(["2", "4"], ["the green gadget", "green tea"]) == 2
+    assert index.search("blue") == []
+    assert {id_ for id_, _ in index.search("green")} == {"2", "4"}
+    # Many small batches: the segments of "green" get merged
+    for i in range(12):
+        index.add([f"g{i}"], [f"green item {i}"])
+    assert len(index.search("green", k=100)) == 14
+    index.close()
+
+    reopened = BM25Index(path)
+    assert len(reopened) == 16
+    assert reopened.search("blue") == []
+    assert [id_ for id_, _ in reopened.search("widget")] == ["1"]
+
+def test_hybrid_ingestion_and_retrieval(tmp_path, monkeypatch):
+    indexes = {}
+    def vector_index(name):
+        return indexes.setdefault(("vectors", name), MmapVectorIndex(str(tmp_path / name)))
+    def bm25_index(name):
+        return indexes.setdefault(("bm25", name), BM25Index(str(tmp_path / name / "bm25.db")))
+    for module in ("nodes.vectorstores.chroma_ingestion", "nodes.retrievers.hybrid_retriever"):
+        monkeypatch.setattr(f"{module}.get_vector_index", vector_index)
+        monkeypatch.setattr(f"{module}.get_bm25_index", bm25_index)
+
+    embeddings = HashingEmbeddings(dimensions=64)
+    documents = [
+        Document(page_content=f"Support article {i} about resetting the router and checking cables", metadata={"source": f"kb-{i}"})
+        for i in range(30)
+    ] + [Document(page_content="Replacement part QZ-7781 for the router power supply", metadata={"source": "parts"})]
+    ingestion = ChromaIngestionNode().execute(
+        inputs={"collection_name": "kb", "backend": "hybrid", "chunk_size": 0, "batch_size": 8},
+        connected_nodes={"documents": documents, "embedding_function": embeddings}
+    )
+    assert ingestion.invoke({})["chunks"] == 31
+    assert len(vector_index("kb")) == 31 and len(bm25_index("kb")) == 31
+
+    retriever = HybridRetrieverNode().execute(
+        inputs={"collection_name": "kb", "k": 3},
+        connected_nodes={"embedding_function": embeddings}
+    )
+    results = retriever.batch(["qz-7781", "router cables"])
+    assert results[0][0].metadata["source"] == "parts"
+    assert all(doc.metadata["source"].startswith("kb-") for doc in results[1])
+
+    filtered = HybridRetrieverNode().execute(
+        inputs={"collection_name": "kb", "filter": '{"source": "kb-3"}'},
+        connected_nodes={"embedding_function": embeddings}
+    )
+    assert [doc.metadata["source"] for doc in filtered.invoke("qz-7781 router")] == ["kb-3"]
+
+    # Rows written to the vector index alone are picked up by the next search
+    vector_index("kb").upsert(["late"], embeddings.embed_documents(["Firmware patch ZX-4410"]), ["Firmware patch ZX-4410"], [{"source": "late"}])
+    assert retriever.invoke("zx-4410")[0].metadata["source"] == "late"
+    assert len(bm25_index("kb")) == 32
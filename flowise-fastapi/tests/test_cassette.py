@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from core.cassette import Cassette, CassetteMissError
+from core.node_discovery import get_registry
+from core.workflow_runner import WorkflowRunner
+
+def react_workflow(**llm_data):
+    return {
+        "nodes": [
+            {"id": "llm_1", "type": "FakeChatModel", "data": {"script": "react", "react_steps": 2, **llm_data}},
+            {"id": "tool_1", "type": "FakeTool", "data": {"responses": "observation for {input}", "latency_ms": 5}},
+            {"id": "prompt_1", "type": "AgentPrompt", "data": {}},
+            {"id": "agent_1", "type": "ReactAgent", "data": {}},
+        ],
+        "edges": [
+            {"id": "e1", "source": "llm_1", "target": "agent_1", "targetHandle": "llm"},
+            {"id": "e2", "source": "tool_1", "target": "agent_1", "targetHandle": "tools"},
+            {"id": "e3", "source": "prompt_1", "target": "agent_1", "targetHandle": "prompt"},
+        ],
+    }
+
+def run(workflow, text, cassette):
+    return asyncio.run(WorkflowRunner(get_registry(), cassette=cassette).execute_workflow(workflow, text))
+
+def test_record_then_replay(tmp_path):
+    path = tmp_path / "trace.jsonl.gz"
+    recorded = run(react_workflow(), "ping", Cassette(path, mode="record"))
+    assert recorded["status"] == "completed"
+
+    cassette = Cassette(path, mode="replay", latency_scale=0)
+    kinds = [entry.kind for entry in cassette.entries]
+    assert kinds.count("run") == 1
+    assert kinds.count("chat") == 3
+    assert kinds.count("tool") == 2
+    assert all(entry.latency >= 0.005 for entry in cassette.entries if entry.kind == "tool")
+
+    # A model that would fail on every call proves the replay never reaches it
+    replayed = run(react_workflow(failure_every=1), "ping", cassette)
+    assert replayed["status"] == "completed"
+    assert replayed["result"] == recorded["result"]
+
+def test_replay_streams_recorded_tokens(tmp_path):
+    path = tmp_path / "chat.jsonl.gz"
+    workflow = {"nodes": [{"id": "llm_1", "type": "FakeChatModel", "data": {"tokens_per_second": 500}}], "edges": []}
+
+    async def stream(cassette):
+        runner = WorkflowRunner(get_registry(), cassette=cassette)
+        return [c async for c in runner.execute_workflow_stream(workflow, "one two")]
+
+    asyncio.run(stream(Cassette(path, mode="record")))
+    chunks = asyncio.run(stream(Cassette(path, mode="replay", latency_scale=0)))
+    assert [c["content"] for c in chunks if c["type"] == "token"] == ["Echo:", " one", " two"]
+
+def test_replay_miss_raises(tmp_path):
+    cassette = Cassette(tmp_path / "empty.jsonl.gz", mode="replay")
+    with pytest.raises(CassetteMissError):
+        cassette.lookup("chat", "human:unknown")
@@ -0,0 +1,42 @@
+import pytest
+
+from core.chroma_registry import ChromaRegistry
+from core.hashing_embeddings import HashingEmbeddings
+from nodes.retrievers.chroma_retriever import ChromaRetrieverNode
+
+def test_handles_are_shared_across_builds(tmp_path, monkeypatch):
+    registry = ChromaRegistry(str(tmp_path))
+    monkeypatch.setattr("nodes.retrievers.chroma_retriever.get_chroma_registry", lambda: registry)
+    embeddings = HashingEmbeddings(dimensions=32)
+    registry.vectorstore("docs", embeddings).add_texts(["alpha beta", "gamma delta"])
+
+    lookups = []
+    client = registry.client()
+    original = client.get_or_create_collection
+    monkeypatch.setattr(client, "get_or_create_collection", lambda **kwargs: lookups.append(kwargs) or original(**kwargs))
+    for _ in range(3):
+        retriever = ChromaRetrieverNode().execute(inputs={"collection_name": "docs"}, connected_nodes={"embedding_function": embeddings})
+        assert retriever.invoke("gamma")[0].page_content == "gamma delta"
+    assert lookups == []
+    assert registry.collection("docs") is registry.collection("docs")
+    assert registry.summary()["clients"] == 1
+
+def test_collections_persist_and_preload(tmp_path):
+    embeddings = HashingEmbeddings(dimensions=32)
+    ChromaRegistry(str(tmp_path)).vectorstore("warm", embeddings).add_texts(["persisted text"])
+
+    registry = ChromaRegistry(str(tmp_path))
+    assert registry.preload(["*"]) == ["warm"]
+    assert registry.summary()["preloaded"] == 1
+    assert registry.vectorstore("warm", embeddings).similarity_search("persisted", k=1)[0].page_content == "persisted text"
+    assert registry.summary()["hits"] >= 1
+
+def test_requested_directories_stay_inside_the_persist_directory(tmp_path):
+    registry = ChromaRegistry(str(tmp_path / "chroma"))
+    assert registry._directory("tenant-a") == str((tmp_path / "chroma" / "tenant-a").resolve())
+    for directory in ("../outside", str(tmp_path / "elsewhere"), "/etc"):
+        with pytest.raises(ValueError):
+            registry.collection("docs", directory)
+    assert not (tmp_path / "outside").exists() and not (tmp_path / "elsewhere").exists()
+    with pytest.raises(ValueError):
+        ChromaRegistry(None).client("anywhere")
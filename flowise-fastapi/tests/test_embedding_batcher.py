@@ -0,0 +1,86 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from core.embedding_batcher import BatchedEmbeddings, EmbeddingBatcher, Histogram
+from core.embedding_cache import CachedEmbeddings
+from core.hashing_embeddings import HashingEmbeddings
+
+class CountingEmbeddings(CachedEmbeddings):
+    def __init__(self, fail: bool = False):
+        super().__init__(HashingEmbeddings(dimensions=16), namespace="test")
+        self.calls = []
+        self.fail = fail
+
+    def embed_arrays(self, texts, kind="document"):
+        self.calls.append((kind, list(texts)))
+        if self.fail:
+            raise RuntimeError("provider down")
+        return super().embed_arrays(texts, kind)
+
+def test_concurrent_queries_share_batched_calls():
+    backend = CountingEmbeddings()
+    batcher = EmbeddingBatcher(backend, max_batch_size=64, max_wait_ms=50)
+    embeddings = BatchedEmbeddings(batcher)
+    texts = [f"query {i}" for i in range(16)]
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        vectors = list(pool.map(embeddings.embed_query, texts))
+    batcher.close()
+
+    assert len(backend.calls) < len(texts)
+    assert all(kind == "query" for kind, _ in backend.calls)
+    expected = HashingEmbeddings(dimensions=16)
+    for text, vector in zip(texts, vectors):
+        np.testing.assert_allclose(vector, expected.embed_query(text), rtol=1e-6)
+    summary = batcher.summary()
+    assert summary["requests"] == 16 and summary["batch_size"]["sum"] == 16
+    assert summary["added_latency_ms"]["count"] == 16
+
+def test_async_callers_and_errors_fan_out():
+    backend = CountingEmbeddings()
+    batcher = EmbeddingBatcher(backend, max_batch_size=4, max_wait_ms=50)
+    embeddings = BatchedEmbeddings(batcher)
+
+    async def run():
+        return await asyncio.gather(*(embeddings.aembed_documents([f"doc {i}", "shared"]) for i in range(4)))
+
+    results = asyncio.run(run())
+    batcher.close()
+    assert [len(vectors) for vectors in results] == [2, 2, 2, 2]
+    # Requests are cut at max_batch_size texts
+    assert all(len(texts) <= 4 for _, texts in backend.calls)
+    assert results[0][1] == results[3][1]
+
+    failing = EmbeddingBatcher(CountingEmbeddings(fail=True), max_batch_size=64, max_wait_ms=20)
+    futures = [failing.submit(["a"]), failing.submit(["b"])]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5)
+    failing.close()
+    assert failing.summary()["errors"] >= 1
+
+def test_histogram_quantiles():
+    histogram = Histogram([1, 5, 10])
+    for value in (0.5, 2, 3, 4, 20):
+        histogram.observe(value)
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"1": 1, "5": 3, "10": 0, "+Inf": 1}
+    assert snapshot["p50"] == 5 and snapshot["p95"] is None
+
+def test_cancelled_waiter_does_not_kill_worker():
+    backend = CountingEmbeddings()
+    batcher = EmbeddingBatcher(backend, max_batch_size=64, max_wait_ms=50)
+    embeddings = BatchedEmbeddings(batcher)
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(embeddings.aembed_query("abandoned"), timeout=0.001)
+        return await asyncio.wait_for(embeddings.aembed_query("next"), timeout=5)
+
+    vector = asyncio.run(run())
+    assert len(vector) == 16
+    assert batcher._worker.is_alive()
+    assert all("abandoned" not in texts for _, texts in backend.calls)
+    batcher.close()
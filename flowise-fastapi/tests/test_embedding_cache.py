@@ -0,0 +1,55 @@
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from core.dynamic_chain_builder import DynamicChainBuilder
+from core.embedding_cache import CachedEmbeddings, EmbeddingCache
+from core.hashing_embeddings import HashingEmbeddings
+from nodes.embeddings.embeddings import EmbeddingsNode
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.backend = HashingEmbeddings(dimensions=32)
+        self.calls: List[List[str]] = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return self.backend.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.backend.embed_query(text)
+
+def _cached(backend, path) -> CachedEmbeddings:
+    return CachedEmbeddings(backend, namespace="test/counting", cache=EmbeddingCache(str(path)))
+
+def test_cache_skips_known_texts_across_restarts(tmp_path):
+    path = tmp_path / "embeddings.db"
+    backend = CountingEmbeddings()
+    first = _cached(backend, path).embed_documents(["alpha", "beta", "alpha"])
+    assert backend.calls == [["alpha", "beta"]]
+    assert first[0] == first[2]
+
+    second = _cached(backend, path)
+    vectors = second.embed_documents(["beta", "gamma", "alpha"])
+    assert backend.calls[-1] == ["gamma"]
+    assert vectors[0] == first[1] and vectors[2] == first[0]
+    assert second.cache.summary()["entries"] == 3
+    np.testing.assert_allclose(vectors[1], backend.embed_query("gamma"), rtol=1e-6)
+
+def test_batches_respect_count_and_token_limits(tmp_path):
+    embeddings = CachedEmbeddings(HashingEmbeddings(dimensions=8), namespace="x", max_batch_size=3, max_batch_tokens=50)
+    texts = ["a" * 40, "b", "c", "d", "e" * 400, "f"]
+    assert [len(batch) for batch in embeddings.batches(texts)] == [3, 1, 1, 1]
+    assert embeddings.embed_arrays(texts).shape == (6, 8)
+
+def test_cache_evicts_oldest_entries(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "embeddings.db"), max_entries=3)
+    cache.put_many([(bytes([i]) * 32, np.full(4, i, dtype=np.float32)) for i in range(5)])
+    assert cache.summary()["entries"] == 3
+    assert sorted(v[0] for v in cache.get_many([bytes([i]) * 32 for i in range(5)]).values()) == [2, 3, 4]
+
+def test_node_provides_connectable_hashing_embeddings():
+    embeddings = EmbeddingsNode().execute(provider="hashing", dimensions=16, use_cache=False)
+    assert len(embeddings.embed_query("hello world")) == 16
+    assert DynamicChainBuilder._is_connected_value(embeddings)
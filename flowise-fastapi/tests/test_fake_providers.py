@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from core.fake_providers import FakeProviderError, LatencyProfile, build_behaviour
+from core.node_discovery import get_registry
+from core.workflow_runner import WorkflowRunner
+
+react_workflow = {
+    "nodes": [
+        {"id": "llm_1", "type": "FakeChatModel", "data": {"script": "react", "react_steps": 2}},
+        {"id": "tool_1", "type": "FakeTool", "data": {}},
+        {"id": "prompt_1", "type": "AgentPrompt", "data": {}},
+        {"id": "agent_1", "type": "ReactAgent", "data": {}},
+    ],
+    "edges": [
+        {"id": "e1", "source": "llm_1", "target": "agent_1", "targetHandle": "llm"},
+        {"id": "e2", "source": "tool_1", "target": "agent_1", "targetHandle": "tools"},
+        {"id": "e3", "source": "prompt_1", "target": "agent_1", "targetHandle": "prompt"},
+    ],
+}
+
+def single_node(node_type, **data):
+    return {"nodes": [{"id": "node_1", "type": node_type, "data": data}], "edges": []}
+
+def test_fake_nodes_are_discovered():
+    registry = get_registry()
+    for node_type in ("FakeChatModel", "FakeLLM", "FakeTool"):
+        assert node_type in registry
+
+def test_latency_profile_is_seeded():
+    first = LatencyProfile("lognormal", mean_ms=20, jitter_ms=10, seed=7)
+    second = LatencyProfile("lognormal", mean_ms=20, jitter_ms=10, seed=7)
+    assert [first.sample() for _ in range(5)] == [second.sample() for _ in range(5)]
+
+def test_failure_injection_every_nth_call():
+    behaviour = build_behaviour(failure_every=2)
+    behaviour.next_response("", "a")
+    with pytest.raises(FakeProviderError):
+        behaviour.next_response("", "b")
+
+def test_react_agent_runs_offline():
+    result = asyncio.run(WorkflowRunner(get_registry()).execute_workflow(react_workflow, "ping"))
+    assert result["status"] == "completed"
+    assert result["result"] == "Echo: ping"
+
+def test_fake_chat_model_streams_tokens():
+    async def collect():
+        runner = WorkflowRunner(get_registry())
+        return [c async for c in runner.execute_workflow_stream(single_node("FakeChatModel"), "one two three")]
+
+    chunks = asyncio.run(collect())
+    tokens = [c["content"] for c in chunks if c["type"] == "token"]
+    assert tokens == ["Echo:", " one", " two", " three"]
+    assert chunks[-1] == {"type": "result", "result": "Echo: one two three"}
+
+def test_scripted_fake_llm():
+    workflow = single_node("FakeLLM", script="scripted", responses='["first {input}", "second"]')
+    result = asyncio.run(WorkflowRunner(get_registry()).execute_workflow(workflow, "x"))
+    assert result["result"] == "first x"
@@ -0,0 +1,68 @@
+import gzip
+import json
+from pathlib import Path
+
+from core.html_extract import HtmlTextExtractor, extract_html
+
+CORPUS = Path(__file__).parent.parent / "benchmarks" / "corpus" / "html_pages.jsonl.gz"
+
+PAGE = b"""<!DOCTYPE html><html lang="en"><head><title> Hello &amp; welcome </title>
+<meta name="description" content="A page"><style>p { color: red }</style></head>
+<body><div id="cookie-consent">Accept cookies</div><header class="site-header"><a>Home</a></header>
+<nav><ul><li>Menu</li></ul></nav>
+<main><article><header><h1>Headline</h1></header><p>First&nbsp;paragraph with <b>bold</b> text
+<p>Second<br>line<script>if (a < b) { document.write("</p>") }</script>
+<div class="share-buttons"><a>Share</a></div></article></main>
+<aside>Related links</aside><footer>Copyright</footer></body></html>"""
+
+def test_extracts_main_content_without_boilerplate():
+    page = extract_html(PAGE)
+    assert page.text == "Headline\nFirst paragraph with bold text\nSecond\nline"
+    assert (page.title, page.description, page.language) == ("Hello & welcome", "A page", "en")
+    assert page.main_content
+
+    whole = extract_html(PAGE, main_content=False, strip_boilerplate=False)
+    assert "Menu" in whole.text and "Copyright" in whole.text
+    assert "color: red" not in whole.text and "document.write" not in whole.text
+
+def test_web_loader_inputs_control_main_content_and_boilerplate_separately(tmp_path, monkeypatch):
+    from core.http_fetch import FetchResult, HttpFetcher
+    from core.parse_cache import ParseCache
+    from core.web_loaders import html_to_document
+    from nodes.document_loaders.web_loader import WebLoaderNode
+
+    # Keep the node away from the process-wide caches under ./data
+    monkeypatch.setattr("nodes.document_loaders.web_loader.get_parse_cache", lambda: ParseCache(str(tmp_path / "parse_cache")))
+    monkeypatch.setattr("core.web_loaders.get_http_fetcher", lambda: HttpFetcher())
+
+    result = FetchResult(url="http://example.test/", status=200, headers={"content-type": "text/html"}, content=PAGE)
+    outside_main = html_to_document(result, main_content=False).page_content
+    assert "Related links" not in outside_main and "Menu" not in outside_main
+    assert "Menu" in html_to_document(result, main_content=False, strip_boilerplate=False).page_content
+
+    loader = WebLoaderNode().execute(urls="http://example.test/", main_content_only=False, strip_boilerplate=False)
+    assert (loader.main_content, loader.strip_boilerplate) == (False, False)
+
+def test_page_containers_and_partial_class_names_are_not_boilerplate():
+    assert extract_html('<html><body class="has-sidebar"><main><p>Hello world</p></main></body></html>').text == "Hello world"
+    assert extract_html('<html class="nav-open"><body><p>Hello world</p></body></html>').text == "Hello world"
+    assert extract_html('<div class="wrapper with-comments"><p>Hello world</p></div>').text == "Hello world"
+    assert extract_html('<div role="main" class="sidebar"><p>Hello world</p></div>').text == "Hello world"
+    assert extract_html('<div class="content main-sidebar">Links</div><p>Hello world</p>').text == "Hello world"
+
+def test_malformed_markup_keeps_content():
+    page = extract_html("<body><div class='menu'>unclosed menu<p>kept text</span></body>")
+    assert "kept text" in page.text
+    assert extract_html("<p>one<p>two</div><li>three").text == "one\ntwo\nthree"
+
+def test_chunked_feed_matches_whole_document():
+    with gzip.open(CORPUS, "rt", encoding="utf-8") as f:
+        record = json.loads(f.readline())
+    whole = extract_html(record["html"])
+
+    extractor = HtmlTextExtractor()
+    for start in range(0, len(record["html"]), 97):
+        extractor.feed(record["html"][start:start + 97])
+    extractor.close()
+    assert extractor.result() == whole
+    assert all(passage in " ".join(whole.text.split()) for passage in record["content"])
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core.http_cache import HttpCache
+from core.http_fetch import HttpFetcher
+
+class Handler(BaseHTTPRequestHandler):
+    hits = {}
+    not_modified = 0
+
+    def do_GET(self):
+        cls = type(self)
+        cls.hits[self.path] = cls.hits.get(self.path, 0) + 1
+        etag = '"v1"'
+        if self.path == "/revalidate" and self.headers.get("If-None-Match") == etag:
+            cls.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        body = b"<html><body>" + b"cached page " * 100 + b"</body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if self.path == "/revalidate":
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("ETag", etag)
+        elif self.path == "/fresh":
+            self.send_header("Cache-Control", "max-age=60")
+        elif self.path == "/private":
+            self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+def test_fetcher_serves_fresh_and_revalidated_bodies(server, tmp_path):
+    cache = HttpCache(str(tmp_path), max_bytes=1_000_000)
+    fetcher = HttpFetcher(cache=cache)
+
+    async def run():
+        try:
+            results = []
+            for path in ("/revalidate", "/fresh", "/private"):
+                results.append([await fetcher.fetch(f"{server}{path}") for _ in range(2)])
+            return results
+        finally:
+            await fetcher.aclose()
+
+    revalidate, fresh, private = asyncio.run(run())
+    size = len(revalidate[0].content)
+    assert revalidate[1].from_cache and revalidate[1].content == revalidate[0].content
+    assert Handler.hits["/revalidate"] == 2 and Handler.not_modified == 1
+    assert fresh[1].from_cache and Handler.hits["/fresh"] == 1
+    assert not private[1].from_cache and Handler.hits["/private"] == 2
+    assert cache.stats["revalidated"] == 1 and cache.stats["hits"] == 1
+    assert cache.stats["bytes_saved"] == 2 * size
+    assert fresh[1].text.startswith("<html>")
+
+def test_size_cap_eviction_and_reload(tmp_path):
+    cache = HttpCache(str(tmp_path), max_bytes=250)
+    for name in ("a", "b", "c"):
+        cache.put(f"http://example.com/{name}", name.encode() * 100)
+    assert cache.get("http://example.com/a") is None
+    assert cache.stats["evictions"] == 1
+
+    reopened = HttpCache(str(tmp_path), max_bytes=250)
+    assert reopened.summary()["entries"] == 2
+    assert reopened.read_fresh("http://example.com/c") == b"c" * 100
+    assert reopened.read_fresh("http://example.com/c", headers={"Authorization": "x"}) is None
+
+def test_youtube_node_builds_a_loader_served_from_the_cache(tmp_path, monkeypatch):
+    import json
+    from nodes.document_loaders import web_loader
+
+    cache = HttpCache(str(tmp_path))
+    monkeypatch.setattr(web_loader, "get_http_cache", lambda: cache)
+    loader = web_loader.YoutubeLoaderNode().execute(video_url="https://www.youtube.com/watch?v=dQw4w9WgXcQ", language="tr")
+    assert loader.video_id == "dQw4w9WgXcQ" and loader.language == "tr"
+
+    cache.put(loader.cache_url, json.dumps([{"page_content": "transcript", "metadata": {"source": "dQw4w9WgXcQ"}}]).encode("utf-8"))
+    documents = loader.load()
+    assert [d.page_content for d in documents] == ["transcript"]
+    with pytest.raises(ValueError):
+        web_loader.YoutubeLoaderNode().execute(video_url="not a video")
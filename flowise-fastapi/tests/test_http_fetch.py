@@ -0,0 +1,218 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core.http_fetch import HttpFetcher
+from core.web_loaders import HttpSitemapLoader, HttpWebLoader
+
+class Handler(BaseHTTPRequestHandler):
+    in_flight = 0
+    max_in_flight = 0
+    page_hits = 0
+    sitemap_bytes_sent = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            if self.path.startswith("/slow"):
+                time.sleep(0.1)
+            if self.path.startswith("/page/"):
+                with cls.lock:
+                    cls.page_hits += 1
+            if self.path == "/huge-sitemap.xml":
+                self.send_huge_sitemap()
+                return
+            if self.path == "/sitemap-index.xml":
+                host = self.headers["Host"]
+                body = (
+                    '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                    f"<sitemap><loc>http://{host}/sitemap.xml</loc></sitemap>"
+                    f"<sitemap><loc>http://{host}/huge-sitemap.xml</loc></sitemap>"
+                    "</sitemapindex>"
+                ).encode()
+                content_type = "application/xml"
+            elif self.path == "/sitemap.xml":
+                host = self.headers["Host"]
+                urls = "".join(f"<url><loc>http://{host}/page/{i}</loc></url>" for i in range(6))
+                body = f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'.encode()
+                content_type = "application/xml"
+            elif self.path == "/flaky-sitemap.xml":
+                host = self.headers["Host"]
+                paths = ["missing", "page/0", "missing", "page/1", "page/2", "page/3"]
+                urls = "".join(f"<url><loc>http://{host}/{path}</loc></url>" for path in paths)
+                body = f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'.encode()
+                content_type = "application/xml"
+            elif self.path == "/big":
+                body = b"x" * 100_000
+                content_type = "text/plain"
+            elif self.path == "/missing":
+                self.send_error(404)
+                return
+            else:
+                body = f"<html lang='en'><head><title>{self.path}</title></head><body><p>Hello {self.path}</p></body></html>".encode()
+                content_type = "text/html; charset=utf-8"
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    def send_huge_sitemap(self):
+        host = self.headers["Host"]
+        self.send_response(200)
+        self.send_header("Content-Type", "application/xml")
+        self.end_headers()
+        try:
+            self.wfile.write(b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">')
+            for start in range(0, 200_000, 1000):
+                chunk = "".join(f"<url><loc>http://{host}/page/huge/{i}</loc></url>" for i in range(start, start + 1000)).encode()
+                self.wfile.write(chunk)
+                type(self).sitemap_bytes_sent += len(chunk)
+                time.sleep(0.001)
+            self.wfile.write(b"</urlset>")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+def test_per_host_limit_and_size_cap(server):
+    fetcher = HttpFetcher(per_host_concurrency=2, max_bytes=1000)
+    Handler.max_in_flight = 0
+
+    async def run():
+        try:
+            results = await fetcher.fetch_all([f"{server}/slow/{i}" for i in range(6)])
+            big = await fetcher.fetch(f"{server}/big")
+            missing = await fetcher.fetch(f"{server}/missing")
+            streamed = b"".join([chunk async for chunk in fetcher.stream(f"{server}/big", max_bytes=5000)])
+            return results, big, missing, streamed
+        finally:
+            await fetcher.aclose()
+
+    results, big, missing, streamed = asyncio.run(run())
+    assert all(result.ok for result in results)
+    assert [result.url for result in results] == [f"{server}/slow/{i}" for i in range(6)]
+    assert Handler.max_in_flight == 2
+    assert big.truncated and len(big.content) == 1000
+    assert not missing.ok and missing.status == 404
+    assert len(streamed) == 5000
+
+def test_web_and_sitemap_loaders(server):
+    fetcher = HttpFetcher()
+    docs = HttpWebLoader([f"{server}/a", f"{server}/missing", f"{server}/b"], fetcher=fetcher).load()
+    assert sorted(doc.metadata["title"] for doc in docs) == ["/a", "/b"]
+    assert "Hello /a" in next(doc for doc in docs if doc.metadata["title"] == "/a").page_content
+
+    loader = HttpSitemapLoader(f"{server}/sitemap.xml", filter_urls=[r"/page/[0-3]$"], limit=3, fetcher=fetcher)
+    docs = loader.load()
+    assert sorted(doc.metadata["source"].rsplit("/", 1)[-1] for doc in docs) == ["0", "1", "2"]
+
+def test_iter_fetch_window_bounds_concurrency(server):
+    fetcher = HttpFetcher(per_host_concurrency=8)
+    Handler.max_in_flight = 0
+
+    async def run():
+        try:
+            return [result async for result in fetcher.iter_fetch((f"{server}/slow/w{i}" for i in range(6)), window=2)]
+        finally:
+            await fetcher.aclose()
+
+    results = asyncio.run(run())
+    assert sorted(result.url for result in results) == sorted(f"{server}/slow/w{i}" for i in range(6))
+    assert Handler.max_in_flight == 2
+
+def test_lazy_load_yields_before_slow_pages_finish(server):
+    loader = HttpWebLoader([f"{server}/slow/late", f"{server}/early"], fetcher=HttpFetcher())
+    documents = loader.lazy_load()
+    first = next(documents)
+    assert first.metadata["title"] == "/early"
+    # The slow page is still being served: nothing was buffered up front
+    assert Handler.in_flight == 1
+    documents.close()
+
+def test_sitemap_stops_reading_and_fetching_at_limit(server):
+    fetcher = HttpFetcher()
+    Handler.page_hits = 0
+    Handler.sitemap_bytes_sent = 0
+
+    loader = HttpSitemapLoader(f"{server}/huge-sitemap.xml", filter_urls=[r"/huge/\d*7$"], limit=5, fetcher=fetcher)
+    docs = loader.load()
+    assert sorted(doc.metadata["source"].rsplit("/", 1)[-1] for doc in docs) == ["17", "27", "37", "47", "7"]
+    assert Handler.page_hits == 5
+    # The 10MB sitemap was abandoned after the first few hundred entries
+    assert Handler.sitemap_bytes_sent < 2_000_000
+
+def test_sitemap_limit_counts_loaded_pages_with_one_slot_per_host(server):
+    # The sitemap stream must not hold the only slot the page fetches need
+    fetcher = HttpFetcher(per_host_concurrency=1)
+    loader = HttpSitemapLoader(f"{server}/flaky-sitemap.xml", limit=3, fetcher=fetcher)
+    docs = loader.load()
+    assert sorted(doc.metadata["source"].rsplit("/", 1)[-1] for doc in docs) == ["0", "1", "2"]
+
+def test_sitemap_index_is_followed_in_order(server):
+    fetcher = HttpFetcher()
+
+    async def run():
+        try:
+            loader = HttpSitemapLoader(f"{server}/sitemap-index.xml", limit=8, fetcher=fetcher)
+            return await loader.discover_urls()
+        finally:
+            await fetcher.aclose()
+
+    urls = asyncio.run(run())
+    assert [url.split("/page/", 1)[1] for url in urls] == ["0", "1", "2", "3", "4", "5", "huge/0", "huge/1"]
+
+def test_sitemap_size_is_capped(server):
+    fetcher = HttpFetcher()
+    Handler.sitemap_bytes_sent = 0
+
+    async def run():
+        try:
+            loader = HttpSitemapLoader(f"{server}/huge-sitemap.xml", fetcher=fetcher, max_sitemap_bytes=100_000)
+            return await loader.discover_urls()
+        finally:
+            await fetcher.aclose()
+
+    with pytest.raises(ValueError, match="larger than 100000 bytes"):
+        asyncio.run(run())
+    assert Handler.sitemap_bytes_sent < 2_000_000
+
+def test_page_extraction_runs_off_the_event_loop(server, monkeypatch):
+    import core.web_loaders
+
+    threads = []
+    original = core.web_loaders.extract_html
+    monkeypatch.setattr(core.web_loaders, "extract_html", lambda *args, **kwargs: threads.append(threading.get_ident()) or original(*args, **kwargs))
+    fetcher = HttpFetcher()
+
+    async def run():
+        try:
+            web = await HttpWebLoader([f"{server}/a"], fetcher=fetcher).aload()
+            sitemap = await HttpSitemapLoader(f"{server}/sitemap.xml", filter_urls=[r"/page/0$"], fetcher=fetcher).aload()
+            return threading.get_ident(), web + sitemap
+        finally:
+            await fetcher.aclose()
+
+    loop_thread, docs = asyncio.run(run())
+    assert len(docs) == 2 and len(threads) == 2
+    assert loop_thread not in threads
@@ -0,0 +1,111 @@
+import asyncio
+import time
+import uuid
+
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+
+from benchmarks.documents import lorem_lines, write_text_pdf
+from core.chroma_registry import ChromaRegistry
+from core.hashing_embeddings import HashingEmbeddings
+from core.ingestion import IngestionPipeline
+from core.node_discovery import get_registry
+from core.workflow_runner import WorkflowRunner
+from nodes.retrievers.chroma_retriever import ChromaRetrieverNode
+
+class SlowCollection:
+    def __init__(self, loader):
+        self.loader = loader
+        self.ids = set()
+        self.max_lag = 0
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        time.sleep(0.002)
+        self.max_lag = max(self.max_lag, self.loader.read - len(self.ids))
+        self.ids.update(ids)
+
+class CountingLoader(BaseLoader):
+    def __init__(self, count):
+        self.count = count
+        self.read = 0
+
+    def lazy_load(self):
+        for i in range(self.count):
+            self.read += 1
+            yield Document(page_content=f"document {i} " + " ".join(lorem_lines(1, seed=i)), metadata={"source": f"doc-{i}"})
+
+def test_pipeline_applies_backpressure():
+    loader = CountingLoader(2000)
+    collection = SlowCollection(loader)
+    pipeline = IngestionPipeline(
+        sources=[loader],
+        embeddings=HashingEmbeddings(dimensions=16),
+        collection_factory=lambda: collection,
+        collection_name="test",
+        batch_size=10,
+        max_pending_batches=2
+    )
+
+    async def run():
+        return [event async for event in pipeline.astream({"input": ""})]
+
+    events = asyncio.run(run())
+    assert events[-1]["type"] == "result" and events[-1]["chunks"] == 2000
+    assert len(collection.ids) == 2000
+    progress = [event for event in events if event["type"] == "progress"]
+    assert len(progress) == 200 and progress[-1]["chunks_upserted"] == 2000
+    # The loader never runs more than a few batches ahead of the upserts
+    assert collection.max_lag <= (2 + 3) * 10
+
+def test_documents_without_metadata_reach_chroma():
+    class PlainLoader(BaseLoader):
+        def lazy_load(self):
+            yield Document(page_content="no metadata at all")
+            yield Document(page_content="only empty values", metadata={"source": None})
+
+    collection = ChromaRegistry(None).collection(f"plain-{uuid.uuid4().hex}")
+    pipeline = IngestionPipeline(
+        sources=[PlainLoader()],
+        embeddings=HashingEmbeddings(dimensions=16),
+        collection_factory=lambda: collection,
+        collection_name="plain"
+    )
+
+    async def run():
+        return [event async for event in pipeline.astream({"input": ""})]
+
+    assert asyncio.run(run())[-1]["chunks"] == 2
+    assert collection.count() == 2
+
+def test_ingestion_workflow_streams_progress_and_feeds_retriever(tmp_path, monkeypatch):
+    monkeypatch.setattr("nodes.document_loaders.pdf_loader.get_parse_cache", lambda: None)
+    registry = ChromaRegistry(str(tmp_path / "chroma"))
+    monkeypatch.setattr("nodes.vectorstores.chroma_ingestion.get_chroma_registry", lambda: registry)
+    monkeypatch.setattr("nodes.retrievers.chroma_retriever.get_chroma_registry", lambda: registry)
+    pdf = write_text_pdf(tmp_path / "doc.pdf", [lorem_lines(20, seed=i) + [f"unique marker zebra{i}"] for i in range(6)])
+    collection_name = f"ingest-{uuid.uuid4().hex[:8]}"
+    workflow = {
+        "nodes": [
+            {"id": "loader", "type": "PDFLoader", "data": {"file_path": str(pdf)}},
+            {"id": "embeddings", "type": "Embeddings", "data": {"provider": "hashing", "dimensions": 64, "use_cache": False, "micro_batch": False}},
+            {"id": "ingest", "type": "ChromaIngestion", "data": {"collection_name": collection_name, "chunk_size": 300, "chunk_overlap": 0, "batch_size": 4}},
+        ],
+        "edges": [
+            {"id": "e1", "source": "loader", "target": "ingest", "targetHandle": "documents"},
+            {"id": "e2", "source": "embeddings", "target": "ingest", "targetHandle": "embedding_function"},
+        ],
+    }
+
+    async def collect():
+        return [event async for event in WorkflowRunner(get_registry()).execute_workflow_stream(workflow, "")]
+
+    events = asyncio.run(collect())
+    progress = [event for event in events if event["type"] == "progress"]
+    assert progress and progress[-1]["chunks_upserted"] >= 6
+    assert events[-1]["type"] == "result" and "Ingested" in events[-1]["result"]
+
+    retriever = ChromaRetrieverNode().execute(
+        inputs={"collection_name": collection_name},
+        connected_nodes={"embedding_function": HashingEmbeddings(dimensions=64)}
+    )
+    assert any("zebra3" in doc.page_content for doc in retriever.invoke("unique marker zebra3"))
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from core.hashing_embeddings import HashingEmbeddings
+from core.ivf_index import IVFIndex, IVFRetriever, build_ivf_index
+from core.vector_index import MmapVectorIndex
+from nodes.retrievers.ivf_retriever import IVFRetrieverNode
+
+def test_recall_against_exact_search(tmp_path):
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((20, 32)).astype(np.float32)
+    vectors = centers[rng.integers(0, 20, 4000)] + 0.5 * rng.standard_normal((4000, 32)).astype(np.float32)
+    source = MmapVectorIndex(str(tmp_path / "exact"))
+    source.upsert([str(i) for i in range(4000)], vectors, [f"text {i}" for i in range(4000)])
+
+    summary = build_ivf_index(source, str(tmp_path / "ivf"), n_lists=32)
+    assert summary == {"rows": 4000, "lists": 32, "dimensions": 32}
+    ivf = IVFIndex(str(tmp_path / "ivf"))
+
+    queries = vectors[:50] + 0.1 * rng.standard_normal((50, 32)).astype(np.float32)
+    exact = [{source._offsets[row] for row, _ in hits} for hits in source.search(queries, k=10)]
+    def recall(nprobe):
+        hits = ivf.search(queries, k=10, nprobe=nprobe)
+        return np.mean([len({int(ivf.offsets[row]) for row, _ in h} & e) / 10 for h, e in zip(hits, exact)])
+    assert recall(32) >= 0.95
+    assert recall(1) <= recall(8) <= recall(32)
+
+    document = ivf.documents(ivf.search(vectors[7], k=1, nprobe=32)[0])[0]
+    assert (document.id, document.page_content) == ("7", "text 7")
+    assert abs(document.metadata["score"] - 1.0) < 0.01
+
+def test_node_builds_retriever_over_offline_index(tmp_path, monkeypatch):
+    embeddings = HashingEmbeddings(dimensions=64)
+    texts = ["cats purr softly", "dogs bark loudly", "birds sing at dawn", "fish swim deep"]
+    source = MmapVectorIndex(str(tmp_path / "docs"))
+    source.upsert([str(i) for i in range(4)], embeddings.embed_documents(texts), texts)
+    build_ivf_index(source, str(tmp_path / "docs" / "ivf"), n_lists=2)
+    monkeypatch.setattr("nodes.retrievers.ivf_retriever.get_ivf_index", lambda name: IVFIndex(str(tmp_path / name / "ivf")))
+
+    retriever = IVFRetrieverNode().execute(
+        inputs={"collection_name": "docs", "k": 1, "nprobe": 2},
+        connected_nodes={"embedding_function": embeddings}
+    )
+    assert isinstance(retriever, IVFRetriever)
+    assert [docs[0].page_content for docs in retriever.batch(["dogs bark", "fish swim"])] == ["dogs bark loudly", "fish swim deep"]
+
+    with pytest.raises(ValueError):
+        IVFIndex(str(tmp_path / "missing"))
+    with pytest.raises(ValueError):
+        retriever.index.search(np.ones(64), where={"kind": "cat"})
+
+def test_rebuilds_are_picked_up(tmp_path, monkeypatch):
+    from core import ivf_index
+
+    monkeypatch.setattr(ivf_index, "_GENERATION_CHECK_SECONDS", 0.0)
+    embeddings = HashingEmbeddings(dimensions=64)
+    source = MmapVectorIndex(str(tmp_path / "docs"))
+    source.upsert(["a", "b"], embeddings.embed_documents(["old alpha", "old beta"]), ["old alpha", "old beta"])
+    build_ivf_index(source, str(tmp_path / "docs" / "ivf"), n_lists=1)
+    index = ivf_index.load_ivf_index(str(tmp_path / "docs" / "ivf"))
+    retriever = IVFRetriever(index=index, embeddings=embeddings, k=1, follow_rebuilds=True)
+    assert retriever.invoke("alpha")[0].page_content == "old alpha"
+
+    source.upsert(["a"], embeddings.embed_documents(["new alpha"]), ["new alpha"])
+    build_ivf_index(source, str(tmp_path / "docs" / "ivf"), n_lists=1)
+    assert retriever.invoke("alpha")[0].page_content == "new alpha"
+    assert ivf_index.load_ivf_index(str(tmp_path / "docs" / "ivf")) is not index
+    # The replaced build still serves searches that started before the rebuild
+    assert index.documents(index.search(embeddings.embed_query("alpha"), k=1)[0])[0].page_content == "old alpha"
@@ -0,0 +1,43 @@
+from core.message_log import AI, HUMAN, MessageLog
+from core.workflow_runner import WorkflowRunner
+
+def test_ring_buffer_keeps_newest_messages():
+    log = MessageLog(capacity=4)
+    for i in range(5):
+        log.add_exchange(f"q{i}", f"a{i}", timestamp=float(i))
+    assert len(log) == 4
+    assert log.trimmed == 6
+    assert [m.content for m in log] == ["q3", "a3", "q4", "a4"]
+    assert [e["human"] for e in log.exchanges()] == ["q3", "q4"]
+    assert log.exchange_count == 2
+    assert next(iter(log)).role is HUMAN
+
+def test_chat_history_is_cached_and_windowed():
+    log = MessageLog(capacity=None, history_window=4)
+    assert log.chat_history == ""
+    for i in range(3):
+        log.add_exchange(f"q{i}", f"a{i}")
+    history = log.chat_history
+    assert history == "Human: q1\nAI: a1\nHuman: q2\nAI: a2"
+    assert log.chat_history is history
+    log.append("ai", "more")
+    assert log.chat_history.endswith("AI: a2\nAI: more")
+    assert log.last(1)[0].role is AI
+
+def test_approx_bytes_is_bounded_and_round_trips():
+    log = MessageLog(capacity=2)
+    log.add_exchange("x" * 100, "y" * 100)
+    size = log.approx_bytes
+    for _ in range(50):
+        log.add_exchange("x" * 100, "y" * 100)
+    assert log.approx_bytes == size
+
+    copy = MessageLog.from_exchanges(log.exchanges(), capacity=2)
+    assert copy.chat_history == log.chat_history
+
+def test_runner_uses_rendered_history():
+    log = MessageLog()
+    log.add_exchange("hi", "hello")
+    runner = WorkflowRunner(registry={})
+    chain_input = runner._prepare_chain_input("next", {"messages": log, "context": {"lang": "en"}})
+    assert chain_input == {"input": "next", "chat_history": "Human: hi\nAI: hello", "lang": "en"}
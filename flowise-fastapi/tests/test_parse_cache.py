@@ -0,0 +1,72 @@
+import pytest
+
+from benchmarks.documents import lorem_lines, write_text_pdf
+from core.http_fetch import FetchResult
+from core.parse_cache import CachedLoader, ParseCache
+from core.pdf_loader import LazyPdfLoader, _PdfReader
+from core.web_loaders import cached_page_document
+from langchain_core.documents import Document
+
+def test_pdf_pages_served_from_cache(tmp_path, monkeypatch):
+    pdf = str(write_text_pdf(tmp_path / "a.pdf", [lorem_lines(4, seed=i) for i in range(6)]))
+    cache = ParseCache(str(tmp_path / "cache"))
+
+    def cached(path, pages=None):
+        key = cache.key_for_file(path, "pdf", {"pages": pages})
+        return CachedLoader(LazyPdfLoader(path, pages=pages), cache, key, metadata={"source": path})
+
+    # A partially consumed load is not stored
+    next(cached(pdf).lazy_load())
+    assert cache.summary()["entries"] == 0
+    first = cached(pdf).load()
+    assert cache.stats["stores"] == 1
+
+    # Same bytes under another name: no parsing, source reflects the new path
+    copy = tmp_path / "copy.pdf"
+    copy.write_bytes(open(pdf, "rb").read())
+    def no_parsing(*args):
+        raise RuntimeError("parsed")
+
+    monkeypatch.setattr(_PdfReader, "extract", no_parsing)
+    again = cached(str(copy)).load()
+    assert [d.page_content for d in again] == [d.page_content for d in first]
+    assert again[0].metadata["source"] == str(copy) and again[0].metadata["page"] == 0
+    assert cache.stats["hits"] == 1
+
+    with pytest.raises(RuntimeError):
+        cached(pdf, pages="1-2").load()
+
+def test_metadata_override_applies_on_miss_and_hit(tmp_path):
+    pdf = str(write_text_pdf(tmp_path / "a.pdf", [lorem_lines(2, seed=i) for i in range(3)]))
+    cache = ParseCache(str(tmp_path / "cache"))
+    key = cache.key_for_file(pdf, "pdf", {})
+
+    def load():
+        return CachedLoader(LazyPdfLoader(pdf), cache, key, metadata={"source": "upload://abc"}).load()
+
+    miss, hit = load(), load()
+    assert cache.stats["hits"] == 1
+    assert [d.metadata for d in miss] == [d.metadata for d in hit]
+    assert {d.metadata["source"] for d in miss} == {"upload://abc"}
+
+def test_html_cache_eviction_and_corruption(tmp_path):
+    cache = ParseCache(str(tmp_path), max_bytes=600)
+    pages = [
+        FetchResult(url=f"http://example.com/{i}", status=200, headers={"content-type": "text/html"},
+                    content=f"<html><title>{i}</title><p>{' '.join(lorem_lines(5, seed=i))}</p></html>".encode())
+        for i in range(4)
+    ]
+    documents = [cached_page_document(page, True, cache) for page in pages]
+    assert cache.stats["evictions"] > 0 and cache.summary()["bytes"] <= 600
+
+    moved = FetchResult(url="http://mirror.example.com/3", status=200, headers=pages[3].headers, content=pages[3].content)
+    hit = cached_page_document(moved, True, cache)
+    assert hit.page_content == documents[3].page_content and hit.metadata["source"] == moved.url
+    assert cache.stats["hits"] == 1
+
+    key = cache.key_for_bytes(b"x", "test")
+    cache.put(key, [Document(page_content="ok", metadata={})])
+    with open(cache._path(key), "r+b") as f:
+        f.seek(-2, 2)
+        f.write(b"??")
+    assert cache.get(key) is None
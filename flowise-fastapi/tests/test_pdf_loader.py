@@ -0,0 +1,42 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from benchmarks.documents import lorem_lines, write_text_pdf
+from core.pdf_loader import LazyPdfLoader, _PdfReader, parse_page_ranges
+
+@pytest.fixture(scope="module")
+def pdf_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("pdf") / "doc.pdf"
+    return str(write_text_pdf(path, [[f"Page {i + 1}"] + lorem_lines(3, seed=i) for i in range(20)]))
+
+def test_parse_page_ranges():
+    assert parse_page_ranges("", 4) == [0, 1, 2, 3]
+    assert parse_page_ranges("2-3, 9, 7-", 8) == [1, 2, 6, 7]
+    assert parse_page_ranges("-2", 8) == [0, 1]
+    with pytest.raises(ValueError):
+        parse_page_ranges("3-1", 8)
+    with pytest.raises(ValueError):
+        parse_page_ranges("two", 8)
+
+def test_loads_selected_pages_lazily(pdf_path, monkeypatch):
+    docs = LazyPdfLoader(pdf_path, pages="2-3,19-").load()
+    assert [doc.metadata["page"] for doc in docs] == [1, 2, 18, 19]
+    assert docs[0].page_content.startswith("Page 2")
+    assert docs[0].metadata["page_label"] == "2" and docs[0].metadata["total_pages"] == 20
+
+    extracted = []
+    original = _PdfReader.extract
+    monkeypatch.setattr(_PdfReader, "extract", lambda self, indices, mode="plain": extracted.extend(indices) or original(self, indices, mode))
+    first = next(LazyPdfLoader(pdf_path, batch_size=4).lazy_load())
+    assert first.page_content.startswith("Page 1")
+    assert extracted == [0, 1, 2, 3]
+    assert len(LazyPdfLoader(pdf_path, max_pages=5).load()) == 5
+
+def test_parallel_extraction_matches_sequential(pdf_path):
+    sequential = LazyPdfLoader(pdf_path, parallel=False).load()
+    with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn")) as executor:
+        parallel = LazyPdfLoader(pdf_path, parallel_threshold=1, batch_size=3, executor=executor).load()
+    assert [doc.page_content for doc in parallel] == [doc.page_content for doc in sequential]
+    assert [doc.metadata["page"] for doc in parallel] == list(range(20))
@@ -0,0 +1,58 @@
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from core.redis_session_store import RedisSessionStore
+
+def make_store(**kwargs) -> RedisSessionStore:
+    return RedisSessionStore(fakeredis.FakeRedis(decode_responses=True), **kwargs)
+
+def test_round_trip_and_message_cap():
+    store = make_store(max_messages=3)
+    sid = store.create_session("abc")
+    store.update_session(sid, {"last_workflow": {"nodes": []}, "context": {"k": 1}})
+    for i in range(5):
+        store.add_message(sid, f"q{i}", f"a{i}")
+
+    session = store.get_session(sid)
+    assert session["id"] == "abc"
+    assert session["last_workflow"] == {"nodes": []}
+    assert session["context"] == {"k": 1}
+    assert [m["human"] for m in session["messages"].exchanges()] == ["q2", "q3", "q4"]
+    assert len(store) == 1
+    assert [sid for sid, _ in store.iter_sessions()] == ["abc"]
+
+def test_keys_carry_ttl_and_delete():
+    store = make_store(ttl_seconds=60)
+    sid = store.create_session()
+    store.add_message(sid, "hi", "hello")
+    client = store.client
+    assert 0 < client.ttl(store._meta_key(sid)) <= 60
+    assert 0 < client.ttl(store._messages_key(sid)) <= 60
+
+    assert store.delete_session(sid) is True
+    assert store.get_session(sid) is None
+    assert store.delete_session(sid) is False
+    assert store.stats()["backend"] == "redis"
+
+def test_missing_session_is_none():
+    store = make_store()
+    store.update_session("ghost", {"context": {}})
+    assert store.get_session("ghost") is None
+
+def test_per_session_ttl_survives_access():
+    store = make_store(ttl_seconds=60)
+    sid = store.create_session(ttl_seconds=3600)
+    store.add_message(sid, "hi", "hello")
+    store.update_session(sid, {"context": {"k": 1}})
+    session = store.get_session(sid)
+    assert "_ttl" not in session and session["context"] == {"k": 1}
+    assert 60 < store.client.ttl(store._meta_key(sid)) <= 3600
+    assert 60 < store.client.ttl(store._messages_key(sid)) <= 3600
+
+def test_writes_to_missing_sessions_leave_no_keys():
+    store = make_store(ttl_seconds=60)
+    store.add_message("ghost", "hi", "hello")
+    store.update_session("ghost", {"context": {"k": 1}})
+    assert store.client.keys("*") == [] and len(store) == 0
+    assert store.stats()["messages_appended"] == 0
@@ -0,0 +1,48 @@
+import asyncio
+
+from benchmarks.flows import react_flow
+from core.session_memory import SessionBufferMemory
+from core.session_store import InMemorySessionStore, get_session_store
+from core.workflow_runner import CompiledFlowCache, WorkflowRunner
+
+def test_memory_reads_and_appends_to_the_session():
+    store = InMemorySessionStore()
+    sid = store.create_session()
+    for i in range(4):
+        store.add_message(sid, f"q{i}", f"a{i}")
+    memory = SessionBufferMemory(k=2, store=store)
+
+    messages = memory.load_memory_variables({"input": "next", "session_id": sid})["chat_history"]
+    assert [m.content for m in messages] == ["q2", "a2", "q3", "a3"]
+    memory.save_context({"input": "next", "session_id": sid, "chat_history": messages}, {"output": "done"})
+    assert store.get_session(sid)["messages"].exchanges()[-1]["ai"] == "done"
+    assert memory.load_memory_variables({"input": "x"})["chat_history"] == []
+
+def test_cached_flow_keeps_memory_per_session():
+    cache = CompiledFlowCache(max_size=4)
+    flow = react_flow(memory=True)
+    store = get_session_store()
+    first, second = store.create_session(), store.create_session()
+
+    async def run(session_id, text):
+        runner = WorkflowRunner(flow_cache=cache)
+        return await runner.execute_workflow(flow, text, session_context=store.get_session(session_id))
+
+    result = asyncio.run(run(first, "hello"))
+    assert result["status"] == "completed" and result["memory_persisted"] is True
+    asyncio.run(run(first, "again"))
+    asyncio.run(run(second, "other"))
+
+    assert cache.stats()["hits"] == 2 and cache.stats()["size"] == 1
+    assert [e["human"] for e in store.get_session(first)["messages"].exchanges()] == ["hello", "again"]
+    assert [e["human"] for e in store.get_session(second)["messages"].exchanges()] == ["other"]
+
+def test_token_budget_memory_flows_are_session_bound_and_cached():
+    cache = CompiledFlowCache(max_size=4)
+    flow = react_flow()
+    flow["nodes"].append({"id": "memory_1", "type": "TokenBudgetMemory", "data": {"encoding_name": ""}})
+    flow["edges"].append({"source": "memory_1", "target": "agent_1", "sourceHandle": "output", "targetHandle": "memory"})
+    runner = WorkflowRunner(flow_cache=cache)
+    compiled = runner.compile(flow)
+    assert compiled.uses_session_memory and compiled.cacheable
+    assert cache.stats()["size"] == 1
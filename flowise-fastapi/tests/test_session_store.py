@@ -0,0 +1,78 @@
+import asyncio
+
+from core.session_store import InMemorySessionStore, run_session_sweeper
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_lru_eviction_respects_access_order():
+    store = InMemorySessionStore(max_sessions=2, ttl_seconds=None)
+    store.create_session("a")
+    store.create_session("b")
+    store.get_session("a")  # "b" is now least recently used
+    store.create_session("c")
+    assert "a" in store and "c" in store and "b" not in store
+    assert store.stats()["evicted_lru"] == 1
+
+def test_idle_ttl_expiry_is_refreshed_by_access():
+    clock = FakeClock()
+    store = InMemorySessionStore(ttl_seconds=10, clock=clock)
+    store.create_session("idle")
+    store.create_session("active")
+    clock.now = 8
+    store.add_message("active", "hi", "hello")
+    clock.now = 12
+    assert store.sweep() == 1
+    assert "idle" not in store and "active" in store
+    clock.now = 19
+    assert store.sweep() == 1
+    assert len(store) == 0
+
+def test_expired_session_is_not_returned_before_sweep():
+    clock = FakeClock()
+    store = InMemorySessionStore(ttl_seconds=5, clock=clock)
+    store.create_session("s")
+    clock.now = 6
+    assert store.get_session("s") is None
+
+def test_message_cap_and_memory_accounting():
+    store = InMemorySessionStore(max_messages=3)
+    store.create_session("s")
+    baseline = store.stats()["approx_bytes"]
+    for i in range(5):
+        store.add_message("s", f"question {i}", f"answer {i}")
+    messages = store.get_session("s")["messages"]
+    assert [m["human"] for m in messages.exchanges()] == ["question 2", "question 3", "question 4"]
+    stats = store.stats()
+    assert stats["messages_trimmed"] == 2
+    assert stats["approx_bytes"] > baseline
+    store.delete_session("s")
+    assert store.stats()["approx_bytes"] == 0
+
+def test_updates_are_counted_in_memory_accounting():
+    store = InMemorySessionStore()
+    store.create_session("s")
+    baseline = store.stats()["approx_bytes"]
+    store.update_session("s", {"last_workflow": {"nodes": [{"id": str(i), "data": "x" * 100} for i in range(50)]}})
+    assert store.stats()["approx_bytes"] > baseline + 50 * 100
+    store.update_session("s", {"last_workflow": None})
+    assert store.stats()["approx_bytes"] == baseline
+    store.delete_session("s")
+    assert store.stats()["approx_bytes"] == 0
+
+def test_background_sweeper_expires_sessions():
+    store = InMemorySessionStore(ttl_seconds=0.01)
+    store.create_session("s")
+
+    async def run():
+        task = asyncio.create_task(run_session_sweeper(store, 0.02))
+        await asyncio.sleep(0.1)
+        task.cancel()
+
+    asyncio.run(run())
+    assert len(store) == 0
+    assert store.stats()["sweeps"] >= 1
@@ -0,0 +1,82 @@
+import sqlite3
+
+from core.sqlite_session_store import SqliteSessionStore
+
+def make_store(path, **kwargs) -> SqliteSessionStore:
+    # A long interval keeps the writer thread out of the way; tests flush explicitly
+    return SqliteSessionStore(str(path), flush_interval_seconds=3600, **kwargs)
+
+def test_sessions_survive_restart(tmp_path):
+    path = tmp_path / "sessions.db"
+    store = make_store(path, max_messages=2)
+    sid = store.create_session("abc")
+    store.update_session(sid, {"last_workflow": "chat", "context": {"lang": "en"}})
+    for i in range(3):
+        store.add_message(sid, f"q{i}", f"a{i}")
+    store.close()
+
+    reopened = make_store(path, max_messages=2)
+    session = reopened.get_session("abc")
+    assert session["last_workflow"] == "chat"
+    assert session["context"] == {"lang": "en"}
+    assert [m["human"] for m in session["messages"].exchanges()] == ["q1", "q2"]
+    assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM messages").fetchone()[0] == 2
+    reopened.close()
+
+def test_writes_are_batched_behind_the_request(tmp_path):
+    path = tmp_path / "sessions.db"
+    store = make_store(path)
+    sid = store.create_session()
+    store.add_message(sid, "hi", "hello")
+    assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == 0
+    assert store.stats()["pending_writes"] >= 3
+
+    assert store.flush() >= 3
+    assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM messages").fetchone()[0] == 1
+    store.close()
+
+def test_evicted_sessions_are_loaded_lazily(tmp_path):
+    store = make_store(tmp_path / "sessions.db", max_sessions=1)
+    store.create_session("a")
+    store.add_message("a", "hi", "hello")
+    store.create_session("b")  # evicts "a" from the cache before it was flushed
+    assert "a" not in store
+
+    session = store.get_session("a")
+    assert session["messages"].exchanges()[0]["ai"] == "hello"
+    assert store.stats()["loads"] == 1
+    assert store.delete_session("b") is True
+    store.flush()
+    assert store.get_session("b") is None
+    store.close()
+
+def test_reads_do_not_touch_the_database(tmp_path):
+    path = tmp_path / "sessions.db"
+    store = make_store(path)
+    store.create_session("persisted")
+    store.close()
+
+    store = make_store(path, max_sessions=1)
+    queries = []
+    conn = store._conn
+    class Spy:
+        def execute(self, sql, *args):
+            queries.append(sql)
+            return conn.execute(sql, *args)
+        def __getattr__(self, name):
+            return getattr(conn, name)
+    store._conn = Spy()
+
+    store.create_session("a")
+    store.update_session("a", {"context": {"step": 1}})
+    store.create_session("b")  # evicts "a" before it was flushed
+    assert store.get_session("a")["context"] == {"step": 1}
+    assert len(store) == 3 and store.stats()["sessions"] == 3
+    assert store.delete_session("persisted") is True and store.delete_session("never") is False
+    assert len(store) == 2
+    assert queries == []
+
+    store._conn = conn
+    store.flush()
+    assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == 2
+    store.close()
@@ -0,0 +1,69 @@
+import pytest
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+
+from benchmarks.documents import lorem_lines
+from core.text_splitter import ChunkSplitter, SplitLoader
+from nodes.text_splitters.text_splitter import TextSplitterNode
+
+TEXT = "\n\n".join("\n".join(lorem_lines(n, seed=n)) for n in (2, 15, 1, 30, 4))
+
+def test_recursive_chunks_respect_size_and_overlap():
+    chunks = list(ChunkSplitter(chunk_size=300, chunk_overlap=100).iter_chunks(TEXT))
+    assert len(chunks) > 5
+    for start, chunk in chunks:
+        assert len(chunk) <= 300
+        assert TEXT[start:start + len(chunk)] == chunk
+    # Lines of an oversized paragraph are repeated at the start of the next chunk
+    assert any(b < a + len(x) for (a, x), (b, _) in zip(chunks, chunks[1:]))
+    # Nothing is dropped: every word position is covered by some chunk
+    covered = set()
+    for start, chunk in chunks:
+        covered.update(range(start, start + len(chunk)))
+    assert all(i in covered for i, c in enumerate(TEXT) if not c.isspace())
+
+def test_short_paragraphs_are_not_merged_into_oversized_neighbour():
+    text = "short intro\n\n" + "word " * 100
+    chunks = ChunkSplitter(chunk_size=120, chunk_overlap=0).split_text(text)
+    assert chunks[0] == "short intro"
+    assert max(len(chunk) for chunk in chunks) <= 120
+    assert ChunkSplitter(chunk_size=10, chunk_overlap=0).split_text("x" * 25) == ["x" * 10, "x" * 10, "x" * 5]
+
+def test_separator_is_chosen_per_window():
+    # LangChain keeps "eight" apart from the next paragraph; the window holding
+    # it also holds the paragraph break, so here they share a chunk
+    text = "one two three\nfour five six seven eight\n\nnine ten"
+    assert ChunkSplitter(chunk_size=20, chunk_overlap=0).split_text(text) == [
+        "one two three", "four five six seven", "eight\n\nnine ten",
+    ]
+
+def test_token_windows_overlap():
+    splitter = ChunkSplitter(chunk_size=8, chunk_overlap=2, mode="token", encoding_name=None)
+    text = " ".join(f"w{i}" for i in range(20))
+    assert splitter.split_text(text) == [
+        " ".join(f"w{i}" for i in range(0, 8)),
+        " ".join(f"w{i}" for i in range(6, 14)),
+        " ".join(f"w{i}" for i in range(12, 20)),
+    ]
+
+def test_overlap_must_be_smaller_than_chunk_size():
+    for mode in ("recursive", "token"):
+        with pytest.raises(ValueError, match="must be smaller than chunk_size"):
+            ChunkSplitter(chunk_size=8, chunk_overlap=8, mode=mode, encoding_name=None)
+
+def test_split_loader_streams_connected_loaders():
+    pulled = []
+
+    class Loader(BaseLoader):
+        def lazy_load(self):
+            for i in range(3):
+                pulled.append(i)
+                yield Document(page_content=TEXT, metadata={"source": f"doc-{i}"})
+
+    loader = TextSplitterNode().execute(documents=[Loader(), "plain text"], chunk_size=200, chunk_overlap=20)
+    assert isinstance(loader, SplitLoader)
+    first = next(loader.lazy_load())
+    assert pulled == [0] and first.metadata == {"source": "doc-0", "start_index": 0}
+    documents = loader.load()
+    assert documents[-1].page_content == "plain text"
+    assert {doc.metadata.get("source") for doc in documents} == {"doc-0", "doc-1", "doc-2", None}
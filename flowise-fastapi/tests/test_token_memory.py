@@ -0,0 +1,61 @@
+from langchain_core.messages import SystemMessage
+
+from core.fake_providers import FakeLLM, build_behaviour
+from core.session_store import InMemorySessionStore
+from core.token_memory import TokenBudgetMemory, TokenCounter
+
+def test_token_counter_truncates_from_the_front():
+    counter = TokenCounter(encoding_name=None)
+    assert counter.count("hello, world") == 3
+    assert counter.truncate("one two three four", 2) == "three four"
+
+def test_prompt_stays_within_budget_without_llm():
+    memory = TokenBudgetMemory(max_token_limit=120, summary_token_limit=40, encoding_name=None, summarize_in_background=False)
+    for i in range(50):
+        memory.save_context({"input": f"question number {i} " * 3}, {"output": f"answer number {i} " * 3})
+        assert memory.buffer_tokens <= 120
+
+    messages = memory.load_memory_variables({})["chat_history"]
+    assert isinstance(messages[0], SystemMessage)
+    assert "answer number 49" in messages[-1].content
+    assert "question number 0" not in memory.summary
+
+def test_background_summary_uses_llm():
+    llm = FakeLLM(behaviour=build_behaviour(responses=["They talked about the weather."], script="scripted"))
+    memory = TokenBudgetMemory(llm=llm, max_token_limit=60, summary_token_limit=20, encoding_name=None)
+    for i in range(10):
+        memory.save_context({"input": f"how is the weather {i}"}, {"output": f"sunny and warm {i}"})
+    memory.wait_for_summary(timeout=5)
+
+    assert memory.summary == "They talked about the weather."
+    assert memory.buffer_tokens <= 60
+    history = memory.load_memory_variables({})["chat_history"]
+    assert history[0].content.endswith("They talked about the weather.")
+    assert history[-1].content == "sunny and warm 9"
+
+def test_async_save_keeps_token_accounting():
+    import asyncio
+
+    memory = TokenBudgetMemory(max_token_limit=60, summary_token_limit=20, encoding_name=None, summarize_in_background=False)
+    for i in range(10):
+        asyncio.run(memory.asave_context({"input": f"question {i} " * 3}, {"output": f"answer {i} " * 3}))
+    assert memory.summary and memory.buffer_tokens <= 60
+
+def test_state_is_kept_per_session_and_restored_from_the_store():
+    store = InMemorySessionStore()
+    alice, bob = store.create_session(), store.create_session()
+    memory = TokenBudgetMemory(store=store, max_token_limit=120, summary_token_limit=40, encoding_name=None, summarize_in_background=False)
+    for i in range(20):
+        memory.save_context({"input": f"alice question {i} " * 3, "session_id": alice}, {"output": f"alice answer {i} " * 3})
+    memory.save_context({"input": "hi from bob", "session_id": bob}, {"output": "hello bob"})
+
+    bob_history = memory.load_memory_variables({"session_id": bob})["chat_history"]
+    assert [m.content for m in bob_history] == ["hi from bob", "hello bob"]
+    assert memory.load_memory_variables({})["chat_history"] == []
+    assert store.get_session(alice)["memory_summary"]["text"]
+
+    # A fresh instance (another worker, or after a restart) rebuilds the same window
+    restored = TokenBudgetMemory(store=store, max_token_limit=120, summary_token_limit=40, encoding_name=None, summarize_in_background=False)
+    expected = memory.load_memory_variables({"session_id": alice})["chat_history"]
+    assert restored.load_memory_variables({"session_id": alice})["chat_history"] == expected
+    assert "alice answer 19" in expected[-1].content
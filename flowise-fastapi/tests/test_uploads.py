@@ -0,0 +1,125 @@
+import asyncio
+import os
+import threading
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from api.routers import files
+from core.uploads import UploadStore, get_upload_store
+from nodes.document_loaders.pdf_loader import PDFLoaderNode
+
+@pytest.fixture
+def store(tmp_path):
+    return UploadStore(str(tmp_path / "uploads"), max_bytes=64 * 1024)
+
+def _client(store: UploadStore) -> httpx.AsyncClient:
+    app = FastAPI()
+    app.include_router(files.router, prefix="/api/v1/files")
+    app.dependency_overrides[get_upload_store] = lambda: store
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+async def _chunks(data: bytes, size: int = 4096):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+def test_upload_streams_and_deduplicates(store):
+    data = os.urandom(40_000)
+
+    async def run():
+        async with _client(store) as client:
+            first = await client.post("/api/v1/files", params={"filename": "a.bin"}, content=_chunks(data))
+            second = await client.post("/api/v1/files", params={"filename": "b.bin"}, content=_chunks(data))
+            info = await client.get(f"/api/v1/files/{first.json()['sha256']}")
+            return first, second, info
+
+    first, second, info = asyncio.run(run())
+    assert first.status_code == 201 and second.status_code == 201
+    body = first.json()
+    assert body["size"] == len(data) and body["handle"] == f"upload://{body['sha256']}"
+    assert not body["deduplicated"] and second.json()["deduplicated"]
+    assert second.json()["filename"] == "a.bin" and info.json()["sha256"] == body["sha256"]
+    with open(store.resolve(body["handle"]), "rb") as f:
+        assert f.read() == data
+    assert os.listdir(os.path.join(store.directory, "incoming")) == []
+
+def test_concurrent_duplicates_share_one_reference_counted_file(store):
+    data = os.urandom(20_000)
+
+    async def run():
+        async with _client(store) as client:
+            uploads = await asyncio.gather(*(client.post("/api/v1/files", content=_chunks(data)) for _ in range(4)))
+            sha256 = uploads[0].json()["sha256"]
+            deletes = [await client.delete(f"/api/v1/files/{sha256}") for _ in range(5)]
+            return uploads, deletes
+
+    uploads, deletes = asyncio.run(run())
+    assert sorted(upload.json()["deduplicated"] for upload in uploads) == [False, True, True, True]
+    assert [d.json().get("references") for d in deletes[:4]] == [3, 2, 1, 0]
+    assert deletes[4].status_code == 404
+    assert store.info(uploads[0].json()["sha256"]) is None
+
+def test_delete_waits_for_the_store_lock_off_the_event_loop(store):
+    data = os.urandom(1000)
+    locked, release = threading.Event(), threading.Event()
+
+    def hold_lock():
+        with store._locked():
+            locked.set()
+            release.wait(5)
+
+    async def run():
+        async with _client(store) as client:
+            sha256 = (await client.post("/api/v1/files", content=data)).json()["sha256"]
+            holder = threading.Thread(target=hold_lock)
+            holder.start()
+            locked.wait(5)
+            delete = asyncio.ensure_future(client.delete(f"/api/v1/files/{sha256}"))
+            # The loop keeps running while the delete waits for the other holder
+            for _ in range(5):
+                await asyncio.sleep(0.01)
+            waiting = not delete.done()
+            release.set()
+            response = await delete
+            holder.join()
+            return waiting, response
+
+    waiting, response = asyncio.run(run())
+    assert waiting and response.json()["references"] == 0
+
+def test_upload_size_limit_enforced_while_streaming(store):
+    consumed = []
+
+    async def oversized():
+        for _ in range(100):
+            consumed.append(1)
+            yield b"x" * 4096
+
+    async def run():
+        async with _client(store) as client:
+            streamed = await client.post("/api/v1/files", content=oversized())
+            declared = await client.post("/api/v1/files", content=b"x" * (store.max_bytes + 1))
+            empty = await client.post("/api/v1/files", content=b"")
+            return streamed, declared, empty
+
+    streamed, declared, empty = asyncio.run(run())
+    assert streamed.status_code == 413 and declared.status_code == 413
+    assert empty.status_code == 400
+    # The body was rejected after the limit, not after reading all 400 KB
+    assert len(consumed) <= store.max_bytes // 4096 + 2
+    assert os.listdir(os.path.join(store.directory, "incoming")) == []
+
+def test_pdf_loader_accepts_upload_handle(store, tmp_path, monkeypatch):
+    from benchmarks.documents import write_text_pdf
+
+    pdf = write_text_pdf(tmp_path / "doc.pdf", [["Uploaded page"]])
+    with open(pdf, "rb") as f:
+        stored = asyncio.run(store.save(_chunks(f.read()), filename="doc.pdf"))
+    monkeypatch.setattr("core.uploads.get_upload_store", lambda: store)
+    monkeypatch.setattr("nodes.document_loaders.pdf_loader.get_parse_cache", lambda: None)
+
+    docs = PDFLoaderNode()._execute(file_path=stored.handle).load()
+    assert docs[0].page_content.startswith("Uploaded page")
+    with pytest.raises(ValueError):
+        PDFLoaderNode()._execute(file_path="upload://" + "0" * 64)
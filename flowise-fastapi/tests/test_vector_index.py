@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from core.chroma_registry import ChromaRegistry
+from core.hashing_embeddings import HashingEmbeddings
+from core.vector_index import MmapVectorIndex, VectorIndexRetriever, get_vector_index
+from nodes.retrievers.vector_index_retriever import VectorIndexRetrieverNode
+
+def _random_index(path, count=500, dimensions=16):
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((count, dimensions)).astype(np.float32)
+    index = MmapVectorIndex(str(path))
+    index.upsert(
+        [f"id-{i}" for i in range(count)],
+        vectors,
+        [f"text {i}" for i in range(count)],
+        [{"group": i % 3} for i in range(count)]
+    )
+    return index, vectors / np.linalg.norm(vectors, axis=1, keepdims=True), rng
+
+def test_search_matches_brute_force_and_persists(tmp_path):
+    index, normalized, rng = _random_index(tmp_path)
+    queries = rng.standard_normal((5, 16)).astype(np.float32)
+    expected = np.argsort(-(queries / np.linalg.norm(queries, axis=1, keepdims=True)) @ normalized.T, axis=1)[:, :5]
+
+    for hits, rows in zip(index.search(queries, k=5), expected):
+        assert [row for row, _ in hits] == list(rows)
+
+    reopened = MmapVectorIndex(str(tmp_path))
+    assert len(reopened) == 500
+    assert reopened.search(queries, k=5) == index.search(queries, k=5)
+    assert reopened.documents(reopened.search(queries[:1], k=1)[0])[0].page_content == f"text {expected[0][0]}"
+
+def test_filters_and_overwrites(tmp_path):
+    index, _, rng = _random_index(tmp_path)
+    query = rng.standard_normal(16).astype(np.float32)
+
+    hits = index.search(query, k=10, where={"group": 1})[0]
+    assert len(hits) == 10 and all(row % 3 == 1 for row, _ in hits)
+    assert all(row % 3 != 0 for row, _ in index.search(query, k=10, where={"group": [1, 2]})[0])
+    assert index.search(query, k=10, where={"group": 7}) == [[]]
+
+    index.upsert(["id-4"], [query], ["replaced"], [{"group": 0}])
+    assert len(index) == 500
+    row, score = index.search(query, k=1)[0][0]
+    assert row == 4 and abs(score - 1.0) < 1e-5
+    document = MmapVectorIndex(str(tmp_path)).documents([(row, score)])[0]
+    assert (document.id, document.page_content, document.metadata["group"]) == ("id-4", "replaced", 0)
+
+def test_overwrites_compact_records(tmp_path):
+    index, _, rng = _random_index(tmp_path, count=50)
+    records = tmp_path / "records.jsonl"
+    live_size = records.stat().st_size
+    for version in range(40):
+        index.upsert([f"id-{i}" for i in range(50)], rng.standard_normal((50, 16)), [f"v{version} {i}" for i in range(50)])
+    index.compact()
+    assert records.stat().st_size < 2 * live_size
+    assert list(MmapVectorIndex(str(tmp_path)).records())[7] == ("id-7", "v39 7")
+
+def test_index_names_cannot_leave_the_directory(tmp_path):
+    for name in ("../escape", "a/b", "/abs", "", ".hidden"):
+        with pytest.raises(ValueError):
+            get_vector_index(name, str(tmp_path))
+    assert get_vector_index("docs-v1.2_x", str(tmp_path)).directory == str(tmp_path / "docs-v1.2_x")
+
+def test_retriever_batch_and_node_import_from_chroma(tmp_path, monkeypatch):
+    embeddings = HashingEmbeddings(dimensions=64)
+    registry = ChromaRegistry(str(tmp_path / "chroma"))
+    registry.vectorstore("docs", embeddings).add_texts(
+        ["cats purr softly", "dogs bark loudly", "birds sing at dawn"],
+        metadatas=[{"kind": "cat"}, {"kind": "dog"}, {"kind": "bird"}]
+    )
+    monkeypatch.setattr("nodes.retrievers.vector_index_retriever.get_chroma_registry", lambda: registry)
+    monkeypatch.setattr(
+        "nodes.retrievers.vector_index_retriever.get_vector_index",
+        lambda name: MmapVectorIndex(str(tmp_path / "index" / name))
+    )
+
+    retriever = VectorIndexRetrieverNode().execute(
+        inputs={"collection_name": "docs", "k": 1},
+        connected_nodes={"embedding_function": embeddings}
+    )
+    assert isinstance(retriever, VectorIndexRetriever)
+    assert len(retriever.index) == 3
+    assert [docs[0].page_content for docs in retriever.batch(["dogs bark", "birds sing"])] == ["dogs bark loudly", "birds sing at dawn"]
+
+    filtered = VectorIndexRetrieverNode().execute(
+        inputs={"collection_name": "docs", "k": 3, "filter": '{"kind": "cat"}'},
+        connected_nodes={"embedding_function": embeddings}
+    )
+    assert [doc.page_content for doc in filtered.invoke("dogs bark")] == ["cats purr softly"]
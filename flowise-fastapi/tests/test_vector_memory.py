@@ -0,0 +1,63 @@
+import threading
+
+import numpy as np
+
+from core.hashing_embeddings import HashingEmbeddings
+from core.session_store import InMemorySessionStore
+from core.vector_memory import TurnIndex, VectorRetrieverMemory
+
+TOPICS = ["billing invoice refund", "password reset login", "shipping delivery tracking", "printer driver install"]
+
+def test_hashing_embeddings_are_normalised_and_deterministic():
+    embeddings = HashingEmbeddings(dimensions=64)
+    vector = np.array(embeddings.embed_query("reset my password"))
+    assert vector.shape == (64,)
+    assert abs(np.linalg.norm(vector) - 1.0) < 1e-5
+    assert embeddings.embed_query("reset my password") == embeddings.embed_documents(["reset my password"])[0]
+
+def test_turn_index_evicts_oldest_half_when_full():
+    index = TurnIndex(dimensions=4, max_turns=4)
+    for i in range(5):
+        index.add(np.eye(4, dtype=np.float32)[i % 4], f"q{i}", f"a{i}")
+    assert [human for human, _ in index.turns] == ["q2", "q3", "q4"]
+    assert index.search(np.eye(4, dtype=np.float32)[2], k=1) == [0]
+
+def test_turn_index_searches_see_consistent_snapshots_during_adds():
+    index = TurnIndex(dimensions=8, max_turns=64)
+    basis = np.eye(8, dtype=np.float32)
+    done = threading.Event()
+    mismatches = []
+    for i in range(8):
+        index.add(basis[i], f"q{i}", str(i))
+
+    def writer():
+        for i in range(8, 20_000):
+            index.add(basis[i % 8], f"q{i}", str(i % 8))
+        done.set()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    while not done.is_set():
+        mismatches.extend(ai for _, ai in index.recall(basis[3], k=1, recent=0) if ai != "3")
+    thread.join()
+    assert mismatches == []
+
+def test_retrieves_relevant_and_recent_turns():
+    store = InMemorySessionStore()
+    sid = store.create_session()
+    # History written before the memory existed is indexed on first use
+    for i in range(20):
+        topic = TOPICS[i % len(TOPICS)]
+        store.add_message(sid, f"question about {topic} {i}", f"answer about {topic}")
+    memory = VectorRetrieverMemory(k=2, recent_k=1, store=store)
+
+    messages = memory.load_memory_variables({"input": "I need a refund for my invoice", "session_id": sid})["chat_history"]
+    humans = [m.content for m in messages[::2]]
+    assert len(humans) == 3
+    assert all("billing" in h for h in humans[:2])
+    assert humans[-1] == "question about printer driver install 19"
+
+    memory.save_context({"input": "where is my delivery", "session_id": sid}, {"output": "tracking sent"})
+    assert store.get_session(sid)["messages"].exchanges()[-1]["ai"] == "tracking sent"
+    latest = memory.load_memory_variables({"input": "thanks", "session_id": sid})["chat_history"]
+    assert latest[-1].content == "tracking sent"